@@ -1,6 +1,6 @@
 {
     'name': 'Employee Timesheet Report',
-    'version': '18.0.1.1.0',
+    'version': '18.0.1.9.0',
     'category': 'Human Resources/Timesheets',
     'summary': 'Advanced timesheet report with overtime, delay tracking and XML export',
     'description': """
@@ -9,17 +9,23 @@ Employee Timesheet Report
 
 This module provides:
 - Comprehensive timesheet reporting with start/end time tracking
-- Office hours calculation (8:30-18:30 local time)
+- Table-backed report refreshed incrementally on timesheet and leave changes
+- Office hours calculation from the employee working schedule and timezone
 - Overtime calculation (18:00-22:00)
 - Night overtime calculation (22:00-06:00)
 - Delay/lateness tracking
-- Weekend and Italian public holiday detection
-- XML export for Italian payroll systems
-- Leave records integration
+- Monthly attendance summary per employee, refreshed with the report
+- Weekend and Italian public holiday detection (offline calendar with
+  regional/patron saint days per office and manual overrides)
+- XML export for Italian payroll systems, processed as background jobs
+- Export ledger and delta exports (only new, changed or cancelled movements)
+- Cached download endpoint: GET /timesheet/export/xml?date_from=&date_to=&employee_ids=
+- Leave records integration, with payroll codes stored on time off types
 
 Configuration:
 - Add payroll_code to employees for proper XML export
-- Server timezone should be set correctly for accurate hour calculations
+- Set the working schedule and timezone of employees for accurate hour calculations
+  (employees without them use 08:30-17:30 Europe/Rome)
     """,
     'author': 'Sajjad',
     'website': '',
@@ -28,15 +34,24 @@ Configuration:
         'hr_timesheet',
         'hr_holidays',
         'project',
+        'mail',
         'web',
     ],
     'data': [
         'security/ir.model.access.csv',
+        'security/timesheet_payroll_export_security.xml',
         'views/timesheet_report_views.xml',
+        'views/timesheet_report_monthly_views.xml',
         'views/hr_employee_views.xml',
+        'views/hr_leave_type_views.xml',
+        'views/timesheet_holiday_views.xml',
+        'data/timesheet_holiday_cron.xml',
+        'views/timesheet_payroll_export_views.xml',
+        'data/timesheet_payroll_export_cron.xml',
     ],
     'assets': {},
     'installable': True,
     'application': False,
     'auto_install': False,
+    'post_init_hook': 'post_init_hook',
 }
@@ -1,6 +1,5 @@
-from odoo import http
-from odoo.http import content_disposition, request
-import base64
+from odoo import http, fields
+from odoo.http import request
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -9,34 +8,38 @@ _logger = logging.getLogger(__name__)
 class TimesheetReportController(http.Controller):
     """Controller for handling timesheet report file downloads"""
 
-    @http.route('/timesheet/export/xml', type='http', auth="user", methods=['GET', 'POST'])
-    def export_timesheet_xml(self, data=None, filename=None, **kwargs):
+    @http.route('/timesheet/export/xml', type='http', auth="user", methods=['GET'])
+    def export_timesheet_xml(self, date_from=None, date_to=None, employee_ids=None, **kwargs):
         """
-        Download XML file for timesheet report.
-        
+        Download the payroll XML of a period, generated on the server.
+
+        The file is cached until the underlying timesheets or leaves change,
+        and served with ETag/Last-Modified headers so that unchanged exports
+        are answered with 304 Not Modified.
+
         Args:
-            data: Base64 encoded XML content
-            filename: Name for the downloaded file
-            
+            date_from: First day of the period (YYYY-MM-DD)
+            date_to: Last day of the period (YYYY-MM-DD)
+            employee_ids: Optional comma separated employee ids
+
         Returns:
             HTTP response with XML file download
         """
-        if not data or not filename:
-            return request.not_found("Missing required parameters: data and filename")
-        
+        if not date_from or not date_to:
+            return request.not_found("Missing required parameters: date_from and date_to")
+
         try:
-            file_content = base64.b64decode(data)
-            return request.make_response(
-                file_content,
-                headers=[
-                    ('Content-Type', 'application/xml; charset=utf-8'),
-                    ('Content-Disposition', content_disposition(filename)),
-                    ('Content-Length', len(file_content)),
-                ]
-            )
-        except base64.binascii.Error as e:
-            _logger.error(f"Failed to decode base64 data: {e}")
-            return request.not_found("Invalid file data encoding")
-        except Exception as e:
-            _logger.error(f"Error generating XML file: {e}")
-            return request.not_found(f"Error generating file: {str(e)}")
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+            employee_ids = [int(employee_id) for employee_id in (employee_ids or '').split(',') if employee_id]
+        except ValueError as e:
+            _logger.error(f"Invalid export parameters: {e}")
+            return request.not_found("Invalid parameters: dates must be YYYY-MM-DD and employee_ids integers")
+
+        attachment = request.env['timesheet.report']._get_cached_export(date_from, date_to, employee_ids)
+        stream = request.env['ir.binary']._get_stream_from(
+            attachment,
+            filename=f'timesheet_report_{date_from}_{date_to}.xml',
+            mimetype='application/xml',
+        )
+        return stream.get_response(as_attachment=True)
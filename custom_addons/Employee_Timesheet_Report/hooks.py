@@ -0,0 +1,3 @@
+def post_init_hook(env):
+    """Seed the payroll codes of the existing time off types"""
+    env['hr.leave.type']._seed_payroll_codes()
@@ -0,0 +1,16 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run AFTER module update:
+    Seed hr.leave.type.payroll_code from the name mapping the exporter used
+    before. The write refreshes the leave rows of the report table.
+    """
+    _logger.info("=== Running POST-migration script for version %s ===" % version)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['hr.leave.type']._seed_payroll_codes()
@@ -1 +1,9 @@
-from . import timesheet_report
\ No newline at end of file
+from . import timesheet_holiday
+# The columns the report table is built from must exist before timesheet_report.init()
+from . import hr_leave_type
+from . import resource_calendar
+from . import timesheet_report
+from . import timesheet_report_monthly
+from . import timesheet_payroll_export
+from . import account_analytic_line
+from . import hr_leave
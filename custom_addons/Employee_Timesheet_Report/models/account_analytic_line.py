@@ -0,0 +1,33 @@
+from odoo import models, api
+
+
+class AccountAnalyticLine(models.Model):
+    """Keep the timesheet report table in sync with timesheet entries"""
+    _inherit = 'account.analytic.line'
+
+    # Fields the timesheet report is computed from
+    _TIMESHEET_REPORT_FIELDS = {'employee_id', 'date', 'date_time', 'unit_amount', 'project_id', 'task_id'}
+
+    def _get_timesheet_report_days(self):
+        """Return the (employee_id, date) pairs of the report rows built from these lines"""
+        return {(line.employee_id.id, line.date) for line in self if line.employee_id and line.date}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['timesheet.report']._mark_employee_days_dirty(lines._get_timesheet_report_days())
+        return lines
+
+    def write(self, vals):
+        if not self._TIMESHEET_REPORT_FIELDS.intersection(vals):
+            return super().write(vals)
+        # Rows of the old and the new employee-days are both affected
+        employee_days = self._get_timesheet_report_days()
+        res = super().write(vals)
+        employee_days |= self._get_timesheet_report_days()
+        self.env['timesheet.report']._mark_employee_days_dirty(employee_days)
+        return res
+
+    def unlink(self):
+        self.env['timesheet.report']._mark_employee_days_dirty(self._get_timesheet_report_days())
+        return super().unlink()
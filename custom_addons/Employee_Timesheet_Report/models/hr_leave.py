@@ -0,0 +1,37 @@
+from odoo import models, api
+
+
+class HrLeave(models.Model):
+    """Keep the timesheet report table in sync with validated leaves"""
+    _inherit = 'hr.leave'
+
+    # Fields the leave rows of the timesheet report are computed from
+    _TIMESHEET_REPORT_FIELDS = {'employee_id', 'state', 'request_date_from', 'request_date_to', 'holiday_status_id'}
+
+    def _get_timesheet_report_days(self):
+        """Return the (employee_id, date) pairs of the report rows built from these leaves"""
+        return {
+            (leave.employee_id.id, leave.request_date_from)
+            for leave in self
+            if leave.employee_id and leave.request_date_from
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leaves = super().create(vals_list)
+        validated = leaves.filtered(lambda leave: leave.state == 'validate')
+        self.env['timesheet.report']._mark_employee_days_dirty(validated._get_timesheet_report_days())
+        return leaves
+
+    def write(self, vals):
+        if not self._TIMESHEET_REPORT_FIELDS.intersection(vals):
+            return super().write(vals)
+        employee_days = self._get_timesheet_report_days()
+        res = super().write(vals)
+        employee_days |= self._get_timesheet_report_days()
+        self.env['timesheet.report']._mark_employee_days_dirty(employee_days)
+        return res
+
+    def unlink(self):
+        self.env['timesheet.report']._mark_employee_days_dirty(self._get_timesheet_report_days())
+        return super().unlink()
@@ -0,0 +1,135 @@
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Official payroll codes of the leave types, by leave type name. Used to seed
+# hr.leave.type.payroll_code; leaves without a code are exported as 'OR'.
+LEAVE_PAYROLL_CODES = {
+    'FE Ferie': 'FE',
+    'V6 Assegno ordinar. pagam.diretto': 'V6',
+    'Permesso (Ore)': 'Ore',
+    'AI Assenza ingiustificata': 'AI',
+    'A4 Quarantena sorv.attiva COVID19': 'A4',
+    'AL Allattamento': 'AL',
+    'C2 Solidarieta\'aut.DLsg 148/15': 'C2',
+    'FR Cong.parentale a GG da 10 mesi ind.30%': 'FR',
+    'C5 CIG aut.(maltempo)Evento CIG': 'C5',
+    'C6 Solidarieta\' anticipata': 'C6',
+    'F2 Flessibilita\' Tipo 2': 'F2',
+    'FS Festività lavorata': 'FS',
+    'IN Infortunio': 'IN',
+    'LF Lavoro festivo': 'LF',
+    'LN Supplementare notturno': 'LN',
+    'LS Supplementare diurno': 'LS',
+    'M1 Perm.retr. per MA bimbo < 3a': 'M1',
+    'M2 Cong.parentale a HH da 7 a 9 mesi': 'M2',
+    'M3 Mal. bambino < 3 anni (MA3)': 'M3',
+    'M4  Prolung. congedo parentale disabili': 'M4',
+    'M5 Cong.parentale a HH entro 6 mesi': 'M5',
+    'M6 Cong.parentale a HH da 10 mesi non ind': 'M6',
+    'M7 Cong.parentale a GG da 7 a 9 mesi': 'M7',
+    'S5 Straord. porte chiuse festivo': 'S5',
+    'S3 Straord. porte chiuse feriale': 'S3',
+    'T3 Cig fondo solidarieta': 'T3',
+    'S4 Straord. porte aperte festivo': 'S4',
+    'SD Sospensione disciplinare': 'SD',
+    'V1 Volontariato Protezione Civile': 'V1',
+    'SC Sciopero': 'SC',
+    'SN Straordinario notturno': 'SN',
+    'ST Straordinario diurno': 'ST',
+    'V2 Assenza ingiust. no green-pass': 'V2',
+    'VV Cong. vittime violenza (DVV)': 'VV',
+    'V9 Congedo quarant.figli DL111/20': 'V9',
+    'VI Permessi Visite Inail': 'VI',
+    'VM Permessi per visita medica': 'VM',
+    'VO Cong. vittime viol.a ore (DVO)': 'VO',
+    'A5 Assenza aut. sanitarie COVID19': 'A5',
+    'A6 CIGO pagamento diretto': 'A6',
+    'A8 Congedo genitor.retrib.COVID19': 'A8',
+    'A9 Congedo genit.non retr.COVID19': 'A9',
+    'AH Assenza assunti/dimessi': 'AH',
+    'AP Aspettativa non retribuita': 'AP',
+    'AR Aspettativa Retribuita': 'AR',
+    'AS Assemblea sindacale': 'AS',
+    'BO Permessi banca ore goduti': 'BO',
+    'C1 Solidarieta\'antic.DLgs.148/15': 'C1',
+    'C3 Cig autorizz.post D.Lgs.148/15': 'C3',
+    'C4 CIG ant.(maltempo)Evento CIG': 'C4',
+    'C9 CIG autorizz. Evento Maltempo': 'C9',
+    'CA CIG anticipata': 'CA',
+    'CC CIG autorizzata (no ctr.add.)': 'CC',
+    'F1 Flessibilita\' Tipo 1': 'F1',
+    'F3 Flessibilita\' Tipo 3': 'F3',
+    'C7 Solidarieta\' autorizzata': 'C7',
+    'F7 Ferie solidarieta\' autorizzata': 'F7',
+    'C8 CIG anticipata Evento Maltempo': 'C8',
+    'CB CIG autorizzata (si ctr.add.)': 'CB',
+    'CP Congedo obbligatorio del padre': 'CP',
+    'EM Emodialisi': 'EM',
+    'CD Congedi straordinari disabili': 'CD',
+    'CF Congedo facoltativo del padre': 'CF',
+    'CI CIG non retribuita': 'CI',
+    'CM Congedo matrimoniale': 'CM',
+    'CV Perm. non retrib. Ctr virtuale': 'CV',
+    'CY Morbo Cooley': 'CY',
+    'DM Donazione midollo osseo': 'DM',
+    'DS Donazione sangue': 'DS',
+    'FG Flessibilita\' godute': 'FG',
+    'GO Giornata ad orario ridotto-GOR': 'GO',
+    'D2 Permessi disabili gg COVID19': 'D2',
+    'MF Cong.parentale a GG entro 6 mesi': 'MF',
+    'MI Militare': 'MI',
+    'MM Malattia non conta per malus': 'MM',
+    'MN Cong.parentale a GG da 10 mesi non ind': 'MN',
+    'MO Malattia ospedaliera': 'MO',
+    'MR Mancata certific.ricaduta mal.': 'MR',
+    'MT Maternita\' obbligatoria': 'MT',
+    'MX Malattia no trattam. speciale': 'MX',
+}
+
+
+class HrLeaveType(models.Model):
+    """Official payroll code of the time off types, joined by the timesheet report"""
+    _inherit = 'hr.leave.type'
+
+    payroll_code = fields.Char(
+        string='Payroll Code',
+        index=True,
+        help='Official code of this time off type in the payroll XML export (e.g., FE). '
+             'Leaves of a type without code are exported as OR.'
+    )
+
+    @api.model
+    def _get_default_payroll_code(self, names):
+        """Payroll code of the first of the given names found in the mapping"""
+        return next((LEAVE_PAYROLL_CODES[name] for name in names if name in LEAVE_PAYROLL_CODES), False)
+
+    @api.model
+    def _seed_payroll_codes(self):
+        """Set the payroll code of the leave types without one from their name in any language"""
+        self.flush_model(['name', 'payroll_code'])
+        self.env.cr.execute("SELECT id, name FROM hr_leave_type WHERE payroll_code IS NULL")
+        leave_type_ids_by_code = {}
+        for leave_type_id, names in self.env.cr.fetchall():
+            # Same language priority the report used to read the name with
+            ordered_names = [names.get(lang) for lang in ('en_US', 'fa_IR', 'it_IT')] + list(names.values())
+            code = self._get_default_payroll_code(ordered_names)
+            if code:
+                leave_type_ids_by_code.setdefault(code, []).append(leave_type_id)
+        for code, leave_type_ids in leave_type_ids_by_code.items():
+            self.browse(leave_type_ids).write({'payroll_code': code})
+        _logger.info("Seeded payroll codes of %s leave types", sum(map(len, leave_type_ids_by_code.values())))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if not vals.get('payroll_code') and isinstance(vals.get('name'), str):
+                vals['payroll_code'] = self._get_default_payroll_code([vals['name']])
+        return super().create(vals_list)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'payroll_code' in vals:
+            self.env['timesheet.report']._mark_leave_types_dirty(self.ids)
+        return res
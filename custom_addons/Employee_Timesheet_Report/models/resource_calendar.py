@@ -0,0 +1,48 @@
+from odoo import models, api
+
+
+class ResourceCalendar(models.Model):
+    """Keep the timesheet report in sync with the working schedules it computes bands from"""
+    _inherit = 'resource.calendar'
+
+    def _mark_timesheet_report_dirty(self):
+        employees = self.env['hr.employee'].with_context(active_test=False).search([
+            ('resource_calendar_id', 'in', self.ids),
+        ])
+        self.env['timesheet.report']._mark_employees_dirty(employees.ids)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'two_weeks_calendar' in vals:
+            self._mark_timesheet_report_dirty()
+        return res
+
+
+class ResourceCalendarAttendance(models.Model):
+    _inherit = 'resource.calendar.attendance'
+
+    # Fields the office band of the timesheet report is computed from
+    _TIMESHEET_REPORT_FIELDS = {
+        'calendar_id', 'dayofweek', 'hour_from', 'hour_to', 'day_period',
+        'week_type', 'date_from', 'date_to', 'resource_id', 'display_type',
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        attendances = super().create(vals_list)
+        attendances.calendar_id._mark_timesheet_report_dirty()
+        return attendances
+
+    def write(self, vals):
+        if not self._TIMESHEET_REPORT_FIELDS.intersection(vals):
+            return super().write(vals)
+        calendars = self.calendar_id
+        res = super().write(vals)
+        (calendars | self.calendar_id)._mark_timesheet_report_dirty()
+        return res
+
+    def unlink(self):
+        calendars = self.calendar_id
+        res = super().unlink()
+        calendars._mark_timesheet_report_dirty()
+        return res
@@ -0,0 +1,219 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from datetime import date, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def easter_sunday(year):
+    """Compute the date of (Gregorian) Easter Sunday with the Meeus/Jones/Butcher algorithm"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def italian_national_holidays(year):
+    """Return the Italian national public holidays of a year as a list of (date, name)"""
+    easter = easter_sunday(year)
+    holidays = [
+        (date(year, 1, 1), "Capodanno"),
+        (date(year, 1, 6), "Epifania"),
+        (easter, "Pasqua"),
+        (easter + timedelta(days=1), "Lunedì dell'Angelo"),
+        (date(year, 4, 25), "Festa della Liberazione"),
+        (date(year, 5, 1), "Festa del Lavoro"),
+        (date(year, 6, 2), "Festa della Repubblica"),
+        (date(year, 8, 15), "Ferragosto"),
+        (date(year, 11, 1), "Ognissanti"),
+        (date(year, 12, 8), "Immacolata Concezione"),
+        (date(year, 12, 25), "Natale"),
+        (date(year, 12, 26), "Santo Stefano"),
+    ]
+    if year >= 2026:
+        # Reinstated as a national holiday by Law 151/2025
+        holidays.append((date(year, 10, 4), "San Francesco d'Assisi"))
+    return holidays
+
+
+class TimesheetHolidayRule(models.Model):
+    """Recurring local holiday (regional holiday or patron saint day) of an office"""
+    _name = 'timesheet.holiday.rule'
+    _description = 'Local Holiday Rule'
+    _order = 'work_location_id, month, day'
+
+    name = fields.Char(string='Name', required=True, help='e.g., Sant\'Ambrogio')
+    work_location_id = fields.Many2one(
+        'hr.work.location',
+        string='Office',
+        required=True,
+        ondelete='cascade',
+        help='Office whose employees are off on this day'
+    )
+    month = fields.Selection(
+        [(str(month), date(2000, month, 1).strftime('%B')) for month in range(1, 13)],
+        string='Month',
+        required=True
+    )
+    day = fields.Integer(string='Day', required=True)
+    active = fields.Boolean(default=True)
+    holiday_ids = fields.One2many('timesheet.holiday', 'rule_id', string='Generated Holidays')
+
+    @api.constrains('month', 'day')
+    def _check_day(self):
+        for rule in self:
+            try:
+                # 2000 is a leap year, so 29 February is accepted
+                date(2000, int(rule.month), rule.day)
+            except ValueError:
+                raise ValidationError(_("%(day)s is not a valid day of the month.", day=rule.day))
+
+    def _get_holiday_date(self, year):
+        """Date of the rule in the given year, None when it does not exist (29 February)"""
+        self.ensure_one()
+        try:
+            return date(year, int(self.month), self.day)
+        except ValueError:
+            return None
+
+    def _regenerate_holidays(self):
+        """Replace the holidays generated from these rules in every year already generated"""
+        Holiday = self.env['timesheet.holiday']
+        Holiday.search([('rule_id', 'in', self.ids)]).unlink()
+        Holiday._generate_holidays(Holiday._get_generated_years())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules._regenerate_holidays()
+        return rules
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._regenerate_holidays()
+        return res
+
+    def unlink(self):
+        self.env['timesheet.holiday'].search([('rule_id', 'in', self.ids)]).unlink()
+        return super().unlink()
+
+
+class TimesheetHoliday(models.Model):
+    """
+    Local public holiday calendar used by the timesheet report.
+
+    National holidays are computed (fixed dates and Easter based ones), local
+    holidays are generated from the office rules, and administrators can add
+    manual overrides: an override marks a day as holiday or, with 'Non-working
+    Day' unchecked, as a regular working day. No network access is needed.
+    """
+    _name = 'timesheet.holiday'
+    _description = 'Public Holiday'
+    _order = 'date desc, work_location_id'
+
+    name = fields.Char(string='Name', required=True)
+    date = fields.Date(string='Date', required=True, index=True)
+    year = fields.Integer(string='Year', compute='_compute_year', store=True)
+    work_location_id = fields.Many2one(
+        'hr.work.location',
+        string='Office',
+        ondelete='cascade',
+        help='Leave empty for holidays that apply to all offices'
+    )
+    holiday_type = fields.Selection([
+        ('national', 'National'),
+        ('local', 'Regional / Patron Saint'),
+        ('override', 'Manual Override'),
+    ], string='Type', required=True, default='override')
+    is_holiday = fields.Boolean(
+        string='Non-working Day',
+        default=True,
+        help='Uncheck on a manual override to make a computed holiday a regular working day'
+    )
+    rule_id = fields.Many2one('timesheet.holiday.rule', string='Rule', ondelete='cascade', readonly=True)
+
+    @api.depends('date')
+    def _compute_year(self):
+        for holiday in self:
+            holiday.year = holiday.date.year if holiday.date else 0
+
+    @api.model
+    def _get_generated_years(self):
+        """Years for which the national calendar has been generated"""
+        self.env.cr.execute("SELECT DISTINCT year FROM timesheet_holiday WHERE holiday_type = 'national'")
+        return [year for year, in self.env.cr.fetchall()]
+
+    @api.model
+    def _generate_holidays(self, years):
+        """
+        Create the national and local holidays of the given years.
+        Existing holidays are kept, so this can be run any number of times.
+        """
+        years = set(years)
+        if not years:
+            return self.browse()
+        existing = {
+            (holiday.date, holiday.work_location_id.id, holiday.holiday_type, holiday.rule_id.id)
+            for holiday in self.search([('year', 'in', list(years)), ('holiday_type', '!=', 'override')])
+        }
+        rules = self.env['timesheet.holiday.rule'].search([])
+        vals_list = []
+        for year in sorted(years):
+            for holiday_date, name in italian_national_holidays(year):
+                if (holiday_date, False, 'national', False) not in existing:
+                    vals_list.append({'name': name, 'date': holiday_date, 'holiday_type': 'national'})
+            for rule in rules:
+                holiday_date = rule._get_holiday_date(year)
+                if holiday_date and (holiday_date, rule.work_location_id.id, 'local', rule.id) not in existing:
+                    vals_list.append({
+                        'name': rule.name,
+                        'date': holiday_date,
+                        'work_location_id': rule.work_location_id.id,
+                        'holiday_type': 'local',
+                        'rule_id': rule.id,
+                    })
+        holidays = self.create(vals_list)
+        if holidays:
+            _logger.info("Generated %s holidays for years %s", len(holidays), sorted(years))
+        return holidays
+
+    @api.model
+    def _cron_generate_holidays(self):
+        """Make sure the current and the next year are always generated"""
+        this_year = fields.Date.context_today(self).year
+        self._generate_holidays([this_year, this_year + 1])
+
+    def init(self):
+        # Cover every year with timesheet data, so the report built right
+        # after this has its holiday flags from the start
+        self.env.cr.execute("SELECT EXTRACT(YEAR FROM MIN(date))::integer FROM account_analytic_line")
+        first_year = self.env.cr.fetchone()[0]
+        this_year = fields.Date.context_today(self).year
+        self._generate_holidays(range(min(first_year or this_year, this_year), this_year + 2))
+
+    def _mark_timesheet_report_dirty(self):
+        self.env['timesheet.report']._mark_dates_dirty(self.mapped('date'))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        holidays = super().create(vals_list)
+        holidays._mark_timesheet_report_dirty()
+        return holidays
+
+    def write(self, vals):
+        self._mark_timesheet_report_dirty()
+        res = super().write(vals)
+        self._mark_timesheet_report_dirty()
+        return res
+
+    def unlink(self):
+        self._mark_timesheet_report_dirty()
+        return super().unlink()
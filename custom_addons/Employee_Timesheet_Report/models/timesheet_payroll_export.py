@@ -0,0 +1,498 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+from ast import literal_eval
+from itertools import groupby
+from operator import itemgetter
+import tempfile
+import xml.etree.ElementTree as ET
+import traceback
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Employees exported between two commits of the export cron
+EXPORT_CHUNK_SIZE = 50
+# Chunks exported by one run of the export cron, which re-triggers itself for the rest
+EXPORT_CRON_MAX_CHUNKS = 100
+
+
+class TimesheetPayrollExport(models.Model):
+    """
+    Payroll XML export processed in the background.
+
+    The export is split in chunks of employees, each chunk is written to its
+    own part attachment and committed, and the progress (last exported
+    employee) is stored on the job, so a crashed or killed worker resumes
+    where it stopped. When every chunk is done the parts are assembled into
+    the final XML file and the requester is notified.
+
+    Every exported movement is recorded in the export ledger, summed per
+    (employee, date, code). A 'delta' export compares the current movements
+    of its period with the last values sent for them and only exports the
+    new and changed ones, plus 00:00 movements for the cancelled ones.
+    """
+    _name = 'timesheet.payroll.export'
+    _description = 'Payroll XML Export'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, default=lambda self: _('Payroll Export'))
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='queued', required=True, readonly=True, tracking=True)
+    user_id = fields.Many2one(
+        'res.users',
+        string='Requested By',
+        default=lambda self: self.env.user,
+        required=True,
+        readonly=True
+    )
+
+    mode = fields.Selection([
+        ('full', 'Full'),
+        ('delta', 'Changes Since Last Export'),
+    ], string='Mode', default='full', required=True,
+        help='Changes Since Last Export only sends the movements that are new, changed or cancelled '
+             'compared to the previous exports of the period')
+
+    # Export filters
+    date_from = fields.Date(string='From')
+    date_to = fields.Date(string='To')
+    employee_ids = fields.Many2many('hr.employee', string='Employees', help='Leave empty to export all employees')
+    report_domain = fields.Text(
+        string='Report Domain',
+        readonly=True,
+        help='Domain on the timesheet report, used instead of the filters above when set'
+    )
+
+    # Progress
+    employee_count = fields.Integer(string='Employees to Export', readonly=True)
+    employee_done = fields.Integer(string='Employees Exported', readonly=True)
+    last_employee_id = fields.Integer(
+        string='Last Exported Employee',
+        readonly=True,
+        help='Resume point: employees are exported in id order'
+    )
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    part_attachment_ids = fields.Many2many(
+        'ir.attachment',
+        'timesheet_payroll_export_part_rel',
+        string='Exported Parts',
+        readonly=True
+    )
+    attachment_id = fields.Many2one('ir.attachment', string='XML File', readonly=True)
+    date_start = fields.Datetime(string='Started On', readonly=True)
+    date_done = fields.Datetime(string='Finished On', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+    line_ids = fields.One2many('timesheet.payroll.export.line', 'export_id', string='Exported Movements', readonly=True)
+    line_count = fields.Integer(string='Movements', compute='_compute_line_count')
+
+    @api.depends('employee_count', 'employee_done', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.employee_count:
+                job.progress = 100.0 * job.employee_done / job.employee_count
+            else:
+                job.progress = 0.0
+
+    def _compute_line_count(self):
+        counts = dict(self.env['timesheet.payroll.export.line']._read_group(
+            [('export_id', 'in', self.ids)], ['export_id'], ['__count'],
+        ))
+        for job in self:
+            job.line_count = counts.get(job, 0)
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for job in self:
+            if job.date_from and job.date_to and job.date_from > job.date_to:
+                raise ValidationError(_("The start date must be before the end date."))
+
+    @api.constrains('mode', 'date_from', 'date_to', 'report_domain')
+    def _check_delta_scope(self):
+        for job in self:
+            if job.mode == 'delta' and (job.report_domain or not job.date_from or not job.date_to):
+                raise ValidationError(_(
+                    "An export of the changes since the last export needs a period, "
+                    "to know which previously sent movements were cancelled."
+                ))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        self.env.ref('Employee_Timesheet_Report.ir_cron_process_payroll_exports')._trigger()
+        return jobs
+
+    def _get_report_domain(self):
+        """Domain on timesheet.report of the rows to export"""
+        self.ensure_one()
+        if self.report_domain:
+            return literal_eval(self.report_domain)
+        domain = []
+        if self.date_from:
+            domain.append(('date', '>=', self.date_from))
+        if self.date_to:
+            domain.append(('date', '<=', self.date_to))
+        if self.employee_ids:
+            domain.append(('employee_id', 'in', self.employee_ids.ids))
+        return domain
+
+    def _get_employee_scope_query(self):
+        """
+        Employees of the export: those of the report rows to export and, for
+        a delta export, those with movements sent in the period, which may
+        have been cancelled since.
+        """
+        self.ensure_one()
+        report = self.env['timesheet.report'].with_user(self.user_id)
+        query = SQL(
+            "SELECT employee_id FROM timesheet_report WHERE id IN (%s)",
+            report._search(self._get_report_domain()).subselect(),
+        )
+        if self.mode == 'delta':
+            query = SQL("%s UNION %s", query, self._get_sent_movements_query(SQL("employee_id")))
+        return query
+
+    def _get_sent_movements_query(self, columns, employee_ids=None):
+        """
+        Last value sent for each (employee, date, code) of the period by the
+        previous completed exports.
+        """
+        self.ensure_one()
+        employee_ids = employee_ids or self.employee_ids.ids
+        return SQL(
+            """
+            SELECT %s FROM (
+                SELECT DISTINCT ON (line.employee_id, line.date, line.code)
+                       line.employee_id, line.date, line.code, line.minutes
+                  FROM timesheet_payroll_export_line line
+                  JOIN timesheet_payroll_export export ON export.id = line.export_id
+                 WHERE export.state = 'done'
+                   AND export.id != %s
+                   AND line.date BETWEEN %s AND %s
+                   AND %s
+                 ORDER BY line.employee_id, line.date, line.code, line.export_id DESC
+            ) sent
+            """,
+            columns, self.id, self.date_from, self.date_to,
+            SQL("line.employee_id = ANY(%s)", employee_ids) if employee_ids else SQL("TRUE"),
+        )
+
+    def _get_next_employee_ids(self, limit):
+        """Next chunk of employees to export, after the resume point"""
+        self.ensure_one()
+        self.env.cr.execute(SQL(
+            """
+            SELECT DISTINCT scope.employee_id
+              FROM (%s) scope
+             WHERE scope.employee_id > %s
+             ORDER BY scope.employee_id
+             LIMIT %s
+            """,
+            self._get_employee_scope_query(), self.last_employee_id, limit,
+        ))
+        return [employee_id for employee_id, in self.env.cr.fetchall()]
+
+    def _count_employees(self):
+        self.ensure_one()
+        self.env.cr.execute(SQL(
+            "SELECT COUNT(DISTINCT scope.employee_id) FROM (%s) scope",
+            self._get_employee_scope_query(),
+        ))
+        return self.env.cr.fetchone()[0]
+
+    def _record_movements(self, employee_ids):
+        """
+        Write the ledger lines of a chunk of employees: every movement in a
+        full export, only the new, changed and cancelled (0 minutes) ones
+        compared to the last values sent in a delta export.
+        """
+        self.ensure_one()
+        report = self.env['timesheet.report'].with_user(self.user_id)
+        current = report._get_movements_query(self._get_report_domain() + [('employee_id', 'in', employee_ids)])
+        if self.mode == 'full':
+            movements = SQL("SELECT employee_id, date, code, minutes FROM (%s) current", current)
+        else:
+            movements = SQL(
+                """
+                SELECT COALESCE(current.employee_id, sent.employee_id),
+                       COALESCE(current.date, sent.date),
+                       COALESCE(current.code, sent.code),
+                       COALESCE(current.minutes, 0)
+                  FROM (%s) current
+                  FULL OUTER JOIN (%s) sent
+                    ON sent.employee_id = current.employee_id
+                   AND sent.date = current.date
+                   AND sent.code = current.code
+                 WHERE COALESCE(current.minutes, 0) IS DISTINCT FROM sent.minutes
+                """,
+                current, self._get_sent_movements_query(SQL("*"), employee_ids),
+            )
+        self.env['timesheet.payroll.export.line'].flush_model()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO timesheet_payroll_export_line
+                   (export_id, employee_id, date, code, minutes, create_uid, create_date, write_uid, write_date)
+            SELECT %s, movement.*, %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+              FROM (%s) movement
+            """,
+            self.id, self.env.uid, self.env.uid, movements,
+        ))
+        self.env['timesheet.payroll.export.line'].invalidate_model()
+
+    def _iter_ledger_elements(self, employee_ids):
+        """Yield the serialized <Dipendente> elements of the ledger lines of a chunk of employees"""
+        self.ensure_one()
+        report = self.env['timesheet.report']
+        self.env['hr.employee'].flush_model(['payroll_code'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT line.employee_id, line.date, line.code, line.minutes, employee.payroll_code
+              FROM timesheet_payroll_export_line line
+              JOIN hr_employee employee ON employee.id = line.employee_id
+             WHERE line.export_id = %s
+               AND line.employee_id = ANY(%s)
+             ORDER BY line.employee_id, line.date, line.code
+            """,
+            self.id, employee_ids,
+        ))
+        for employee_id, lines in groupby(self.env.cr.fetchall(), key=itemgetter(0)):
+            lines = list(lines)
+            employee_code = lines[0][4] or str(employee_id).zfill(7)
+            employee_elem, movimenti_elem = report._new_employee_element(employee_code)
+            for _employee_id, date, code, minutes, _payroll_code in lines:
+                hours, minutes = divmod(minutes, 60)
+                report._append_movement(movimenti_elem, code, date.strftime("%Y-%m-%d"), hours, minutes)
+            yield ET.tostring(employee_elem, encoding='utf-8')
+
+    def _process_chunk(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Export the next chunk of employees into a part attachment, or
+        assemble the final file when there is nothing left to export.
+        The report is read with the access rights of the requester.
+        """
+        self.ensure_one()
+        if self.state == 'queued':
+            self.write({
+                'state': 'running',
+                'date_start': fields.Datetime.now(),
+                'employee_count': self._count_employees(),
+            })
+        employee_ids = self._get_next_employee_ids(chunk_size)
+        if not employee_ids:
+            self._finalize()
+            return
+        self._record_movements(employee_ids)
+        if self.mode == 'full':
+            report = self.env['timesheet.report'].with_user(self.user_id)
+            domain = self._get_report_domain() + [('employee_id', 'in', employee_ids)]
+            employee_elements = report._iter_employee_elements(domain)
+        else:
+            employee_elements = self._iter_ledger_elements(employee_ids)
+        vals = {
+            'last_employee_id': employee_ids[-1],
+            'employee_done': self.employee_done + len(employee_ids),
+        }
+        with tempfile.TemporaryFile() as part:
+            for employee_xml in employee_elements:
+                part.write(employee_xml)
+            if part.tell():
+                part.seek(0)
+                attachment = self.env['ir.attachment'].create({
+                    'name': '%s.part%03d' % (self.name, len(self.part_attachment_ids) + 1),
+                    'raw': part.read(),
+                    'mimetype': 'application/xml',
+                    'res_model': self._name,
+                    'res_id': self.id,
+                })
+                vals['part_attachment_ids'] = [fields.Command.link(attachment.id)]
+        self.write(vals)
+
+    def _finalize(self):
+        """Concatenate the parts into the final XML file and notify the requester"""
+        self.ensure_one()
+        parts = self.part_attachment_ids.sorted('id')
+        with tempfile.TemporaryFile() as xml_file:
+            if parts:
+                xml_file.write(b"<Fornitura>")
+                for part in parts:
+                    xml_file.write(part.raw)
+                xml_file.write(b"</Fornitura>")
+            else:
+                xml_file.write(b"<Fornitura />")
+            xml_file.seek(0)
+            attachment = self.env['ir.attachment'].create({
+                'name': 'timesheet_report_%s.xml' % fields.Date.context_today(self),
+                'raw': xml_file.read(),
+                'mimetype': 'application/xml',
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+        self.write({
+            'state': 'done',
+            'attachment_id': attachment.id,
+            'date_done': fields.Datetime.now(),
+            'part_attachment_ids': [fields.Command.clear()],
+        })
+        parts.unlink()
+        self._notify_requester()
+
+    def _fail(self, error):
+        self.ensure_one()
+        self.write({'state': 'failed', 'error': error, 'date_done': fields.Datetime.now()})
+        self._notify_requester()
+
+    def _get_download_url(self):
+        self.ensure_one()
+        return f'/web/content/{self.attachment_id.id}?download=true' if self.attachment_id else False
+
+    def _notify_requester(self):
+        """Post the outcome in the chatter and push a notification to the requester"""
+        self.ensure_one()
+        if self.state == 'done':
+            body = _(
+                "Payroll export completed: %(count)s employees exported.",
+                count=self.employee_done,
+            )
+            self.message_post(
+                body=body,
+                attachment_ids=self.attachment_id.ids,
+                partner_ids=self.user_id.partner_id.ids,
+                subtype_xmlid='mail.mt_comment',
+            )
+            self.user_id._bus_send('simple_notification', {
+                'type': 'success',
+                'title': _("Payroll Export"),
+                'message': body,
+                'sticky': True,
+            })
+        else:
+            error_lines = (self.error or '').strip().splitlines()
+            body = _("Payroll export failed: %(error)s", error=error_lines[-1] if error_lines else '')
+            self.message_post(
+                body=body,
+                partner_ids=self.user_id.partner_id.ids,
+                subtype_xmlid='mail.mt_comment',
+            )
+            self.user_id._bus_send('simple_notification', {
+                'type': 'danger',
+                'title': _("Payroll Export"),
+                'message': body,
+                'sticky': True,
+            })
+
+    @api.model
+    def _cron_process_exports(self, chunk_size=EXPORT_CHUNK_SIZE, max_chunks=EXPORT_CRON_MAX_CHUNKS):
+        """
+        Process the queued and interrupted exports one chunk at a time,
+        committing after each chunk. The job row is locked while a chunk is
+        exported, so concurrent cron workers never export the same chunk.
+        After max_chunks chunks the cron re-triggers itself and stops, so a
+        single run stays within the cron time limit.
+        """
+        for _chunk in range(max_chunks):
+            self.env.cr.execute("""
+                SELECT id FROM timesheet_payroll_export
+                 WHERE state IN ('queued', 'running')
+                 ORDER BY id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            job = self.browse(row[0])
+            try:
+                job._process_chunk(chunk_size)
+                self.env.cr.commit()
+            except Exception:
+                self.env.cr.rollback()
+                _logger.exception("Payroll export %s failed", job.id)
+                job._fail(traceback.format_exc())
+                self.env.cr.commit()
+        else:
+            self.env.ref('Employee_Timesheet_Report.ir_cron_process_payroll_exports')._trigger()
+
+    def action_cancel(self):
+        jobs = self.filtered(lambda job: job.state in ('queued', 'running'))
+        parts = jobs.part_attachment_ids
+        jobs.line_ids.sudo().unlink()
+        jobs.write({
+            'state': 'cancelled',
+            'last_employee_id': 0,
+            'employee_done': 0,
+            'part_attachment_ids': [fields.Command.clear()],
+        })
+        parts.unlink()
+
+    def action_retry(self):
+        """Resume a failed export from its last completed chunk, restart a cancelled one"""
+        self.filtered(lambda job: job.state == 'failed').write({'state': 'running', 'error': False})
+        self.filtered(lambda job: job.state == 'cancelled').write({'state': 'queued'})
+        self.env.ref('Employee_Timesheet_Report.ir_cron_process_payroll_exports')._trigger()
+
+    def action_view_lines(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Exported Movements'),
+            'res_model': 'timesheet.payroll.export.line',
+            'view_mode': 'list',
+            'domain': [('export_id', '=', self.id)],
+        }
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("The export is not finished yet."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': self._get_download_url(),
+            'target': 'self',
+        }
+
+
+class TimesheetPayrollExportLine(models.Model):
+    """
+    Export ledger: movement sent to the payroll provider, summed per
+    (employee, date, code). The last line of a key over the completed
+    exports is the value the provider currently has; 0 minutes means the
+    movement was cancelled.
+    """
+    _name = 'timesheet.payroll.export.line'
+    _description = 'Payroll Export Ledger Line'
+    _order = 'export_id desc, employee_id, date, code'
+
+    export_id = fields.Many2one(
+        'timesheet.payroll.export',
+        string='Export',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    export_state = fields.Selection(related='export_id.state', string='Export Status')
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, readonly=True)
+    date = fields.Date(string='Date', required=True, readonly=True)
+    code = fields.Char(string='Code', required=True, readonly=True)
+    minutes = fields.Integer(string='Minutes', readonly=True)
+    duration = fields.Float(string='Duration', compute='_compute_duration')
+
+    @api.depends('minutes')
+    def _compute_duration(self):
+        for line in self:
+            line.duration = line.minutes / 60.0
+
+    def init(self):
+        # Lookup of the last value sent for each movement of a delta export
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS timesheet_payroll_export_line_movement_index
+            ON timesheet_payroll_export_line (employee_id, date, code, export_id DESC)
+        """)
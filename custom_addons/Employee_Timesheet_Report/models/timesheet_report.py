@@ -1,12 +1,25 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import AccessError
+from odoo.tools import SQL
 from datetime import datetime, time, timedelta
-import requests
-import base64
+import io
+import json
+import hashlib
+import tempfile
+import uuid
 import xml.etree.ElementTree as ET
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Timezone and office hours of employees without timezone or working schedule
+DEFAULT_TZ = 'Europe/Rome'
+DEFAULT_OFFICE_HOURS = (8.5, 17.5)
+# Rows fetched per round trip by the streaming XML export
+EXPORT_BATCH_SIZE = 2000
+# Days a cached export is kept without being regenerated
+EXPORT_CACHE_DAYS = 30
+
 
 class HrEmployeeInherit(models.Model):
     """Add payroll code field to employee model"""
@@ -17,11 +30,19 @@ class HrEmployeeInherit(models.Model):
         help='Official employee code for payroll system (e.g., 0000013)'
     )
 
+    def write(self, vals):
+        res = super().write(vals)
+        # Local holidays depend on the office of the employee, work bands
+        # and delays on its working schedule and timezone
+        if {'work_location_id', 'resource_calendar_id', 'tz'}.intersection(vals):
+            self.env['timesheet.report']._mark_employees_dirty(self.ids)
+        return res
+
 
 class TimesheetReport(models.Model):
     _name = 'timesheet.report'
     _description = 'Timesheet Report'
-    _auto = False  # Database view model - no physical table
+    _auto = False  # Table managed by init(), refreshed incrementally
 
     # Basic fields from SQL view
     employee_id = fields.Many2one('hr.employee', string='Employee', readonly=True)
@@ -33,13 +54,18 @@ class TimesheetReport(models.Model):
     task_id = fields.Many2one('project.task', string='Task', readonly=True)
     
     # Working hours fields
-    office_hours = fields.Float(string='Office Hours (8:30-18:30)', readonly=True)
+    office_hours = fields.Float(string='Office Hours', readonly=True)
     hours_18_22 = fields.Float(string="Overtime 18-22", readonly=True)
     hours_22_06 = fields.Float(string="Night Overtime 22-06", readonly=True)
     
     # Day information fields
     day_of_week = fields.Char(string='Day Name', readonly=True)
     is_weekend = fields.Boolean(string='Is Weekend', readonly=True)
+    is_holiday = fields.Boolean(
+        string='Is Public Holiday',
+        readonly=True,
+        help='National or local public holiday for the office of the employee'
+    )
     
     # Delay calculation fields
     delay_hours = fields.Float(string='Delay Hours', readonly=True)
@@ -48,7 +74,12 @@ class TimesheetReport(models.Model):
     delay_display = fields.Char(string='Delay Time', readonly=True)
     
     # Leave fields
-    leave_type = fields.Char(string='Leave Type', readonly=True)
+    leave_type_id = fields.Many2one('hr.leave.type', string='Leave Type', readonly=True)
+    payroll_code = fields.Char(
+        string='Payroll Code',
+        readonly=True,
+        help='Payroll code of the leave type, OR when the leave type has none'
+    )
     
     # Computed fields for UI display (not stored, only for presentation)
     colored_day_display = fields.Html(
@@ -65,13 +96,10 @@ class TimesheetReport(models.Model):
     
     hours_shortage = fields.Float(
         string='Hours Shortage',
-        compute='_compute_hours_shortage',
+        readonly=True,
         help='Hours shortage compared to 8 standard hours'
     )
 
-    # Class-level cache for holidays
-    _italy_holidays_cache = {}
-
     def _format_hours(self, hours_float):
         """Convert float to h:mm text format"""
         if hours_float is None:
@@ -83,44 +111,7 @@ class TimesheetReport(models.Model):
         except (TypeError, ValueError):
             return "00:00"
 
-    @classmethod
-    def get_italy_holidays(cls, year):
-        """
-        Get Italian public holidays with caching.
-        Cache is stored at class level to reduce API calls.
-        """
-        if not hasattr(cls, "_italy_holidays_cache"):
-            cls._italy_holidays_cache = {}
-
-        if year not in cls._italy_holidays_cache:
-            holidays = set()
-            try:
-                url = f"https://date.nager.at/api/v3/PublicHolidays/{year}/IT"
-                response = requests.get(url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    for item in data:
-                        holidays.add(item["date"])
-                _logger.info(f"Fetched {len(holidays)} Italian holidays for year {year}")
-            except requests.RequestException as e:
-                _logger.warning(f"Failed to fetch Italian holidays for {year}: {e}")
-            except Exception as e:
-                _logger.error(f"Error processing holidays for {year}: {e}")
-            
-            cls._italy_holidays_cache[year] = holidays
-
-        return cls._italy_holidays_cache[year]
-
-    def _is_italian_holiday(self, date):
-        """Check if date is an Italian public holiday"""
-        if not date:
-            return False
-        year = date.year
-        holidays = self.get_italy_holidays(year)
-        date_str = date.strftime("%Y-%m-%d")
-        return date_str in holidays
-
-    @api.depends('date', 'day_of_week', 'is_weekend')
+    @api.depends('date', 'day_of_week', 'is_weekend', 'is_holiday')
     def _compute_day_info(self):
         """Generate colored HTML badge for day display"""
         for rec in self:
@@ -129,7 +120,7 @@ class TimesheetReport(models.Model):
                 continue
 
             day_name = rec.day_of_week
-            is_holiday = rec.is_weekend or self._is_italian_holiday(rec.date)
+            is_holiday = rec.is_weekend or rec.is_holiday
 
             if is_holiday:
                 rec.colored_day_display = f"""
@@ -188,389 +179,773 @@ class TimesheetReport(models.Model):
                 </span>
             """
 
-    @api.depends('total_hours')
-    def _compute_hours_shortage(self):
-        """Calculate shortage if worked less than 8 hours"""
-        for record in self:
-            if record.total_hours and record.total_hours < 8:
-                record.hours_shortage = 8 - record.total_hours
-            else:
-                record.hours_shortage = 0.0
-
-    def _get_leave_code(self, leave_type):
-        """Map leave type name to official payroll code"""
-        leave_codes = {
-            'FE Ferie': 'FE',
-            'V6 Assegno ordinar. pagam.diretto': 'V6',
-            'Permesso (Ore)': 'Ore',
-            'AI Assenza ingiustificata': 'AI',
-            'A4 Quarantena sorv.attiva COVID19': 'A4',
-            'AL Allattamento': 'AL',
-            'C2 Solidarieta\'aut.DLsg 148/15': 'C2',
-            'FR Cong.parentale a GG da 10 mesi ind.30%': 'FR',
-            'C5 CIG aut.(maltempo)Evento CIG': 'C5',
-            'C6 Solidarieta\' anticipata': 'C6',
-            'F2 Flessibilita\' Tipo 2': 'F2',
-            'FS Festività lavorata': 'FS',
-            'IN Infortunio': 'IN',
-            'LF Lavoro festivo': 'LF',
-            'LN Supplementare notturno': 'LN',
-            'LS Supplementare diurno': 'LS',
-            'M1 Perm.retr. per MA bimbo < 3a': 'M1',
-            'M2 Cong.parentale a HH da 7 a 9 mesi': 'M2',
-            'M3 Mal. bambino < 3 anni (MA3)': 'M3',
-            'M4  Prolung. congedo parentale disabili': 'M4',
-            'M5 Cong.parentale a HH entro 6 mesi': 'M5',
-            'M6 Cong.parentale a HH da 10 mesi non ind': 'M6',
-            'M7 Cong.parentale a GG da 7 a 9 mesi': 'M7',
-            'S5 Straord. porte chiuse festivo': 'S5',
-            'S3 Straord. porte chiuse feriale': 'S3',
-            'T3 Cig fondo solidarieta': 'T3',
-            'S4 Straord. porte aperte festivo': 'S4',
-            'SD Sospensione disciplinare': 'SD',
-            'V1 Volontariato Protezione Civile': 'V1',
-            'SC Sciopero': 'SC',
-            'SN Straordinario notturno': 'SN',
-            'ST Straordinario diurno': 'ST',
-            'V2 Assenza ingiust. no green-pass': 'V2',
-            'VV Cong. vittime violenza (DVV)': 'VV',
-            'V9 Congedo quarant.figli DL111/20': 'V9',
-            'VI Permessi Visite Inail': 'VI',
-            'VM Permessi per visita medica': 'VM',
-            'VO Cong. vittime viol.a ore (DVO)': 'VO',
-            'A5 Assenza aut. sanitarie COVID19': 'A5',
-            'A6 CIGO pagamento diretto': 'A6',
-            'A8 Congedo genitor.retrib.COVID19': 'A8',
-            'A9 Congedo genit.non retr.COVID19': 'A9',
-            'AH Assenza assunti/dimessi': 'AH',
-            'AP Aspettativa non retribuita': 'AP',
-            'AR Aspettativa Retribuita': 'AR',
-            'AS Assemblea sindacale': 'AS',
-            'BO Permessi banca ore goduti': 'BO',
-            'C1 Solidarieta\'antic.DLgs.148/15': 'C1',
-            'C3 Cig autorizz.post D.Lgs.148/15': 'C3',
-            'C4 CIG ant.(maltempo)Evento CIG': 'C4',
-            'C9 CIG autorizz. Evento Maltempo': 'C9',
-            'CA CIG anticipata': 'CA',
-            'CC CIG autorizzata (no ctr.add.)': 'CC',
-            'F1 Flessibilita\' Tipo 1': 'F1',
-            'F3 Flessibilita\' Tipo 3': 'F3',
-            'C7 Solidarieta\' autorizzata': 'C7',
-            'F7 Ferie solidarieta\' autorizzata': 'F7',
-            'C8 CIG anticipata Evento Maltempo': 'C8',
-            'CB CIG autorizzata (si ctr.add.)': 'CB',
-            'CP Congedo obbligatorio del padre': 'CP',
-            'EM Emodialisi': 'EM',
-            'CD Congedi straordinari disabili': 'CD',
-            'CF Congedo facoltativo del padre': 'CF',
-            'CI CIG non retribuita': 'CI',
-            'CM Congedo matrimoniale': 'CM',
-            'CV Perm. non retrib. Ctr virtuale': 'CV',
-            'CY Morbo Cooley': 'CY',
-            'DM Donazione midollo osseo': 'DM',
-            'DS Donazione sangue': 'DS',
-            'FG Flessibilita\' godute': 'FG',
-            'GO Giornata ad orario ridotto-GOR': 'GO',
-            'D2 Permessi disabili gg COVID19': 'D2',
-            'MF Cong.parentale a GG entro 6 mesi': 'MF',
-            'MI Militare': 'MI',
-            'MM Malattia non conta per malus': 'MM',
-            'MN Cong.parentale a GG da 10 mesi non ind': 'MN',
-            'MO Malattia ospedaliera': 'MO',
-            'MR Mancata certific.ricaduta mal.': 'MR',
-            'MT Maternita\' obbligatoria': 'MT',
-            'MX Malattia no trattam. speciale': 'MX',
-        }
-        return leave_codes.get(leave_type, 'OR')  # Default to 'OR' (ordinary)
+    def _get_export_rows_query(self, domain):
+        """
+        Query of the report rows to export, grouped per employee.
+
+        Employees come in the order of their first row id and rows in id
+        order, which is the order the exporter always produced.
+        """
+        query = self._search(domain)
+        return SQL(
+            """
+            SELECT report.employee_id,
+                   report.date::date,
+                   report.office_hours,
+                   report.hours_18_22,
+                   report.hours_22_06,
+                   report.payroll_code
+              FROM %s report
+             WHERE report.id IN (%s)
+             ORDER BY min(report.id) OVER (PARTITION BY report.employee_id), report.id
+            """,
+            SQL.identifier(self._table), query.subselect(),
+        )
+
+    def _get_movements_query(self, domain):
+        """
+        Set-based equivalent of _build_employee_element(): the movements of
+        the rows matching domain, summed per (employee_id, date, code), as
+        total minutes. Hours are truncated in double precision like the
+        Python exporter does.
+        """
+        query = self._search(domain)
+        return SQL(
+            """
+            SELECT report.employee_id,
+                   report.date::date AS date,
+                   movement.code,
+                   SUM(movement.hours * 60 + movement.minutes)::integer AS minutes
+              FROM %s report
+             CROSS JOIN LATERAL (VALUES
+                (COALESCE(report.payroll_code, 'OR'),
+                 CASE WHEN report.office_hours > 0 THEN trunc(report.office_hours::float8) ELSE 8 END,
+                 CASE WHEN report.office_hours > 0
+                      THEN trunc((report.office_hours::float8 - trunc(report.office_hours::float8)) * 60)
+                      ELSE 0 END,
+                 report.office_hours > 0 OR report.payroll_code IS NOT NULL),
+                ('ST',
+                 trunc(report.hours_18_22::float8),
+                 trunc((report.hours_18_22::float8 - trunc(report.hours_18_22::float8)) * 60),
+                 report.hours_18_22 > 0),
+                ('STN',
+                 trunc(report.hours_22_06::float8),
+                 trunc((report.hours_22_06::float8 - trunc(report.hours_22_06::float8)) * 60),
+                 report.hours_22_06 > 0)
+             ) AS movement(code, hours, minutes, is_exported)
+             WHERE report.id IN (%s)
+               AND movement.is_exported
+             GROUP BY report.employee_id, report.date::date, movement.code
+            """,
+            SQL.identifier(self._table), query.subselect(),
+        )
+
+    def _iter_export_rows(self, domain, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Yield (employee_id, rows) for the rows matching domain.
+
+        Rows are fetched in batches through a server-side cursor, so at most
+        one batch and the rows of one employee are held in memory.
+        """
+        cr = self.env.cr
+        cursor_name = SQL.identifier(f'timesheet_report_export_{uuid.uuid4().hex}')
+        cr.execute(SQL("DECLARE %s NO SCROLL CURSOR FOR %s", cursor_name, self._get_export_rows_query(domain)))
+        try:
+            employee_id, employee_rows = None, []
+            while True:
+                cr.execute(SQL("FETCH FORWARD %s FROM %s", batch_size, cursor_name))
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    if row[0] != employee_id and employee_rows:
+                        yield employee_id, employee_rows
+                        employee_rows = []
+                    employee_id = row[0]
+                    employee_rows.append(row)
+            if employee_rows:
+                yield employee_id, employee_rows
+        finally:
+            cr.execute(SQL("CLOSE %s", cursor_name))
+
+    def _get_export_payroll_codes(self, domain):
+        """Map employee ids of the rows matching domain to their payroll code in one query"""
+        self.env['hr.employee'].flush_model(['payroll_code'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT employee.id, employee.payroll_code
+              FROM hr_employee employee
+             WHERE employee.id IN (SELECT report.employee_id FROM %s report WHERE report.id IN (%s))
+            """,
+            SQL.identifier(self._table), self._search(domain).subselect(),
+        ))
+        return dict(self.env.cr.fetchall())
+
+    def _append_movement(self, movements_elem, code, date_text, hours, minutes):
+        movement_elem = ET.SubElement(movements_elem, "Movimento")
+        ET.SubElement(movement_elem, "CodGiustificativoUfficiale").text = code
+        ET.SubElement(movement_elem, "Data").text = date_text
+        ET.SubElement(movement_elem, "NumOre").text = str(hours).zfill(2)
+        ET.SubElement(movement_elem, "NumMinuti").text = str(minutes).zfill(2)
+
+    def _new_employee_element(self, employee_code):
+        """Return an empty <Dipendente> element and its <Movimenti> child"""
+        employee_elem = ET.Element("Dipendente")
+
+        # Company code - should be configurable
+        employee_elem.set("CodAziendaUfficiale", "000479")
+        employee_elem.set("CodDipendenteUfficiale", employee_code)
+
+        movimenti_elem = ET.SubElement(employee_elem, "Movimenti")
+        movimenti_elem.set("GenerazioneAutomaticaDaTeorico", "N")
+        return employee_elem, movimenti_elem
+
+    def _build_employee_element(self, employee_code, rows):
+        """Build the <Dipendente> element of one employee from its report rows"""
+        employee_elem, movimenti_elem = self._new_employee_element(employee_code)
+
+        for _employee_id, date, office_hours, hours_18_22, hours_22_06, payroll_code in rows:
+            # Numeric columns come back as Decimal, the ORM used to read them as float
+            office_hours = float(office_hours or 0.0)
+            hours_18_22 = float(hours_18_22 or 0.0)
+            hours_22_06 = float(hours_22_06 or 0.0)
+            date_text = date.strftime("%Y-%m-%d") if date else ""
+
+            # Main movement for regular work hours
+            if office_hours > 0 or payroll_code:
+                # Leave code, or ordinary work
+                cod_giustificativo = payroll_code or "OR"
+
+                # Calculate hours and minutes
+                if office_hours > 0:
+                    hours = int(office_hours)
+                    minutes = int((office_hours - hours) * 60)
+                else:
+                    hours = 8  # Default 8 hours for leave
+                    minutes = 0
+                self._append_movement(movimenti_elem, cod_giustificativo, date_text, hours, minutes)
+
+            # Overtime movement (18-22)
+            if hours_18_22 > 0:
+                hours_st = int(hours_18_22)
+                minutes_st = int((hours_18_22 - hours_st) * 60)
+                self._append_movement(movimenti_elem, "ST", date_text, hours_st, minutes_st)
+
+            # Night overtime movement (22-06)
+            if hours_22_06 > 0:
+                hours_notturno = int(hours_22_06)
+                minutes_notturno = int((hours_22_06 - hours_notturno) * 60)
+                self._append_movement(movimenti_elem, "STN", date_text, hours_notturno, minutes_notturno)
+
+        return employee_elem
+
+    def _iter_employee_elements(self, domain):
+        """
+        Yield the serialized <Dipendente> element of each employee of the rows
+        matching domain, as soon as the rows of that employee are read, so
+        memory use does not grow with the size of the export.
+        """
+        payroll_codes = self._get_export_payroll_codes(domain)
+        for employee_id, rows in self._iter_export_rows(domain):
+            employee_code = payroll_codes.get(employee_id) or str(employee_id).zfill(7)
+            yield ET.tostring(self._build_employee_element(employee_code, rows), encoding='utf-8')
+
+    def _write_xml_report(self, stream, domain=None):
+        """Write the payroll XML of the rows matching domain to a binary stream."""
+        empty = True
+        for employee_xml in self._iter_employee_elements(domain or []):
+            if empty:
+                stream.write(b"<Fornitura>")
+                empty = False
+            stream.write(employee_xml)
+        stream.write(b"<Fornitura />" if empty else b"</Fornitura>")
 
     def generate_xml_report(self, domain=None):
         """
         Generate XML report for Italian payroll system.
         Uses Office Hours and Overtime calculations.
         """
-        if domain is None:
-            domain = []
-
-        records = self.search(domain)
-
-        # Create XML structure
-        root = ET.Element("Fornitura")
-
-        # Group records by employee_id
-        employees = {}
-        for record in records:
-            employee_key = (record.employee_id.id, record.employee_id.name)
-            if employee_key not in employees:
-                employees[employee_key] = []
-            employees[employee_key].append(record)
-
-        # Process each employee
-        for (emp_id, emp_name), emp_records in employees.items():
-            employee_elem = ET.SubElement(root, "Dipendente")
-
-            # Company code - should be configurable
-            employee_elem.set("CodAziendaUfficiale", "000479")
-
-            # Get employee payroll code from hr.employee
-            employee = self.env['hr.employee'].browse(emp_id)
-            employee_code = employee.payroll_code or str(emp_id).zfill(7)
-            employee_elem.set("CodDipendenteUfficiale", employee_code)
-
-            movimenti_elem = ET.SubElement(employee_elem, "Movimenti")
-            movimenti_elem.set("GenerazioneAutomaticaDaTeorico", "N")
-
-            # Process each record
-            for record in emp_records:
-                # Main movement for regular work hours
-                if record.office_hours > 0 or record.leave_type:
-                    movimento_elem = ET.SubElement(movimenti_elem, "Movimento")
-
-                    # Determine code type
-                    if record.leave_type:
-                        cod_giustificativo = self._get_leave_code(record.leave_type)
-                    else:
-                        cod_giustificativo = "OR"  # Ordinary work
-
-                    ET.SubElement(movimento_elem, "CodGiustificativoUfficiale").text = cod_giustificativo
-                    ET.SubElement(movimento_elem, "Data").text = record.date.strftime("%Y-%m-%d") if record.date else ""
-
-                    # Calculate hours and minutes
-                    if record.office_hours > 0:
-                        hours = int(record.office_hours)
-                        minutes = int((record.office_hours - hours) * 60)
-                    elif record.leave_type:
-                        hours = 8  # Default 8 hours for leave
-                        minutes = 0
-                    else:
-                        hours = 0
-                        minutes = 0
-
-                    ET.SubElement(movimento_elem, "NumOre").text = str(hours).zfill(2)
-                    ET.SubElement(movimento_elem, "NumMinuti").text = str(minutes).zfill(2)
-
-                # Overtime movement (18-22)
-                if record.hours_18_22 and record.hours_18_22 > 0:
-                    movimento_straordinario_elem = ET.SubElement(movimenti_elem, "Movimento")
-                    ET.SubElement(movimento_straordinario_elem, "CodGiustificativoUfficiale").text = "ST"
-                    ET.SubElement(movimento_straordinario_elem, "Data").text = record.date.strftime("%Y-%m-%d") if record.date else ""
-
-                    hours_st = int(record.hours_18_22)
-                    minutes_st = int((record.hours_18_22 - hours_st) * 60)
-                    ET.SubElement(movimento_straordinario_elem, "NumOre").text = str(hours_st).zfill(2)
-                    ET.SubElement(movimento_straordinario_elem, "NumMinuti").text = str(minutes_st).zfill(2)
-
-                # Night overtime movement (22-06)
-                if record.hours_22_06 and record.hours_22_06 > 0:
-                    movimento_notturno_elem = ET.SubElement(movimenti_elem, "Movimento")
-                    ET.SubElement(movimento_notturno_elem, "CodGiustificativoUfficiale").text = "STN"
-                    ET.SubElement(movimento_notturno_elem, "Data").text = record.date.strftime("%Y-%m-%d") if record.date else ""
-
-                    hours_notturno = int(record.hours_22_06)
-                    minutes_notturno = int((record.hours_22_06 - hours_notturno) * 60)
-                    ET.SubElement(movimento_notturno_elem, "NumOre").text = str(hours_notturno).zfill(2)
-                    ET.SubElement(movimento_notturno_elem, "NumMinuti").text = str(minutes_notturno).zfill(2)
-
-        # Convert to XML string with proper declaration
-        xml_str = ET.tostring(root, encoding='utf-8', method='xml')
-        return xml_str.decode('utf-8')
+        stream = io.BytesIO()
+        self._write_xml_report(stream, domain)
+        return stream.getvalue().decode('utf-8')
+
+    def _get_export_version(self, date_from, date_to, employee_ids):
+        """
+        Fingerprint of the data an export of the given period and employees
+        is built from: last write date and row count of the timesheets and of
+        the leaves overlapping the period, plus the last change of leave types,
+        holidays, employees, working schedules (and their attendances) and
+        resource timezones, which the work bands are computed from.
+        """
+        self._flush_report_sources()
+        self.env['hr.employee'].flush_model(['payroll_code'])
+        self.env['resource.calendar'].flush_model()
+        self.env['resource.calendar.attendance'].flush_model()
+        self.env['resource.resource'].flush_model(['tz', 'calendar_id'])
+        employee_filter = SQL("employee_id = ANY(%s)", list(employee_ids)) if employee_ids else SQL("TRUE")
+        self.env.cr.execute(SQL(
+            """
+            SELECT concat_ws(',',
+                (SELECT concat_ws('/', max(write_date), count(*))
+                   FROM account_analytic_line
+                  WHERE project_id IS NOT NULL AND employee_id IS NOT NULL
+                    AND date::date BETWEEN %(date_from)s AND %(date_to)s AND %(employee_filter)s),
+                (SELECT concat_ws('/', max(write_date), count(*))
+                   FROM hr_leave
+                  WHERE request_date_to >= %(date_from)s AND request_date_from <= %(date_to)s
+                    AND %(employee_filter)s),
+                (SELECT max(write_date) FROM hr_leave_type),
+                (SELECT max(write_date) FROM timesheet_holiday),
+                (SELECT max(write_date) FROM hr_employee),
+                (SELECT max(write_date) FROM resource_calendar),
+                (SELECT concat_ws('/', max(write_date), count(*)) FROM resource_calendar_attendance),
+                (SELECT max(write_date) FROM resource_resource)
+            )
+            """,
+            date_from=date_from, date_to=date_to, employee_filter=employee_filter,
+        ))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_cached_export(self, date_from, date_to, employee_ids=None):
+        """
+        Return the payroll XML of a period as an attachment, generated only
+        when the underlying data changed since the cached one was built.
+
+        Cached files are private attachments keyed by a hash of the filters
+        and of the requesting user (record rules make the content
+        user-dependent); the data fingerprint is kept in their description.
+
+        :return: ir.attachment (sudo)
+        """
+        self.check_access('read')
+        employee_ids = sorted(set(employee_ids or []))
+        filter_key = json.dumps([
+            self.env.uid, self.env.companies.ids, str(date_from), str(date_to), employee_ids,
+        ])
+        name = 'timesheet_export_%s.xml' % hashlib.sha1(filter_key.encode()).hexdigest()
+        version = self._get_export_version(date_from, date_to, employee_ids)
+
+        Attachment = self.env['ir.attachment'].sudo()
+        attachment = Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', 0),
+            ('name', '=', name),
+        ], order='id desc', limit=1)
+        if attachment and attachment.description == version:
+            return attachment
+
+        domain = [('date', '>=', date_from), ('date', '<=', date_to)]
+        if employee_ids:
+            domain.append(('employee_id', 'in', employee_ids))
+        with tempfile.TemporaryFile() as xml_file:
+            self._write_xml_report(xml_file, domain)
+            xml_file.seek(0)
+            vals = {'raw': xml_file.read(), 'description': version}
+        if attachment:
+            attachment.write(vals)
+        else:
+            attachment = Attachment.create(dict(vals, **{
+                'name': name,
+                'res_model': self._name,
+                'res_id': 0,
+                'mimetype': 'application/xml',
+            }))
+        return attachment
+
+    @api.autovacuum
+    def _gc_cached_exports(self):
+        """Drop the cached exports that were not regenerated for a month"""
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', 0),
+            ('name', '=like', 'timesheet_export_%.xml'),
+            ('write_date', '<', fields.Datetime.subtract(fields.Datetime.now(), days=EXPORT_CACHE_DAYS)),
+        ]).unlink()
 
     def action_export_xml(self):
-        """Action to download XML file"""
+        """Queue a background payroll export of the selected records"""
         domain = []
         if self._context.get('active_ids'):
             domain = [('id', 'in', self._context.get('active_ids'))]
 
-        xml_content = self.generate_xml_report(domain)
-
-        # Create attachment for download
-        attachment = self.env['ir.attachment'].create({
-            'name': 'timesheet_report_%s.xml' % fields.Date.today(),
-            'datas': base64.b64encode(xml_content.encode('utf-8')),
-            'type': 'binary',
-            'mimetype': 'application/xml',
+        job = self.env['timesheet.payroll.export'].create({
+            'name': _('Payroll Export %s', fields.Date.context_today(self)),
+            'report_domain': repr(domain),
         })
-
-        download_url = f'/web/content/{attachment.id}?download=true'
-
         return {
-            "type": "ir.actions.act_url",
-            "url": download_url,
-            "target": "self",
+            'type': 'ir.actions.act_window',
+            'res_model': 'timesheet.payroll.export',
+            'res_id': job.id,
+            'view_mode': 'form',
+            'target': 'current',
         }
 
-    def init(self):
+    def _get_holiday_query(self, employee, day):
         """
-        Create the database view for timesheet report.
-        This view combines timesheet entries with leave records.
-        
-        Time calculations are based on UTC (server timezone):
-        - Office hours: 05:30-14:30 UTC (which is 08:30-17:30 in Europe/Rome winter)
-        - Overtime 18-22: 15:00-19:00 UTC
-        - Night overtime 22-06: 19:00-03:00 UTC
+        Build the expression telling whether a day is a public holiday for an
+        employee. Manual overrides win over computed holidays, and holidays of
+        the office of the employee win over national ones.
+
+        :param employee: SQL expression of the employee id
+        :param day: SQL expression of the date
+        :return: SQL object
+        """
+        return SQL("""
+            COALESCE((
+                SELECT holiday.is_holiday
+                  FROM timesheet_holiday holiday
+                  JOIN hr_employee employee ON employee.id = %s
+                 WHERE holiday.date = %s
+                   AND (holiday.work_location_id IS NULL
+                        OR holiday.work_location_id = employee.work_location_id)
+                 ORDER BY holiday.holiday_type = 'override' DESC,
+                          holiday.work_location_id IS NOT NULL DESC,
+                          holiday.id DESC
+                 LIMIT 1
+            ), false)""", employee, day)
+
+    def _get_office_band_query(self, calendar_id, day):
         """
-        self.env.cr.execute("DROP VIEW IF EXISTS timesheet_report")
+        Build the query of the office bands (hour_from, hour_to, in local
+        hours) of a working schedule on a day, with the default office hours
+        for employees without working schedule.
 
-        self.env.cr.execute("""
-            CREATE OR REPLACE VIEW timesheet_report AS (
-                -- Timesheet section
-                SELECT
-                    min(ts.id) AS id,
-                    ts.employee_id,
-                    ts.date,
-                    ts.project_id,
-                    ts.task_id,
-                    min(ts.date_time) AS date_time,
-                    min(ts.date_time) + ((sum(ts.unit_amount) || ' hours')::interval) AS end_time,
-                    COALESCE(sum(ts.unit_amount), 0) AS total_hours,
-
-                    -- Calculate office_hours (max 8 hours)
-                    -- Office range: 05:30-14:30 UTC
-                    LEAST(COALESCE(
-                        CASE 
-                            WHEN min(ts.date_time) IS NOT NULL AND COALESCE(sum(ts.unit_amount), 0) > 0 THEN
-                                EXTRACT(EPOCH FROM GREATEST(
-                                    LEAST(
-                                        min(ts.date_time) + ((COALESCE(sum(ts.unit_amount), 0) || ' hours')::interval),
-                                        date_trunc('day', min(ts.date_time)) + interval '14 hours 30 minutes'
-                                    ) - GREATEST(
-                                        min(ts.date_time),
-                                        date_trunc('day', min(ts.date_time)) + interval '5 hours 30 minutes'
-                                    ),
-                                    interval '0 second'
-                                )) / 3600
-                            ELSE 0
-                        END, 0
-                    ), 8.0) AS office_hours,
-
-                    -- Calculate hours_18_22 (overtime in 18-22 range plus hours above 8)
-                    COALESCE(
-                        EXTRACT(EPOCH FROM GREATEST(
-                            LEAST(
-                                min(ts.date_time) + ((sum(ts.unit_amount) || ' hours')::interval),
-                                date_trunc('day', min(ts.date_time)) + interval '22 hours'
-                            ) - GREATEST(
-                                min(ts.date_time),
-                                date_trunc('day', min(ts.date_time)) + interval '18 hours'
-                            ),
-                            interval '0 second'
-                        )) / 3600, 0
-                    ) + GREATEST(0, COALESCE(sum(ts.unit_amount), 0) - 8.0) AS hours_18_22,
-
-                    -- Calculate hours_22_06 (night overtime)
-                    COALESCE(
-                        EXTRACT(EPOCH FROM GREATEST(
-                            LEAST(
-                                min(ts.date_time) + ((sum(ts.unit_amount) || ' hours')::interval),
-                                date_trunc('day', min(ts.date_time)) + interval '1 day' + interval '3 hours 30 minutes'
-                            ) - GREATEST(
-                                min(ts.date_time),
-                                date_trunc('day', min(ts.date_time)) + interval '18 hours 30 minutes'
-                            ),
-                            interval '0 second'
-                        )) / 3600, 0
-                    ) AS hours_22_06,
-
-                    -- Day of week
-                    CASE 
-                        WHEN EXTRACT(DOW FROM ts.date) = 0 THEN 'Sunday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 1 THEN 'Monday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 2 THEN 'Tuesday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 3 THEN 'Wednesday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 4 THEN 'Thursday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 5 THEN 'Friday'
-                        WHEN EXTRACT(DOW FROM ts.date) = 6 THEN 'Saturday'
-                    END AS day_of_week,
-
-                    -- Is weekend
-                    CASE 
-                        WHEN EXTRACT(DOW FROM ts.date) IN (0, 6) THEN true
-                        ELSE false
-                    END AS is_weekend,
-
-                    -- Delay calculations (comparing to 05:30 UTC = 08:30 local)
-                    CASE 
-                        WHEN MIN(ts.date_time) > (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes')
-                        THEN EXTRACT(EPOCH FROM (MIN(ts.date_time) - (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes'))) / 3600
-                        ELSE 0
-                    END AS delay_hours,
-
-                    CASE 
-                        WHEN MIN(ts.date_time) > (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes') 
-                        THEN EXTRACT(EPOCH FROM (MIN(ts.date_time) - (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes'))) / 60
-                        ELSE 0
-                    END::integer AS delay_minutes,
-
-                    CASE 
-                        WHEN MIN(ts.date_time) > (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes')
-                        THEN true
-                        ELSE false
-                    END AS is_delayed,
-
-                    CASE
-                        WHEN MIN(ts.date_time) > (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes')
-                        THEN 
-                            (FLOOR(EXTRACT(EPOCH FROM (MIN(ts.date_time) - (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes'))) / 3600)::text
-                            || 'h ' ||
-                            FLOOR(
-                                MOD(
-                                    EXTRACT(EPOCH FROM (MIN(ts.date_time) - (date_trunc('day', MIN(ts.date_time)) + interval '5 hours 30 minutes')))::numeric,
-                                    3600
-                                ) / 60
-                            )::text
-                            || 'm')
-                        ELSE '0h 0m'
-                    END AS delay_display,
-
-                    -- Leave type (NULL for timesheet entries)
-                    NULL::varchar AS leave_type
-
-                FROM account_analytic_line ts
-                WHERE ts.project_id IS NOT NULL 
-                  AND ts.employee_id IS NOT NULL
-                  AND ts.unit_amount > 0
-                GROUP BY ts.employee_id, ts.date, ts.project_id, ts.task_id
+        :param calendar_id: SQL expression of the resource calendar id
+        :param day: SQL expression of the local date
+        :return: SQL object
+        """
+        return SQL("""
+            SELECT attendance.hour_from, attendance.hour_to
+              FROM resource_calendar_attendance attendance
+              JOIN resource_calendar calendar ON calendar.id = attendance.calendar_id
+             WHERE attendance.calendar_id = %(calendar_id)s
+               AND attendance.dayofweek = (EXTRACT(ISODOW FROM %(day)s)::integer - 1)::varchar
+               AND attendance.resource_id IS NULL
+               AND attendance.display_type IS NULL
+               AND attendance.day_period IS DISTINCT FROM 'lunch'
+               AND (attendance.date_from IS NULL OR attendance.date_from <= %(day)s)
+               AND (attendance.date_to IS NULL OR attendance.date_to >= %(day)s)
+               AND (NOT COALESCE(calendar.two_weeks_calendar, false)
+                    OR attendance.week_type = (((%(day)s - date '0001-01-01') / 7) %% 2)::varchar)
+            UNION ALL
+            SELECT %(office_from)s, %(office_to)s
+             WHERE %(calendar_id)s IS NULL
+               AND EXTRACT(ISODOW FROM %(day)s) < 6
+        """, calendar_id=calendar_id, day=day, office_from=DEFAULT_OFFICE_HOURS[0], office_to=DEFAULT_OFFICE_HOURS[1])
+
+    def _get_source_query(self, employee_days=None):
+        """
+        Build the aggregation query the report table is filled from.
+        This query combines timesheet entries with leave records.
+
+        The actual [start, end) interval of every timesheet line is split in
+        bands, in the timezone and working schedule of the employee (so
+        daylight saving time and per-employee calendars are handled):
+        - Office hours: the attendances of the working schedule that day
+          (08:30-17:30 on weekdays for employees without schedule), max 8
+        - Night overtime 22-06
+        - Overtime 18-22: the hours in the 18:00-22:00 band outside the office
+          band, plus office hours above 8 (early morning or lunch-gap work
+          outside the office band is not overtime)
+        Delays compare the first start of the day with the start of the
+        working schedule.
+
+        :param employee_days: optional set of (employee_id, date) pairs;
+            when given, only the rows of those employee-days are produced.
+        :return: SQL object
+        """
+        timesheet_filter = leave_filter = SQL("TRUE")
+        if employee_days is not None:
+            employee_ids, dates = zip(*employee_days) if employee_days else ((), ())
+            keys = SQL(
+                "SELECT * FROM unnest(%s::integer[], %s::date[])",
+                list(employee_ids), list(dates),
+            )
+            timesheet_filter = SQL(
+                "ts.employee_id = ANY(%s) AND (ts.employee_id, ts.date::date) IN (%s)",
+                list(set(employee_ids)), keys,
+            )
+            leave_filter = SQL(
+                "hl.employee_id = ANY(%s) AND (hl.employee_id, hl.request_date_from::date) IN (%s)",
+                list(set(employee_ids)), keys,
+            )
 
+        return SQL("""
+            WITH line AS (
+                -- Timed interval and calendar of every timesheet line
+                SELECT ts.id,
+                       ts.employee_id,
+                       ts.date,
+                       ts.project_id,
+                       ts.task_id,
+                       ts.unit_amount,
+                       ts.date_time,
+                       ts.date_time + ts.unit_amount * interval '1 hour' AS date_time_end,
+                       COALESCE(NULLIF(resource.tz, ''), %s) AS tz,
+                       resource.calendar_id
+                  FROM account_analytic_line ts
+                  JOIN hr_employee employee ON employee.id = ts.employee_id
+                  LEFT JOIN resource_resource resource ON resource.id = employee.resource_id
+                 WHERE ts.project_id IS NOT NULL
+                   AND ts.employee_id IS NOT NULL
+                   AND ts.unit_amount > 0
+                   AND %s
+            ),
+            line_day AS (
+                -- Local days a timed line touches, from the day before its start
+                -- (night band started the evening before) to the day of its end
+                SELECT line.id, day::date AS day, line.tz, line.calendar_id
+                  FROM line
+                 CROSS JOIN LATERAL generate_series(
+                        date_trunc('day', (line.date_time AT TIME ZONE 'UTC') AT TIME ZONE line.tz) - interval '1 day',
+                        date_trunc('day', (line.date_time_end AT TIME ZONE 'UTC') AT TIME ZONE line.tz),
+                        interval '1 day'
+                      ) AS day
+                 WHERE line.date_time IS NOT NULL
+            ),
+            band AS (
+                -- Office band from the working schedule, evening band 18:00-22:00,
+                -- night band 22:00-06:00, all in local time converted back to UTC
+                SELECT line_day.id,
+                       'office' AS band,
+                       ((line_day.day + office.hour_from * interval '1 hour') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC' AS band_start,
+                       ((line_day.day + office.hour_to * interval '1 hour') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC' AS band_end
+                  FROM line_day
+                 CROSS JOIN LATERAL (%s) office
+                UNION ALL
+                SELECT line_day.id,
+                       'night' AS band,
+                       ((line_day.day + interval '22 hours') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC',
+                       ((line_day.day + interval '30 hours') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC'
+                  FROM line_day
                 UNION ALL
+                SELECT line_day.id,
+                       'evening' AS band,
+                       ((line_day.day + interval '18 hours') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC',
+                       ((line_day.day + interval '22 hours') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC'
+                  FROM line_day
+                UNION ALL
+                -- Part of the office band inside the evening band, which stays office time
+                SELECT line_day.id,
+                       'office_evening' AS band,
+                       ((line_day.day + GREATEST(office.hour_from, 18) * interval '1 hour') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC',
+                       ((line_day.day + LEAST(office.hour_to, 22) * interval '1 hour') AT TIME ZONE line_day.tz) AT TIME ZONE 'UTC'
+                  FROM line_day
+                 CROSS JOIN LATERAL (%s) office
+                 WHERE office.hour_to > 18 AND office.hour_from < 22
+            ),
+            line_band AS (
+                SELECT band.id,
+                       sum(overlap.hours) FILTER (WHERE band.band = 'office') AS office_hours,
+                       sum(overlap.hours) FILTER (WHERE band.band = 'night') AS night_hours,
+                       COALESCE(sum(overlap.hours) FILTER (WHERE band.band = 'evening'), 0)
+                           - COALESCE(sum(overlap.hours) FILTER (WHERE band.band = 'office_evening'), 0) AS evening_hours
+                  FROM band
+                  JOIN line ON line.id = band.id
+                 CROSS JOIN LATERAL (
+                        SELECT GREATEST(EXTRACT(EPOCH FROM
+                                   LEAST(line.date_time_end, band.band_end) - GREATEST(line.date_time, band.band_start)
+                               ), 0) / 3600 AS hours
+                      ) overlap
+                 GROUP BY band.id
+            )
 
-                -- Leave section
+            -- Timesheet section
+            SELECT
+                grouped.id,
+                grouped.employee_id,
+                grouped.date,
+                grouped.project_id,
+                grouped.task_id,
+                grouped.date_time,
+                grouped.end_time,
+                grouped.total_hours,
+
+                -- Office hours (max 8 hours): lines without start time count as office hours
+                grouped.office_hours,
+
+                -- Overtime: evening (18-22) outside the office band, plus office hours above 8
+                grouped.hours_18_22,
+
+                -- Night overtime (22-06 local time)
+                grouped.hours_22_06,
+
+                -- Day of week
+                CASE 
+                    WHEN EXTRACT(DOW FROM grouped.date) = 0 THEN 'Sunday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 1 THEN 'Monday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 2 THEN 'Tuesday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 3 THEN 'Wednesday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 4 THEN 'Thursday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 5 THEN 'Friday'
+                    WHEN EXTRACT(DOW FROM grouped.date) = 6 THEN 'Saturday'
+                END AS day_of_week,
+
+                -- Is weekend
+                CASE 
+                    WHEN EXTRACT(DOW FROM grouped.date) IN (0, 6) THEN true
+                    ELSE false
+                END AS is_weekend,
+
+                -- Public holiday from the local holiday calendar
+                %s AS is_holiday,
+
+                -- Delay calculations (first start compared to the start of the working schedule)
+                grouped.delay_seconds / 3600 AS delay_hours,
+                (grouped.delay_seconds / 60)::integer AS delay_minutes,
+                grouped.delay_seconds > 0 AS is_delayed,
+                FLOOR(grouped.delay_seconds / 3600)::text || 'h ' ||
+                    FLOOR(MOD(grouped.delay_seconds::numeric, 3600) / 60)::text || 'm' AS delay_display,
+
+                -- Leave type and payroll code (NULL for timesheet entries)
+                NULL::integer AS leave_type_id,
+                NULL::varchar AS payroll_code,
+
+                -- Shortage compared to 8 standard hours
+                GREATEST(8.0 - grouped.total_hours, 0) AS hours_shortage
+
+            FROM (
                 SELECT
-                    -hl.id AS id,
-                    hl.employee_id,
-                    hl.request_date_from::date AS date,
-                    NULL::integer AS project_id,
-                    NULL::integer AS task_id,
-                    hl.request_date_from::timestamp AS date_time,
-                    hl.request_date_to::timestamp AS end_time,
-                    0::float AS total_hours,
-                    0::float AS office_hours,
-                    0::float AS hours_18_22,
-                    0::float AS hours_22_06,
-                    CASE 
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 0 THEN 'Sunday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 1 THEN 'Monday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 2 THEN 'Tuesday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 3 THEN 'Wednesday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 4 THEN 'Thursday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 5 THEN 'Friday'
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) = 6 THEN 'Saturday'
-                    END AS day_of_week,
-                    CASE 
-                        WHEN EXTRACT(DOW FROM hl.request_date_from) IN (0, 6) THEN true
-                        ELSE false
-                    END AS is_weekend,
-                    0::float AS delay_hours,
-                    0::integer AS delay_minutes,
-                    false AS is_delayed,
-                    '0h 0m'::varchar AS delay_display,
-                    -- Extract leave type name from translatable jsonb field
-                    COALESCE(
-                        ltype.name->>'en_US', 
-                        ltype.name->>'fa_IR', 
-                        ltype.name->>'it_IT',
-                        (SELECT value FROM jsonb_each_text(ltype.name) LIMIT 1)
-                    )::varchar AS leave_type
-                FROM hr_leave hl
-                JOIN hr_leave_type ltype ON ltype.id = hl.holiday_status_id
-                WHERE hl.state = 'validate'
-            )
+                    min(line.id) AS id,
+                    line.employee_id,
+                    line.date,
+                    line.project_id,
+                    line.task_id,
+                    min(line.date_time) AS date_time,
+                    min(line.date_time) + ((sum(line.unit_amount) || ' hours')::interval) AS end_time,
+                    COALESCE(sum(line.unit_amount), 0) AS total_hours,
+                    LEAST(COALESCE(sum(
+                        CASE WHEN line.date_time IS NULL THEN line.unit_amount ELSE line_band.office_hours END
+                    ), 0), 8.0) AS office_hours,
+                    GREATEST(COALESCE(sum(
+                        CASE WHEN line.date_time IS NULL THEN line.unit_amount ELSE line_band.office_hours END
+                    ), 0) - 8.0, 0) + COALESCE(sum(line_band.evening_hours), 0) AS hours_18_22,
+                    COALESCE(sum(line_band.night_hours), 0) AS hours_22_06,
+                    COALESCE(GREATEST(EXTRACT(EPOCH FROM min(line.date_time) - min(office_start.start)), 0), 0) AS delay_seconds
+                FROM line
+                LEFT JOIN line_band ON line_band.id = line.id
+                LEFT JOIN LATERAL (
+                    SELECT ((line.date::date + min(office.hour_from) * interval '1 hour') AT TIME ZONE line.tz) AT TIME ZONE 'UTC' AS start
+                      FROM (%s) office
+                ) office_start ON true
+                GROUP BY line.employee_id, line.date, line.project_id, line.task_id
+            ) grouped
+
+            UNION ALL
+
+            -- Leave section
+            SELECT
+                -hl.id AS id,
+                hl.employee_id,
+                hl.request_date_from::date AS date,
+                NULL::integer AS project_id,
+                NULL::integer AS task_id,
+                hl.request_date_from::timestamp AS date_time,
+                hl.request_date_to::timestamp AS end_time,
+                0::float AS total_hours,
+                0::float AS office_hours,
+                0::float AS hours_18_22,
+                0::float AS hours_22_06,
+                CASE 
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 0 THEN 'Sunday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 1 THEN 'Monday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 2 THEN 'Tuesday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 3 THEN 'Wednesday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 4 THEN 'Thursday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 5 THEN 'Friday'
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) = 6 THEN 'Saturday'
+                END AS day_of_week,
+                CASE 
+                    WHEN EXTRACT(DOW FROM hl.request_date_from) IN (0, 6) THEN true
+                    ELSE false
+                END AS is_weekend,
+                %s AS is_holiday,
+                0::float AS delay_hours,
+                0::integer AS delay_minutes,
+                false AS is_delayed,
+                '0h 0m'::varchar AS delay_display,
+                hl.holiday_status_id AS leave_type_id,
+                COALESCE(ltype.payroll_code, 'OR')::varchar AS payroll_code,
+                0::float AS hours_shortage
+            FROM hr_leave hl
+            JOIN hr_leave_type ltype ON ltype.id = hl.holiday_status_id
+            WHERE hl.state = 'validate'
+              AND %s
+        """,
+            DEFAULT_TZ,
+            timesheet_filter,
+            self._get_office_band_query(SQL("line_day.calendar_id"), SQL("line_day.day")),
+            self._get_office_band_query(SQL("line_day.calendar_id"), SQL("line_day.day")),
+            self._get_holiday_query(SQL("grouped.employee_id"), SQL("grouped.date::date")),
+            self._get_office_band_query(SQL("line.calendar_id"), SQL("line.date::date")),
+            self._get_holiday_query(SQL("hl.employee_id"), SQL("hl.request_date_from::date")),
+            leave_filter,
+        )
+
+    def init(self):
+        """
+        Create the report table and fill it from the source query.
+
+        The report used to be a plain view re-aggregating every analytic line
+        and leave on each read; it is now a regular table indexed on
+        (employee_id, date) that is kept up to date incrementally by
+        _refresh_employee_days(). Installing or upgrading the module rebuilds
+        it from scratch.
+        """
+        cr = self.env.cr
+        # Previous versions created the report as a view
+        tools.drop_view_if_exists(cr, self._table)
+        cr.execute(SQL("DROP TABLE IF EXISTS %s", SQL.identifier(self._table)))
+        cr.execute(SQL(
+            "CREATE TABLE %s AS (%s)",
+            SQL.identifier(self._table), self._get_source_query(),
+        ))
+        cr.execute(SQL("ALTER TABLE %s ADD PRIMARY KEY (id)", SQL.identifier(self._table)))
+        cr.execute(SQL(
+            "CREATE INDEX %s ON %s (employee_id, date)",
+            SQL.identifier(f'{self._table}_employee_date_index'), SQL.identifier(self._table),
+        ))
+        # Lookup index for the incremental refresh of timesheet rows
+        cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_analytic_line_employee_date_report_index
+            ON account_analytic_line (employee_id, date)
+            WHERE project_id IS NOT NULL
         """)
+
+    def _flush_report_sources(self):
+        """Flush pending ORM changes the source query reads from."""
+        self.env['account.analytic.line'].flush_model()
+        self.env['hr.leave'].flush_model()
+        self.env['hr.leave.type'].flush_model()
+        self.env['hr.employee'].flush_model(['work_location_id', 'resource_id'])
+        self.env['resource.resource'].flush_model(['tz', 'calendar_id'])
+        self.env['resource.calendar'].flush_model(['two_weeks_calendar'])
+        self.env['resource.calendar.attendance'].flush_model()
+        self.env['timesheet.holiday'].flush_model()
+
+    @api.model
+    def _refresh_employee_days(self, employee_days):
+        """
+        Recompute the report rows of the given employee-days.
+
+        :param employee_days: iterable of (employee_id, date) pairs
+        """
+        employee_days = {
+            (employee_id, fields.Date.to_date(day))
+            for employee_id, day in employee_days
+            if employee_id and day
+        }
+        if not employee_days:
+            return
+        self._flush_report_sources()
+        employee_ids, dates = zip(*employee_days)
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM %s report
+             USING unnest(%s::integer[], %s::date[]) AS day(employee_id, date)
+             WHERE report.employee_id = day.employee_id
+               AND report.date::date = day.date
+            """,
+            SQL.identifier(self._table), list(employee_ids), list(dates),
+        ))
+        self.env.cr.execute(SQL(
+            "INSERT INTO %s (%s)",
+            SQL.identifier(self._table), self._get_source_query(employee_days),
+        ))
+        self.invalidate_model()
+        self.env['timesheet.report.monthly']._refresh_employee_months(
+            {(employee_id, day.replace(day=1)) for employee_id, day in employee_days}
+        )
+
+    @api.model
+    def _mark_employee_days_dirty(self, employee_days):
+        """
+        Schedule the refresh of the given employee-days at the end of the
+        current transaction, so that batch operations refresh each
+        employee-day only once.
+        """
+        employee_days = {
+            (employee_id, fields.Date.to_date(day))
+            for employee_id, day in employee_days
+            if employee_id and day
+        }
+        if not employee_days:
+            return
+        dirty = self.env.cr.precommit.data.setdefault('timesheet.report.dirty', set())
+        if not dirty:
+            self.env.cr.precommit.add(self._refresh_dirty_employee_days)
+        dirty.update(employee_days)
+
+    def _refresh_dirty_employee_days(self):
+        employee_days = self.env.cr.precommit.data.pop('timesheet.report.dirty', set())
+        self._refresh_employee_days(employee_days)
+
+    @api.model
+    def _mark_dates_dirty(self, dates):
+        """Schedule the refresh of every report row on the given dates (holiday changes)"""
+        dates = {fields.Date.to_date(day) for day in dates if day}
+        if not dates:
+            return
+        dirty = self.env.cr.precommit.data.setdefault('timesheet.report.dirty_dates', set())
+        if not dirty:
+            self.env.cr.precommit.add(self._refresh_dirty_dates)
+        dirty.update(dates)
+
+    def _refresh_dirty_dates(self):
+        dates = self.env.cr.precommit.data.pop('timesheet.report.dirty_dates', set())
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT employee_id, date::date FROM %s WHERE date::date = ANY(%s)",
+            SQL.identifier(self._table), list(dates),
+        ))
+        self._refresh_employee_days(self.env.cr.fetchall())
+
+    @api.model
+    def _mark_leave_types_dirty(self, leave_type_ids):
+        """Schedule the refresh of every report row of leaves of the given types"""
+        if not leave_type_ids:
+            return
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT employee_id, date::date FROM %s WHERE leave_type_id = ANY(%s)",
+            SQL.identifier(self._table), list(leave_type_ids),
+        ))
+        self._mark_employee_days_dirty(self.env.cr.fetchall())
+
+    @api.model
+    def _mark_employees_dirty(self, employee_ids):
+        """Schedule the refresh of every report row of the given employees"""
+        if not employee_ids:
+            return
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT employee_id, date::date FROM %s WHERE employee_id = ANY(%s)",
+            SQL.identifier(self._table), list(employee_ids),
+        ))
+        self._mark_employee_days_dirty(self.env.cr.fetchall())
+
+    @api.model
+    def _rebuild_report(self):
+        """Recompute the whole report from the source query."""
+        self._flush_report_sources()
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL(
+            "INSERT INTO %s (%s)",
+            SQL.identifier(self._table), self._get_source_query(),
+        ))
+        _logger.info("Rebuilt timesheet report: %s rows", self.env.cr.rowcount)
+        self.invalidate_model()
+        self.env['timesheet.report.monthly']._rebuild_summary()
+
+    @api.model
+    def action_rebuild_report(self):
+        """Full rebuild of the report, for recovery after out-of-band data changes."""
+        if not self.env.user.has_group('hr_timesheet.group_timesheet_manager'):
+            raise AccessError(_("Only timesheet managers can rebuild the timesheet report."))
+        self._rebuild_report()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'message': _("The timesheet report has been rebuilt."),
+            },
+        }
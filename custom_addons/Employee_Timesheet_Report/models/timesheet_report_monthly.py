@@ -0,0 +1,150 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class TimesheetReportMonthly(models.Model):
+    """
+    Attendance summary per employee and month, aggregated from the
+    timesheet report table. Refreshed together with the report rows, so
+    dashboards read one row per employee and month instead of grouping the
+    whole report.
+    """
+    _name = 'timesheet.report.monthly'
+    _description = 'Monthly Attendance Summary'
+    _auto = False  # Table managed by init(), refreshed with timesheet.report
+    _order = 'month desc, employee_id'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', readonly=True)
+    month = fields.Date(string='Month', readonly=True)
+    total_hours = fields.Float(string='Total Hours', readonly=True)
+    office_hours = fields.Float(string='Office Hours', readonly=True)
+    hours_18_22 = fields.Float(string='Overtime 18-22', readonly=True)
+    hours_22_06 = fields.Float(string='Night Overtime 22-06', readonly=True)
+    delay_minutes = fields.Integer(string='Delay Minutes', readonly=True)
+    days_late = fields.Integer(string='Days Late', readonly=True)
+    hours_shortage = fields.Float(string='Hours Shortage', readonly=True)
+    worked_days = fields.Integer(string='Worked Days', readonly=True)
+    leave_days = fields.Integer(string='Leave Days', readonly=True)
+
+    def _get_summary_query(self, employee_months=None):
+        """
+        Aggregation of the report rows per employee and month.
+
+        :param employee_months: optional set of (employee_id, first day of
+            month) pairs; when given, only those summaries are produced.
+        :return: SQL object
+        """
+        month_filter = SQL("TRUE")
+        if employee_months is not None:
+            employee_ids, months = zip(*employee_months) if employee_months else ((), ())
+            month_filter = SQL(
+                """report.employee_id = ANY(%s)
+                   AND (report.employee_id, date_trunc('month', report.date)::date)
+                       IN (SELECT * FROM unnest(%s::integer[], %s::date[]))""",
+                list(set(employee_ids)), list(employee_ids), list(months),
+            )
+        # The report has one row per employee, day and project/task: the delay and
+        # the shortage are per day, so they are computed per employee-day first.
+        return SQL(
+            """
+            SELECT day.employee_id,
+                   date_trunc('month', day.date)::date AS month,
+                   COALESCE(sum(day.total_hours), 0) AS total_hours,
+                   COALESCE(sum(day.office_hours), 0) AS office_hours,
+                   COALESCE(sum(day.hours_18_22), 0) AS hours_18_22,
+                   COALESCE(sum(day.hours_22_06), 0) AS hours_22_06,
+                   COALESCE(sum(day.delay_minutes), 0) AS delay_minutes,
+                   count(*) FILTER (WHERE day.delay_minutes > 0) AS days_late,
+                   COALESCE(sum(day.hours_shortage), 0) AS hours_shortage,
+                   count(*) FILTER (WHERE day.is_worked) AS worked_days,
+                   count(*) FILTER (WHERE day.is_leave) AS leave_days
+              FROM (
+                    SELECT report.employee_id,
+                           report.date::date AS date,
+                           sum(report.total_hours) AS total_hours,
+                           sum(report.office_hours) AS office_hours,
+                           sum(report.hours_18_22) AS hours_18_22,
+                           sum(report.hours_22_06) AS hours_22_06,
+                           -- Delay of the first start of the day
+                           min(report.delay_minutes) FILTER (WHERE report.leave_type_id IS NULL) AS delay_minutes,
+                           -- Shortage of the hours worked that day compared to 8 standard hours
+                           GREATEST(8.0 - sum(report.total_hours) FILTER (WHERE report.leave_type_id IS NULL), 0)
+                               AS hours_shortage,
+                           bool_or(report.leave_type_id IS NULL) AS is_worked,
+                           bool_or(report.leave_type_id IS NOT NULL) AS is_leave
+                      FROM timesheet_report report
+                     WHERE %s
+                  GROUP BY report.employee_id, report.date::date
+                   ) day
+             GROUP BY day.employee_id, date_trunc('month', day.date)::date
+            """,
+            month_filter,
+        )
+
+    def init(self):
+        """
+        Create the summary table and fill it from the report table, which
+        timesheet.report.init() has just rebuilt.
+        """
+        cr = self.env.cr
+        cr.execute(SQL("DROP TABLE IF EXISTS %s", SQL.identifier(self._table)))
+        cr.execute(SQL(
+            """
+            CREATE TABLE %s (
+                id serial PRIMARY KEY,
+                employee_id integer NOT NULL,
+                month date NOT NULL,
+                total_hours numeric,
+                office_hours numeric,
+                hours_18_22 numeric,
+                hours_22_06 numeric,
+                delay_minutes integer,
+                days_late integer,
+                hours_shortage numeric,
+                worked_days integer,
+                leave_days integer,
+                UNIQUE (employee_id, month)
+            )
+            """,
+            SQL.identifier(self._table),
+        ))
+        self._insert_summary(self._get_summary_query())
+
+    def _insert_summary(self, query):
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %s (employee_id, month, total_hours, office_hours, hours_18_22, hours_22_06,
+                            delay_minutes, days_late, hours_shortage, worked_days, leave_days)
+            %s
+            """,
+            SQL.identifier(self._table), query,
+        ))
+
+    @api.model
+    def _refresh_employee_months(self, employee_months):
+        """
+        Recompute the summaries of the given employee-months from the report.
+
+        :param employee_months: set of (employee_id, first day of month) pairs
+        """
+        if not employee_months:
+            return
+        employee_ids, months = zip(*employee_months)
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM %s summary
+             USING unnest(%s::integer[], %s::date[]) AS key(employee_id, month)
+             WHERE summary.employee_id = key.employee_id
+               AND summary.month = key.month
+            """,
+            SQL.identifier(self._table), list(employee_ids), list(months),
+        ))
+        self._insert_summary(self._get_summary_query(employee_months))
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild_summary(self):
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        self._insert_summary(self._get_summary_query())
+        self.invalidate_model()
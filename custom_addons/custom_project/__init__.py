@@ -1,4 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from . import models
-from .hooks import assign_admins_to_existing_projects
+from .hooks import assign_admins_to_existing_projects, post_init_hook
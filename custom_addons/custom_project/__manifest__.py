@@ -26,10 +26,12 @@
            - Introduces "Initially Planned Hours" for accurate time estimation.  
            - Implements "Remaining Time" calculation, updating dynamically based on task progress.  
            - Ensures that the sum of all assigned users' allocated hours does not exceed planned task hours.  
+           - Checks the subtask and allocated hours of all changed tasks once per transaction, listing every exceeded task.  
         
         ✅ **Project-Level Time Control**  
            - Defines a maximum "Allocated Hours" limit for projects.  
            - Prevents tasks from exceeding the project's allocated time.  
+           - Keeps the planned hours of the top-level tasks and the available hours of each project up to date as tasks change.  
         
         ✅ **Access and Role Management**  
            - Introduces the role of "Technical Director" responsible for project approval.  
@@ -38,11 +40,14 @@
         
         ✅ **Validation & Constraints**  
            - Blocks users from logging more hours than their assigned task allocation.  
+           - Keeps the logged and remaining hours of each allocation up to date as timesheets change.  
+           - Imports timesheets in bulk (`account.analytic.line.import_timesheets`), validating the whole batch at once.  
            - Ensures that a Technical Director is assigned before creating a project.  
            - Restricts task creation permissions to the Project Manager.  
         
         ✅ **UI/UX Improvements**  
            - Adds fields for "Responsible User," "Allocated Hours," and "Project State" to project and task views.  
+           - Stores the parent task hierarchy and the top-level task of each task, to search and group tasks by them.  
            - Provides a seamless interface for tracking time, responsibilities, and project status.
         
         This module helps teams manage their projects with greater accuracy, reducing time mismanagement and enhancing project oversight.
@@ -56,7 +61,7 @@
     # Categories can be used to filter modules in modules listing
 
     'category': 'Project/Management',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.3.0',
     'sequence': -100,
 
     # any module necessary for this one to work correctly
@@ -80,6 +85,7 @@
     },
     'icon': '/custom_project/static/description/icon.png',
     'demo': [],
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'auto_install': False,
     'application': True,
@@ -17,3 +17,8 @@ def assign_admins_to_existing_projects(cr, registry):
 
         if missing_admins:
             project.message_subscribe(partner_ids=missing_admins.mapped('partner_id').ids)
+
+
+def post_init_hook(env):
+    """ Sum the planned hours of the existing top-level tasks into the project rollups """
+    env['project.project'].with_context(active_test=False).search([])._recompute_task_hours()
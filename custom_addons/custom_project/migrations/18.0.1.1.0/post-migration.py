@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run AFTER module update:
+    Sum the existing timesheets into the logged hours of the task allocations.
+    """
+    _logger.info("=== Running POST-migration script for version %s ===" % version)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['project.task.allocation'].search([])._recompute_logged_hours()
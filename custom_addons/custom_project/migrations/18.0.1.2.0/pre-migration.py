@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run BEFORE module update:
+    Create and fill the columns of the now stored task hierarchy fields with one
+    recursive query, so that the ORM does not compute them level by level.
+    """
+    _logger.info("=== Running PRE-migration script for version %s ===" % version)
+    cr.execute("""
+        ALTER TABLE project_task
+            ADD COLUMN IF NOT EXISTS parent_task_hierarchy varchar,
+            ADD COLUMN IF NOT EXISTS root_task_id int4
+    """)
+    cr.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, name, NULL::varchar AS hierarchy, id AS root_id
+              FROM project_task
+             WHERE parent_id IS NULL
+         UNION ALL
+            SELECT task.id, task.name, CONCAT_WS(' > ', tree.hierarchy, tree.name)::varchar, tree.root_id
+              FROM project_task task
+              JOIN tree ON task.parent_id = tree.id
+        )
+        UPDATE project_task task
+           SET parent_task_hierarchy = tree.hierarchy,
+               root_task_id = tree.root_id
+          FROM tree
+         WHERE task.id = tree.id
+    """)
+    _logger.info("Stored the hierarchy of %s tasks", cr.rowcount)
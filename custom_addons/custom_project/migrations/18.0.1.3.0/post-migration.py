@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run AFTER module update:
+    Sum the planned hours of the existing top-level tasks into the project rollups.
+    """
+    _logger.info("=== Running POST-migration script for version %s ===" % version)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['project.project'].with_context(active_test=False).search([])._recompute_task_hours()
@@ -1,13 +1,25 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, AccessError, UserError
-from odoo.tools import formataddr
+from odoo.tools import formataddr, float_compare, split_every, SQL
+from collections import defaultdict
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Number of timesheets inserted per create() call by import_timesheets()
+TIMESHEET_IMPORT_CHUNK_SIZE = 1000
+# Context marker of the timesheets already validated by import_timesheets(). It is
+# an object rather than a flag, so that it cannot be passed through RPC calls.
+_TIMESHEETS_VALIDATED = object()
+
 
 class CustomProjectTask(models.Model):
     _inherit = 'project.task'
+
+    # Fields the planned hours rollup of the projects is computed from
+    _PROJECT_HOURS_FIELDS = {'planned_hours', 'parent_id', 'project_id', 'active'}
+    # Fields the hours budget of a task and of its parent is computed from
+    _HOURS_BUDGET_FIELDS = {'planned_hours', 'parent_id', 'active'}
     user_id = fields.Many2one('res.users', string='Assigned to', ondelete='set null')
 
     planned_hours = fields.Float("Initially Planned Hours",
@@ -90,30 +102,37 @@ class CustomProjectTask(models.Model):
     parent_task_hierarchy = fields.Char(
         string='Parent Task Hierarchy',
         compute='_compute_parent_task_hierarchy',
+        store=True,
+        recursive=True,
         help="Shows the hierarchy of parent tasks"
     )
+    root_task_id = fields.Many2one(
+        'project.task',
+        string='Top-level Task',
+        compute='_compute_parent_task_hierarchy',
+        store=True,
+        recursive=True,
+        index=True,
+        help="The top-level task of the hierarchy (the task itself for top-level tasks)"
+    )
 
-
-    @api.depends('parent_id', 'parent_id.parent_id', 'parent_id.name')
+    @api.depends('parent_id', 'parent_id.name', 'parent_id.parent_task_hierarchy', 'parent_id.root_task_id')
     def _compute_parent_task_hierarchy(self):
         """
-        Computes a string showing the full hierarchy of parent tasks.
+        Computes a string showing the full hierarchy of parent tasks, and the top-level task.
         Example: "Main Task > Sub Task 1 > Sub Task 2"
+        Both are derived from the stored values of the parent, so renaming or moving a task
+        only recomputes its own subtree.
         """
         for task in self:
-            if not task.parent_id:
+            parent = task.parent_id
+            if not parent:
                 task.parent_task_hierarchy = False
+                task.root_task_id = task
             else:
-                hierarchy = []
-                current = task.parent_id
-                # Build the hierarchy from bottom to top
-                while current:
-                    hierarchy.insert(0, current.name)
-                    current = current.parent_id
                 # Join with arrow separator
-                task.parent_task_hierarchy = ' > '.join(hierarchy)
-
-
+                task.parent_task_hierarchy = ' > '.join(filter(None, [parent.parent_task_hierarchy, parent.name]))
+                task.root_task_id = parent.root_task_id or parent
 
     # End
     def _compute_planned_hours_readonly(self):
@@ -140,6 +159,7 @@ class CustomProjectTask(models.Model):
 
         # If a task is created with assignees, ensure allocation records are also created.
         tasks = super(CustomProjectTask, self).create(vals_list)
+        self.env['project.project']._add_task_hours(tasks._get_project_task_hours())
         
         for task, vals in zip(tasks, vals_list):
             if not self.env.context.get('syncing_from_allocation') and 'user_ids' in vals:
@@ -168,20 +188,15 @@ class CustomProjectTask(models.Model):
             # are constrained by the parent task, not the project directly.
             if not task.parent_id and task.project_id:
                 project = task.project_id
-                top_level_tasks = project.task_ids.filtered(lambda t: not t.parent_id)
-                total_task_hours = sum(top_level_tasks.mapped('planned_hours'))
-
-                if total_task_hours > project.allocated_hours:
+                if float_compare(project.total_task_hours, project.allocated_hours, precision_digits=2) > 0:
                     allocated_hours_int = int(project.allocated_hours)
                     allocated_minutes = int((project.allocated_hours - allocated_hours_int) * 60)
                     allocated_time_str = f"{allocated_hours_int:02d}:{allocated_minutes:02d}"
                     raise ValidationError(
                         f"The total planned hours for tasks in this project exceed the allocated limit of {allocated_time_str} hours."
                     )
-            if task.subtask_hours_total + task.allocated_hours_total > task.planned_hours:
-                raise ValidationError(
-                    f"Total allocated hours and subtask hours cannot exceed the planned hours for this task!"
-                )
+        # The hours budget of the new tasks and of their parents is checked at the end of the transaction
+        (tasks | tasks.parent_id)._mark_hours_budget_dirty()
         # task._sync_users_with_followers()
         # task._sync_followers_with_users()
         # Mar 05
@@ -204,19 +219,22 @@ class CustomProjectTask(models.Model):
         for task in self:
             task.total_project_hours = task.project_id.allocated_hours if task.project_id else 0.0
 
-    @api.constrains('planned_hours', 'child_ids')
-    def _check_subtask_hours(self):
-        for task in self:
-            if task.child_ids:
-                total_subtask_hours = sum(task.child_ids.mapped('planned_hours'))
-                if total_subtask_hours > task.planned_hours:
-                    raise ValidationError(
-                        _(f"❌\nThe total planned hours of subtasks cannot exceed the Task Planned Hours of the main task.")
-                    )
-
     def unlink(self):
         """Allow task deletion, bypassing 'mail.followers' restriction"""
-        return super(CustomProjectTask, self.with_context(allow_task_delete=True)).unlink()
+        projects = self.project_id
+        self.parent_id._mark_hours_budget_dirty()
+        res = super(CustomProjectTask, self.with_context(allow_task_delete=True)).unlink()
+        # Sub-tasks of the deleted tasks may have become top-level tasks, so re-sum the projects
+        projects._recompute_task_hours()
+        return res
+
+    def _get_project_task_hours(self, sign=1):
+        """ Return the planned hours of the active top-level tasks per project, multiplied by sign """
+        task_hours = defaultdict(float)
+        for task in self:
+            if task.project_id and not task.parent_id and task.active:
+                task_hours[task.project_id.id] += sign * task.planned_hours
+        return task_hours
 
     @api.depends("allocation_ids.allocated_hours")
     def _compute_allocated_hours_total(self):
@@ -230,14 +248,44 @@ class CustomProjectTask(models.Model):
         for task in self:
             task.subtask_hours_total = sum(task.child_ids.mapped("planned_hours"))
 
-    @api.constrains("subtask_hours_total", "allocated_hours_total")
-    def _check_task_hours_limit(self):
-        """ Checking the limit of total allocated hours and subtasks """
-        for task in self:
-            if task.subtask_hours_total + task.allocated_hours_total > task.planned_hours:
-                raise ValidationError(
-                    f"❌\nTotal allocated hours and subtask hours cannot exceed the planned hours for this task!\n"
-                )
+    def _mark_hours_budget_dirty(self):
+        """
+        Check the hours budget of the tasks (their subtask and allocated hours against
+        their planned hours) at the end of the transaction, so that a batch of changes
+        to a task tree is validated once, in its final state.
+        """
+        task_ids = {task_id for task_id in self.ids if isinstance(task_id, int)}
+        if not task_ids:
+            return
+        dirty = self.env.cr.precommit.data.setdefault('project.task.hours_budget', set())
+        if not dirty:
+            self.env.cr.precommit.add(self._check_hours_budget)
+        dirty.update(task_ids)
+
+    def _check_hours_budget(self):
+        """ Validate the hours budget of the dirty tasks, reporting every exceeded task at once """
+        task_ids = self.env.cr.precommit.data.pop('project.task.hours_budget', set())
+        # Tasks deleted in the same transaction are skipped
+        tasks = self.env['project.task'].sudo().browse(task_ids).exists()
+        exceeded = tasks.filtered(lambda task: float_compare(
+            task.subtask_hours_total + task.allocated_hours_total, task.planned_hours, precision_digits=2) > 0)
+        if exceeded:
+            def float_to_time_str(hours_float):
+                hours = int(hours_float)
+                minutes = round((hours_float - hours) * 60)
+                return f"{hours:02d}:{minutes:02d}"
+
+            raise ValidationError(_(
+                "❌\nTotal allocated hours and subtask hours cannot exceed the planned hours of these tasks:\n%s",
+                "\n".join(
+                    _("- %(task)s: planned %(planned)s, subtasks %(subtasks)s, allocated %(allocated)s",
+                      task=task.name,
+                      planned=float_to_time_str(task.planned_hours),
+                      subtasks=float_to_time_str(task.subtask_hours_total),
+                      allocated=float_to_time_str(task.allocated_hours_total))
+                    for task in exceeded
+                ),
+            ))
 
     # alireza Apr 14, 2025
     # better delete this function
@@ -245,7 +293,8 @@ class CustomProjectTask(models.Model):
         """
         Overrides the write method to add validation for planned hours.
         - Validates that the total planned hours of top-level tasks do not exceed the project's allocated hours.
-        - Validates that the total hours of sub-tasks do not exceed the parent task's planned hours.
+        - Validates that the total hours of sub-tasks do not exceed the parent task's planned hours
+          (at the end of the transaction, see _mark_hours_budget_dirty).
         """
         # A_zeril_A, 2025-10-06: Two-way synchronization logic.
         # Prevents loops and handles sync when user_ids are changed from the main field.
@@ -295,7 +344,19 @@ class CustomProjectTask(models.Model):
 
                 old_planned_hours_map[task.id] = task.planned_hours
 
-        res = super().write(vals)
+        # Both the old and the new parents are affected
+        if self._HOURS_BUDGET_FIELDS.intersection(vals):
+            (self | self.parent_id)._mark_hours_budget_dirty()
+
+        if not self._PROJECT_HOURS_FIELDS.intersection(vals):
+            res = super().write(vals)
+        else:
+            # Move the planned hours of the tasks from their old project rollup to the new one
+            task_hours = self._get_project_task_hours(sign=-1)
+            res = super().write(vals)
+            for project_id, hours in self._get_project_task_hours().items():
+                task_hours[project_id] += hours
+            self.env['project.project']._add_task_hours(task_hours)
 
         # A_zeril_A, 2025-10-06: Reworked sync logic.
         # This logic now ensures full synchronization on every write involving 'user_ids',
@@ -358,15 +419,8 @@ class CustomProjectTask(models.Model):
         # Project-level validation: only triggers if the 'planned_hours' of a top-level task is being modified.
         # This prevents the check from running incorrectly when the write is triggered by adding a sub-task.
         if 'planned_hours' in vals:
-            for task in self.filtered(lambda t: not t.parent_id and t.project_id):
-                project = task.project_id
-                top_level_tasks = self.env['project.task'].search([
-                    ('project_id', '=', project.id),
-                    ('parent_id', '=', False)
-                ])
-                total_task_hours = sum(top_level_tasks.mapped('planned_hours'))
-
-                if total_task_hours > project.allocated_hours:
+            for project in self.filtered(lambda t: not t.parent_id).project_id:
+                if float_compare(project.total_task_hours, project.allocated_hours, precision_digits=2) > 0:
                     allocated_hours_int = int(project.allocated_hours)
                     allocated_minutes = int((project.allocated_hours - allocated_hours_int) * 60)
                     allocated_time_str = f"{allocated_hours_int:02d}:{allocated_minutes:02d}"
@@ -374,15 +428,9 @@ class CustomProjectTask(models.Model):
                         f"The total planned hours for tasks in this project exceed the allocated limit of {allocated_time_str} hours."
                     )
 
-        # Task-level validation for sub-tasks.
-        for task in self:
-            # We refresh the task record to ensure the computed field 'subtask_hours_total'
-            # is up-to-date after a potential sub-task has been added or modified via the parent task's write.
-            task.refresh()
-            if task.subtask_hours_total + task.allocated_hours_total > task.planned_hours:
-                raise ValidationError(
-                    f"Total allocated hours and subtask hours cannot exceed the planned hours for this task!"
-                )
+        # Task-level validation for sub-tasks is done at the end of the transaction.
+        if self._HOURS_BUDGET_FIELDS.intersection(vals):
+            self.parent_id._mark_hours_budget_dirty()
         return res
 
     @api.depends("planned_hours", "allocated_hours_total", "subtask_hours_total")
@@ -395,7 +443,7 @@ class CustomProjectTask(models.Model):
     # Added by A_zeril_A on Aug 25, 2025
     # This compute method calculates the remaining project budget after the current task's
     # planned hours have been accounted for. It provides a view of the budget left for other tasks.
-    @api.depends('planned_hours', 'project_id')
+    @api.depends('planned_hours', 'project_id', 'project_id.available_hours')
     def _compute_project_available_hours(self):
         for task in self:
             if not task.project_id or task.parent_id:
@@ -404,18 +452,15 @@ class CustomProjectTask(models.Model):
                 continue
 
             project = task.project_id
-            # We search for ALL top-level tasks in the project to calculate the total used hours.
-            all_top_level_tasks = self.env['project.task'].search([
-                ('project_id', '=', project.id),
-                ('parent_id', '=', False),
-                ('id', '!=', task._origin.id)
-            ])
-            other_tasks_hours = sum(all_top_level_tasks.mapped('planned_hours'))
+            # The project rollup already counts the saved planned hours of this task;
+            # we replace them with the current (potentially unsaved) ones.
+            saved_task = task._origin
+            saved_hours = saved_task.planned_hours if (
+                saved_task and saved_task.active and not saved_task.parent_id
+                and saved_task.project_id == project._origin
+            ) else 0.0
 
-            # We add the current task's (potentially unsaved) planned_hours to the sum.
-            current_total_hours = other_tasks_hours + task.planned_hours
-
-            task.project_available_hours = project.allocated_hours - current_total_hours
+            task.project_available_hours = project.available_hours + saved_hours - task.planned_hours
 
 
 
@@ -467,14 +512,67 @@ class CustomProjectProject(models.Model):
 
     total_task_hours = fields.Float(
         string="Total Task Hours",
-        compute='_compute_total_task_hours',
-        help="Sum of planned hours of all top-level tasks in this project."
+        readonly=True,
+        copy=False,
+        help="Sum of planned hours of all top-level tasks in this project, kept up to date by the tasks."
+    )
+    available_hours = fields.Float(
+        string="Available Hours",
+        compute='_compute_available_hours',
+        store=True,
+        help="Allocated hours of the project not yet planned in top-level tasks."
     )
 
-    def _compute_total_task_hours(self):
+    @api.depends('allocated_hours', 'total_task_hours')
+    def _compute_available_hours(self):
         for project in self:
-            top_level_tasks = project.task_ids.filtered(lambda t: not t.parent_id)
-            project.total_task_hours = sum(top_level_tasks.mapped('planned_hours'))
+            project.available_hours = project.allocated_hours - project.total_task_hours
+
+    def _recompute_task_hours(self):
+        """ Sum the planned hours of the top-level tasks of the projects, in one query """
+        if not self:
+            return
+        self.env['project.task'].flush_model(['project_id', 'parent_id', 'planned_hours', 'active'])
+        self.flush_recordset(['allocated_hours', 'total_task_hours', 'available_hours'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE project_project project
+               SET total_task_hours = rollup.hours,
+                   available_hours = COALESCE(project.allocated_hours, 0) - rollup.hours
+              FROM (
+                    SELECT project.id, COALESCE(SUM(task.planned_hours), 0) AS hours
+                      FROM project_project project
+                 LEFT JOIN project_task task ON task.project_id = project.id
+                                            AND task.parent_id IS NULL
+                                            AND task.active
+                     WHERE project.id = ANY(%s)
+                  GROUP BY project.id
+                   ) rollup
+             WHERE project.id = rollup.id
+            """,
+            self.ids,
+        ))
+        self.invalidate_recordset(['total_task_hours', 'available_hours'])
+
+    @api.model
+    def _add_task_hours(self, task_hours):
+        """ Add the planned hours per project id of task_hours to the project rollups, in a single query """
+        deltas = [(project_id, hours) for project_id, hours in task_hours.items() if hours]
+        if not deltas:
+            return
+        self.flush_model(['allocated_hours', 'total_task_hours', 'available_hours'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE project_project project
+               SET total_task_hours = COALESCE(project.total_task_hours, 0) + delta.hours,
+                   available_hours = COALESCE(project.allocated_hours, 0)
+                                     - (COALESCE(project.total_task_hours, 0) + delta.hours)
+              FROM (VALUES %(deltas)s) AS delta(project_id, hours)
+             WHERE project.id = delta.project_id
+            """,
+            deltas=SQL(", ").join([SQL("(%s, %s::float8)", *delta) for delta in deltas]),
+        ))
+        self.invalidate_model(['total_task_hours', 'available_hours'])
 
     def mark_as_completed(self):
         for project in self:
@@ -594,13 +692,9 @@ class CustomProjectProject(models.Model):
                 # Ensure new allocated hours are not less than the sum of existing task hours.
                 new_allocated_hours = vals.get('allocated_hours')
                 if new_allocated_hours is not None:
-                    top_level_tasks = self.env['project.task'].search([
-                        ('project_id', '=', project.id),
-                        ('parent_id', '=', False)
-                    ])
-                    total_task_hours = sum(top_level_tasks.mapped('planned_hours'))
+                    total_task_hours = project.total_task_hours
 
-                    if new_allocated_hours < total_task_hours:
+                    if float_compare(new_allocated_hours, total_task_hours, precision_digits=2) < 0:
                         raise ValidationError(
                             f"Cannot set allocated hours to {new_allocated_hours:.2f}. "
                             f"It is less than the total planned hours of tasks ({total_task_hours:.2f})."
@@ -782,6 +876,10 @@ class AccountAnalyticLine(models.Model):
     )
 
     date = fields.Datetime(string="Date and Time", required=True)
+
+    # Fields the logged hours of the task allocations are computed from. hr_timesheet
+    # recomputes user_id from employee_id and clears task_id when project_id is emptied.
+    _LOGGED_HOURS_FIELDS = {'task_id', 'user_id', 'unit_amount', 'employee_id', 'project_id'}
     
 
 # by alireza july 23, 2025
@@ -846,6 +944,12 @@ class AccountAnalyticLine(models.Model):
     # by alireza july 23, 2025
     @api.model_create_multi
     def create(self, vals_list):
+        if self.env.context.get('timesheets_validated') is _TIMESHEETS_VALIDATED:
+            lines = super(AccountAnalyticLine, self).create(vals_list)
+            self.env['project.task.allocation']._add_logged_hours(lines._get_logged_hours())
+            return lines
+
+        logged_in_batch = defaultdict(float)
         for vals in vals_list:
             task_id = vals.get('task_id')
             if task_id:
@@ -873,17 +977,108 @@ class AccountAnalyticLine(models.Model):
                     raise AccessError(f"❌\nYou do not have permissions to add timesheet records."
                                     "\n⚙️"
                                     "\n  |_The user first must be Assigned to the task, then must be added to Notebook >> My Team)")
-                # Calculate the total timesheet hours recorded for this user on this task.
-                timesheet_lines = self.search([
-                    ('task_id', '=', task_id),
-                    ('user_id', '=', self.env.user.id)
-                ])
-                total_logged = sum(timesheet_lines.mapped('unit_amount'))
+                # The hours already logged for this user on this task, plus the earlier lines of this batch.
+                total_logged = allocation.logged_hours + logged_in_batch[allocation.id]
                 new_hours = vals.get('unit_amount', 0)
-                if total_logged + new_hours > allocation.allocated_hours:
+                if float_compare(total_logged + new_hours, allocation.allocated_hours, precision_digits=2) > 0:
                     raise ValidationError("You cannot log more time than allocated for this task.")
+                logged_in_batch[allocation.id] += new_hours
+
+        lines = super(AccountAnalyticLine, self).create(vals_list)
+        self.env['project.task.allocation']._add_logged_hours(lines._get_logged_hours())
+        return lines
+
+    @api.model
+    def import_timesheets(self, vals_list):
+        """
+        Create many timesheets at once, e.g. from a spreadsheet or a timer sync.
+
+        The lines are validated with the same rules as create(), but as a whole:
+        tasks, projects and allocations are loaded once, the hours are summed per
+        (task, user), and every violation is reported in a single ValidationError.
+        The lines are then inserted in chunks; nothing is created if any line or
+        chunk fails.
+
+        Non-admin users can only import their own timesheets.
 
-        return super(AccountAnalyticLine, self).create(vals_list)
+        :param vals_list: the values of the timesheets, as for create()
+        :return: the created timesheets
+        """
+        errors = self._check_timesheet_import(vals_list)
+        if errors:
+            raise ValidationError(_("The timesheets could not be imported:\n%s", "\n".join(errors)))
+
+        lines = self.browse()
+        with self.env.cr.savepoint():
+            Line = self.with_context(timesheets_validated=_TIMESHEETS_VALIDATED)
+            for chunk in split_every(TIMESHEET_IMPORT_CHUNK_SIZE, vals_list, list):
+                lines |= Line.create(chunk)
+        _logger.info("Imported %s timesheets", len(lines))
+        return lines.with_env(self.env)
+
+    @api.model
+    def _check_timesheet_import(self, vals_list):
+        """ Validate the timesheets of import_timesheets() and return the list of violations """
+        is_admin = self.env.user.login == 'admin'
+        task_ids = {vals['task_id'] for vals in vals_list if vals.get('task_id')}
+        tasks = self.env['project.task'].browse(task_ids).exists()
+        # Load the projects and assignees of all tasks at once
+        tasks.fetch(['project_id', 'user_ids'])
+        tasks.project_id.fetch(['date_start', 'date', 'state'])
+        allocations = self.env['project.task.allocation'].search([('task_id', 'in', tasks.ids)])
+        allocation_per_key = {(allocation.task_id.id, allocation.employee_id.id): allocation for allocation in allocations}
+        # hr_timesheet computes the user of the lines without user_id from their employee
+        employee_ids = {vals['employee_id'] for vals in vals_list if vals.get('employee_id') and not vals.get('user_id')}
+        employees = self.env['hr.employee'].browse(employee_ids)
+        employees.fetch(['user_id'])
+
+        errors = []
+        hours_per_key = defaultdict(float)
+        lines_per_key = defaultdict(list)
+        for index, vals in enumerate(vals_list, start=1):
+            task_id = vals.get('task_id')
+            if not task_id:
+                continue
+            task = tasks.browse(task_id)
+            # Skip validation if task doesn't exist or has no project (e.g., leave records)
+            if task not in tasks or not task.project_id:
+                continue
+
+            if vals.get('user_id'):
+                user = self.env['res.users'].browse(vals['user_id'])
+            elif vals.get('employee_id'):
+                user = employees.browse(vals['employee_id']).user_id
+            else:
+                user = self.env.user
+            project = task.project_id
+            if not is_admin and user != self.env.user:
+                errors.append(_("Line %(index)s: you can only import your own timesheets.", index=index))
+            elif not project.date_start or not project.date:
+                errors.append(_("Line %(index)s: the Start Date or End Date of project '%(project)s' is not set.",
+                                index=index, project=project.name))
+            elif project.state == 'completed':
+                errors.append(_("Line %(index)s: the project '%(project)s' is Completed.",
+                                index=index, project=project.name))
+            elif user not in task.user_ids or (task.id, user.id) not in allocation_per_key:
+                errors.append(_("Line %(index)s: %(user)s is not assigned to the task '%(task)s'.",
+                                index=index, user=user.name, task=task.name))
+            else:
+                hours_per_key[task.id, user.id] += vals.get('unit_amount', 0)
+                lines_per_key[task.id, user.id].append(index)
+
+        for (task_id, user_id), hours in hours_per_key.items():
+            allocation = allocation_per_key[task_id, user_id]
+            if float_compare(allocation.logged_hours + hours, allocation.allocated_hours, precision_digits=2) > 0:
+                errors.append(_(
+                    "Lines %(indexes)s: %(user)s would log %(hours).2f hours on the task '%(task)s', "
+                    "more than the %(remaining).2f hours left in the allocation.",
+                    indexes=", ".join(map(str, lines_per_key[task_id, user_id])),
+                    user=allocation.employee_id.name,
+                    hours=hours,
+                    task=allocation.task_id.name,
+                    remaining=allocation.remaining_hours,
+                ))
+        return errors
 
     def write(self, vals):
         # This initial check only runs if the task is being changed.
@@ -921,18 +1116,22 @@ class AccountAnalyticLine(models.Model):
                 if not allocation:
                     raise AccessError("You are not allocated to log time for this task.")
 
-                # Calculate the total timesheet hours recorded except for this line (if the value changes)
-                other_lines = self.search([
-                    ('id', '!=', line.id),
-                    ('task_id', '=', task.id),
-                    ('user_id', '=', self.env.user.id)
-                ])
-                total_logged = sum(other_lines.mapped('unit_amount'))
+                # The hours logged for this user on this task, except for this line (the owner is the current user)
+                total_logged = allocation.logged_hours - line.unit_amount
                 new_amount = vals.get('unit_amount', line.unit_amount)
-                if total_logged + new_amount > allocation.allocated_hours:
+                if float_compare(total_logged + new_amount, allocation.allocated_hours, precision_digits=2) > 0:
                     raise ValidationError("The updated time exceeds your allocated hours for this task.")
 
-        return super(AccountAnalyticLine, self).write(vals)
+        if not self._LOGGED_HOURS_FIELDS.intersection(vals):
+            return super(AccountAnalyticLine, self).write(vals)
+        # Move the hours of the lines from their old (task, user) to the new one. The
+        # hours of the lines whose (task, user) and amount did not change cancel out.
+        logged_hours = self._get_logged_hours(sign=-1)
+        res = super(AccountAnalyticLine, self).write(vals)
+        for key, hours in self._get_logged_hours().items():
+            logged_hours[key] += hours
+        self.env['project.task.allocation']._add_logged_hours(logged_hours)
+        return res
 
     def unlink(self):
         # Author: F. Alimirzaie, 2025-09-09
@@ -942,8 +1141,17 @@ class AccountAnalyticLine(models.Model):
             is_owner = line.user_id == self.env.user
             if not (is_admin or is_owner):
                 raise AccessError(_("Only the timesheet owner or an administrator can delete this entry."))
+        self.env['project.task.allocation']._add_logged_hours(self._get_logged_hours(sign=-1))
         return super(AccountAnalyticLine, self).unlink()
 
+    def _get_logged_hours(self, sign=1):
+        """ Return the hours of the lines per (task, user), multiplied by sign """
+        logged_hours = defaultdict(float)
+        for line in self:
+            if line.task_id and line.user_id:
+                logged_hours[line.task_id.id, line.user_id.id] += sign * line.unit_amount
+        return logged_hours
+
 class ProjectTaskAllocation(models.Model):
     _name = 'project.task.allocation'
     _description = 'Allocation of Planned Hours per Employee for a Task'
@@ -966,6 +1174,17 @@ class ProjectTaskAllocation(models.Model):
         required=True,
         help="Maximum hours this employee is allowed to log for the task."
     )
+    logged_hours = fields.Float(
+        string="Logged Hours",
+        readonly=True,
+        copy=False,
+        help="Hours logged by this employee on the task, kept up to date by the timesheets."
+    )
+    remaining_hours = fields.Float(
+        string="Remaining Hours",
+        compute='_compute_remaining_hours',
+        help="Allocated hours this employee can still log on the task."
+    )
 
     _sql_constraints = [
         # Preventing duplicate assignment of an employee to a task
@@ -978,6 +1197,9 @@ class ProjectTaskAllocation(models.Model):
         # A_zeril_A, 2025-10-06: Two-way synchronization logic.
         # When an allocation is created in the tab, add the user to the main Assignees field.
         allocations = super().create(vals_list)
+        # The employee may have logged time on the task before being (re)allocated
+        allocations._recompute_logged_hours()
+        allocations.task_id._mark_hours_budget_dirty()
         if not self.env.context.get('syncing_from_user'):
             for allocation in allocations:
                 task = allocation.task_id
@@ -1003,14 +1225,67 @@ class ProjectTaskAllocation(models.Model):
                 
                 if not other_allocs and user_to_remove in task.user_ids:
                     task.with_context(syncing_from_allocation=True).write({'user_ids': [(3, user_to_remove.id)]})
+        self.task_id._mark_hours_budget_dirty()
         return super().unlink()
 
-    @api.constrains('allocated_hours')
-    def _check_allocated_hours(self):
-        for record in self:
-            total_allocated = sum(record.task_id.allocation_ids.mapped('allocated_hours'))
-            if total_allocated > record.task_id.planned_hours:
-                raise ValidationError(f"Total allocated hours cannot exceed the planned hours for this task!")
+    def write(self, vals):
+        if 'allocated_hours' in vals or 'task_id' in vals:
+            self.task_id._mark_hours_budget_dirty()
+        res = super().write(vals)
+        if 'task_id' in vals or 'employee_id' in vals:
+            self._recompute_logged_hours()
+        if 'allocated_hours' in vals or 'task_id' in vals:
+            self.task_id._mark_hours_budget_dirty()
+        return res
+
+    @api.depends('allocated_hours', 'logged_hours')
+    def _compute_remaining_hours(self):
+        for allocation in self:
+            allocation.remaining_hours = allocation.allocated_hours - allocation.logged_hours
+
+    def _recompute_logged_hours(self):
+        """ Sum the timesheets of the allocations into their logged hours """
+        if not self:
+            return
+        self.env['account.analytic.line'].flush_model(['task_id', 'user_id', 'unit_amount'])
+        self.flush_recordset(['task_id', 'employee_id'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE project_task_allocation allocation
+               SET logged_hours = COALESCE((
+                    SELECT SUM(line.unit_amount)
+                      FROM account_analytic_line line
+                     WHERE line.task_id = allocation.task_id
+                       AND line.user_id = allocation.employee_id
+                   ), 0)
+             WHERE allocation.id = ANY(%s)
+            """,
+            self.ids,
+        ))
+        self.invalidate_recordset(['logged_hours'])
+
+    @api.model
+    def _add_logged_hours(self, logged_hours):
+        """
+        Add the hours per (task_id, user_id) of logged_hours to the logged hours of
+        the matching allocations, in a single query. Hours of employees without
+        allocation are ignored: they are summed when the allocation is created.
+        """
+        deltas = [(task_id, user_id, hours) for (task_id, user_id), hours in logged_hours.items() if hours]
+        if not deltas:
+            return
+        self.flush_model(['task_id', 'employee_id', 'logged_hours'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE project_task_allocation allocation
+               SET logged_hours = COALESCE(allocation.logged_hours, 0) + delta.hours
+              FROM (VALUES %(deltas)s) AS delta(task_id, employee_id, hours)
+             WHERE allocation.task_id = delta.task_id
+               AND allocation.employee_id = delta.employee_id
+            """,
+            deltas=SQL(", ").join([SQL("(%s, %s, %s::float8)", *delta) for delta in deltas]),
+        ))
+        self.invalidate_model(['logged_hours'])
 
 
 class MailFollowers(models.Model):
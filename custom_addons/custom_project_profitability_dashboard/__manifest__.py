@@ -22,7 +22,13 @@ Key Features
 - Custom Security Groups: Restricts access to sensitive financial data via dedicated security groups, ensuring data privacy and compliance.
 - Enhanced User Interface: Customizes project kanban and update views for improved usability and clarity, including renaming and extending key actions.
 - Real-Time Reporting: All calculations and dashboards are updated in real time, providing project managers with up-to-date insights.
-- Contract Terms & Time Performance: Shows allocated hours, effective hours, and remaining hours in a dedicated section.
+- Dirty-Project Queue: Changes to timesheets, hourly costs, sale orders, extra costs and business trips enqueue the affected projects, which a cron recomputes; the project panel only reads the stored metrics.
+- Effective-Dated Cost Rates: Employee hourly costs are kept as a dated history and each timesheet is stamped with the rate effective on its date, so a raise does not rewrite past project costs.
+- Portfolio Endpoint: /profitability/portfolio returns the sorted, filtered and paginated profitability metrics of all projects with their totals, cached until the stored metrics change.
+- Sale Order Links: The sale orders of each project are resolved once into a stored, indexed link with manual additions and exclusions, reconciled when the sale links change and nightly.
+- Margin Simulation: simulate_profitability() returns the margins of the whole portfolio under what-if scenarios (facilities rate, hourly cost changes, travel multipliers) without writing anything.
+- Profitability Trend: A nightly cron snapshots the metrics of all projects, downsampling old daily snapshots to weekly ones, for graph and pivot trend reporting.
+- Contract Terms & Time Performance: Shows allocated hours, effective hours, and remaining hours in a dedicated section; sold, delivered and remaining hours are stored on the project for sorting and grouping.
 
 How It Works
 ------------
@@ -49,10 +55,10 @@ Odoo 18 Compatibility
     # Check https://github.com/odoo/odoo/blob/18.0/odoo/addons/base/data/ir_module_category_data.xml
     # for the full list
     'category': 'Project',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.9.0',
 
     # any module necessary for this one to work correctly
-    'depends': ['base', 'project', 'sale', 'sale_project', 'sale_timesheet', 'hr_timesheet', 'analytic', 'account', 'custom_business_trip_management'],
+    'depends': ['base', 'project', 'sale', 'sale_project', 'sale_timesheet', 'hr_timesheet', 'analytic', 'account', 'custom_business_trip_management', 'sale_extension_net_income'],
     
     'data': [
         'security/groups.xml',              
@@ -61,6 +67,10 @@ Odoo 18 Compatibility
         'views/custom_project_kanban_button_rename_inherit.xml', 
         'views/custom_project_update_view_rename_inherit.xml',                                                                 
         'views/custom_project_profitability_dashboard_views.xml',
+        'views/hr_employee_cost_rate_views.xml',
+        'views/project_profitability_snapshot_views.xml',
+        'views/res_config_settings_views.xml',
+        'data/project_profitability_cron.xml',
     ],
 
     'assets': {
@@ -79,4 +89,5 @@ Odoo 18 Compatibility
         'demo/demo.xml',
     ],
     'license': 'LGPL-3',
+    'post_init_hook': 'post_init_hook',
 }
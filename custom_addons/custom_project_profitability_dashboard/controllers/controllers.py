@@ -1,4 +1,18 @@
 # -*- coding: utf-8 -*-
 # Controllers for Custom Project Profitability Dashboard
-# Currently no custom controllers are defined.
-# This file is reserved for future HTTP endpoint extensions.
+
+from odoo import http
+from odoo.http import request
+
+
+class ProfitabilityPortfolioController(http.Controller):
+
+    @http.route('/profitability/portfolio', type='json', auth='user')
+    def portfolio(self, domain=None, search=None, order=None, offset=0, limit=80):
+        """
+        Return a page of the profitability metrics of all projects, with the
+        totals over the filtered portfolio. See Project.get_portfolio_profitability.
+        """
+        return request.env['project.project'].get_portfolio_profitability(
+            domain=domain, search=search, order=order, offset=offset, limit=limit,
+        )
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+
+def post_init_hook(env):
+    """
+    Seed the hourly cost rates from the employees and stamp the existing
+    timesheets, then resolve the sale orders of the existing projects and
+    enqueue them, as their metrics were computed before the orders were resolved.
+    """
+    env['hr.employee.cost.rate']._seed_from_employees()
+    projects = env['project.project'].with_context(active_test=False).search([])
+    projects._reconcile_sale_orders()
+    projects._mark_profitability_dirty()
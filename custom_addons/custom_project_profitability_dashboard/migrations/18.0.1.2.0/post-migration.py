@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run AFTER module update:
+    Seed hr.employee.cost.rate from the current employee hourly costs and
+    stamp the existing timesheet lines with their HR cost. The stamped
+    projects are enqueued for the recomputation of their metrics.
+    """
+    _logger.info("=== Running POST-migration script for version %s ===" % version)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['hr.employee.cost.rate']._seed_from_employees()
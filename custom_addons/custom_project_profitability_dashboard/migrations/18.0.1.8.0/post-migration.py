@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Run AFTER module update:
+    Resolve the sale orders of the existing projects into x_sale_order_ids,
+    with the same rules the profitability used to apply on every compute, then
+    enqueue them: the update computed their metrics while x_sale_order_ids was empty.
+    """
+    _logger.info("=== Running POST-migration script for version %s ===" % version)
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    projects = env['project.project'].with_context(active_test=False).search([])
+    projects._reconcile_sale_orders()
+    projects._mark_profitability_dirty()
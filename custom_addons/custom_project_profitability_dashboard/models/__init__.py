@@ -1,4 +1,16 @@
 # -*- coding: utf-8 -*-
 
 from . import project
+from . import project_task
+from . import project_profitability_queue
+from . import project_profitability_snapshot
+from . import project_profitability_simulation
+# The HR cost columns of the timesheets must exist before the HR costs view is created
+from . import account_analytic_line
+from . import hr_employee
+from . import hr_employee_cost_rate
 from . import custom_project_profitability_dashboard
+from . import sale_order
+from . import business_trip
+from . import res_company
+from . import res_config_settings
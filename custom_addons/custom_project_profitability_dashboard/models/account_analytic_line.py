@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class AccountAnalyticLine(models.Model):
+    """Stamp timesheets with their HR cost and enqueue the projects whose HR costs change"""
+    _inherit = 'account.analytic.line'
+
+    # Fields the project HR cost is computed from
+    _PROFITABILITY_FIELDS = {'project_id', 'employee_id', 'unit_amount', 'date'}
+    # Fields the stamped HR cost is computed from
+    _HR_COST_FIELDS = {'employee_id', 'unit_amount', 'date'}
+
+    x_hr_cost_rate = fields.Float(
+        string="HR Cost Rate",
+        readonly=True,
+        copy=False,
+        help="Hourly cost of the employee effective on the date of the line",
+    )
+    x_hr_cost_amount = fields.Monetary(
+        string="HR Cost",
+        readonly=True,
+        copy=False,
+        currency_field='currency_id',
+        help="Duration of the line times its HR cost rate",
+    )
+
+    @api.model
+    def _stamp_hr_cost(self, line_ids=None, employee_ids=None, date_from=None, date_to=None):
+        """
+        Stamp the matching lines with the employee rate effective on their date
+        (the earliest rate for lines logged before it, the employee hourly cost
+        without rate history) and enqueue the projects of the updated lines.
+        Lines without employee get no rate.
+        """
+        conditions = [SQL("TRUE")]
+        if line_ids is not None:
+            conditions.append(SQL("line.id = ANY(%s)", list(line_ids)))
+        if employee_ids is not None:
+            conditions.append(SQL("line.employee_id = ANY(%s)", list(employee_ids)))
+        if date_from:
+            conditions.append(SQL("line.date::date >= %s", date_from))
+        if date_to:
+            conditions.append(SQL("line.date::date < %s", date_to))
+
+        self.flush_model(['employee_id', 'unit_amount', 'date', 'project_id', 'x_hr_cost_rate', 'x_hr_cost_amount'])
+        self.env['hr.employee'].flush_model(['hourly_cost'])
+        self.env['hr.employee.cost.rate'].flush_model()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE account_analytic_line line
+               SET x_hr_cost_rate = stamp.rate,
+                   x_hr_cost_amount = COALESCE(line.unit_amount, 0) * COALESCE(stamp.rate, 0)
+              FROM (
+                    SELECT line.id,
+                           CASE WHEN line.employee_id IS NOT NULL
+                                THEN COALESCE(effective.hourly_cost, earliest.hourly_cost, employee.hourly_cost, 0)
+                            END AS rate
+                      FROM account_analytic_line line
+                 LEFT JOIN hr_employee employee ON employee.id = line.employee_id
+                 LEFT JOIN LATERAL (
+                            SELECT hourly_cost
+                              FROM hr_employee_cost_rate rate
+                             WHERE rate.employee_id = line.employee_id
+                               AND rate.date_from <= line.date::date
+                          ORDER BY rate.date_from DESC
+                             LIMIT 1
+                           ) effective ON TRUE
+                 LEFT JOIN LATERAL (
+                            SELECT hourly_cost
+                              FROM hr_employee_cost_rate rate
+                             WHERE rate.employee_id = line.employee_id
+                          ORDER BY rate.date_from
+                             LIMIT 1
+                           ) earliest ON TRUE
+                     WHERE %(conditions)s
+                   ) stamp
+             WHERE line.id = stamp.id
+               AND (line.x_hr_cost_rate IS DISTINCT FROM stamp.rate
+                    OR line.x_hr_cost_amount IS DISTINCT FROM COALESCE(line.unit_amount, 0) * COALESCE(stamp.rate, 0))
+         RETURNING line.project_id
+            """,
+            conditions=SQL(" AND ").join(conditions),
+        ))
+        project_ids = {row[0] for row in self.env.cr.fetchall() if row[0]}
+        self.invalidate_model(['x_hr_cost_rate', 'x_hr_cost_amount'])
+        self.env['project.profitability.queue']._enqueue(project_ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines._stamp_hr_cost(line_ids=lines.ids)
+        lines.project_id._mark_profitability_dirty()
+        return lines
+
+    def write(self, vals):
+        if not self._PROFITABILITY_FIELDS.intersection(vals):
+            return super().write(vals)
+        # Both the old and the new projects are affected
+        projects = self.project_id
+        res = super().write(vals)
+        if self._HR_COST_FIELDS.intersection(vals):
+            self._stamp_hr_cost(line_ids=self.ids)
+        (projects | self.project_id)._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self.project_id._mark_profitability_dirty()
+        return super().unlink()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+
+class BusinessTrip(models.Model):
+    """Enqueue the projects whose travel costs change with their business trips"""
+    _inherit = 'business.trip'
+
+    # Fields the project travel & lodging cost is computed from
+    _PROFITABILITY_FIELDS = {'trip_status', 'final_total_cost', 'sale_order_id', 'selected_project_id', 'business_trip_project_id'}
+
+    def _get_profitability_projects(self):
+        return self.selected_project_id | self.business_trip_project_id | self.sale_order_id._get_profitability_projects()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        trips = super().create(vals_list)
+        trips._get_profitability_projects()._mark_profitability_dirty()
+        return trips
+
+    def write(self, vals):
+        if not self._PROFITABILITY_FIELDS.intersection(vals):
+            return super().write(vals)
+        projects = self._get_profitability_projects()
+        res = super().write(vals)
+        (projects | self._get_profitability_projects())._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self._get_profitability_projects()._mark_profitability_dirty()
+        return super().unlink()
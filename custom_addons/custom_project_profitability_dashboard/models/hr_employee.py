@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class HrEmployee(models.Model):
+    """Record hourly cost changes as effective-dated cost rates"""
+    _inherit = 'hr.employee'
+
+    cost_rate_ids = fields.One2many('hr.employee.cost.rate', 'employee_id', string='Hourly Cost History',
+                                    groups='hr.group_hr_user')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        employees.filtered('hourly_cost')._set_cost_rate()
+        return employees
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'hourly_cost' in vals and not self.env.context.get('skip_cost_rate'):
+            self._set_cost_rate()
+        return res
+
+    def _set_cost_rate(self):
+        """
+        Make the current hourly cost effective from today (or the
+        ``cost_rate_date`` in context), leaving the cost of the timesheets
+        logged before unchanged.
+        """
+        date_from = self.env.context.get('cost_rate_date') or fields.Date.context_today(self)
+        CostRate = self.env['hr.employee.cost.rate'].sudo()
+        existing = CostRate.search([('employee_id', 'in', self.ids), ('date_from', '=', date_from)])
+        rate_per_employee = {rate.employee_id: rate for rate in existing}
+        new_rates = []
+        for employee in self:
+            if employee in rate_per_employee:
+                rate_per_employee[employee].hourly_cost = employee.hourly_cost
+            else:
+                new_rates.append({
+                    'employee_id': employee.id,
+                    'date_from': date_from,
+                    'hourly_cost': employee.hourly_cost,
+                })
+        CostRate.create(new_rates)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Effective-dated hourly cost rates of the employees.
+
+Each timesheet line is stamped with the rate effective on its date (see
+AccountAnalyticLine._stamp_hr_cost), so a raise only affects the lines
+logged from its effective date on, and project HR costs are a plain sum
+of the stamped amounts.
+"""
+
+from odoo import api, models, fields
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class HrEmployeeCostRate(models.Model):
+    _name = 'hr.employee.cost.rate'
+    _description = 'Employee Hourly Cost Rate'
+    _order = 'employee_id, date_from desc'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, ondelete='cascade', index=True)
+    date_from = fields.Date(string='Effective From', required=True, default=fields.Date.context_today)
+    company_id = fields.Many2one(related='employee_id.company_id', store=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', string='Currency')
+    hourly_cost = fields.Monetary(string='Hourly Cost', currency_field='currency_id', required=True)
+
+    _sql_constraints = [
+        ('employee_date_uniq', 'unique(employee_id, date_from)',
+         'An employee can only have one hourly cost rate per effective date.'),
+    ]
+
+    def _get_rate_dates(self):
+        """Return {employee: set of effective dates} of these rates"""
+        dates = {}
+        for rate in self:
+            dates.setdefault(rate.employee_id, set()).add(rate.date_from)
+        return dates
+
+    def _apply_rate_changes(self, changed_dates):
+        """
+        Re-stamp the timesheet lines whose rate changed because of rates
+        added, moved or removed on ``changed_dates`` ({employee: dates}), and
+        keep the employee hourly cost on the currently effective rate.
+        """
+        Line = self.env['account.analytic.line']
+        for employee, dates in changed_dates.items():
+            remaining = self.search([('employee_id', '=', employee.id)], order='date_from')
+            remaining_dates = remaining.mapped('date_from')
+            date_from = min(dates)
+            # The earliest rate also applies to the lines logged before it
+            if not remaining_dates or date_from <= remaining_dates[0]:
+                date_from = None
+            date_to = next((day for day in remaining_dates if day > max(dates)), None)
+            Line._stamp_hr_cost(employee_ids=employee.ids, date_from=date_from, date_to=date_to)
+
+            today = fields.Date.context_today(self)
+            current = remaining.filtered(lambda rate: rate.date_from <= today)[-1:] or remaining[:1]
+            if current and employee.hourly_cost != current.hourly_cost:
+                employee.with_context(skip_cost_rate=True).hourly_cost = current.hourly_cost
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rates = super().create(vals_list)
+        rates._apply_rate_changes(rates._get_rate_dates())
+        return rates
+
+    def write(self, vals):
+        if not {'employee_id', 'date_from', 'hourly_cost'}.intersection(vals):
+            return super().write(vals)
+        changed_dates = self._get_rate_dates()
+        res = super().write(vals)
+        for employee, dates in self._get_rate_dates().items():
+            changed_dates.setdefault(employee, set()).update(dates)
+        self._apply_rate_changes(changed_dates)
+        return res
+
+    def unlink(self):
+        changed_dates = self._get_rate_dates()
+        res = super().unlink()
+        self._apply_rate_changes({employee: dates for employee, dates in changed_dates.items() if employee.exists()})
+        return res
+
+    @api.model
+    def _seed_from_employees(self):
+        """Give the employees without rate history a rate equal to their current hourly cost"""
+        self.env['hr.employee'].flush_model(['hourly_cost'])
+        self.env.cr.execute("""
+            INSERT INTO hr_employee_cost_rate
+                        (employee_id, date_from, company_id, hourly_cost,
+                         create_uid, create_date, write_uid, write_date)
+                 SELECT employee.id, CURRENT_DATE, employee.company_id, employee.hourly_cost,
+                        %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+                   FROM hr_employee employee
+                  WHERE COALESCE(employee.hourly_cost, 0) != 0
+                    AND NOT EXISTS (SELECT 1 FROM hr_employee_cost_rate rate WHERE rate.employee_id = employee.id)
+        """, {'uid': self.env.uid})
+        _logger.info("Seeded the hourly cost rates of %s employees", self.env.cr.rowcount)
+        self.env['account.analytic.line']._stamp_hr_cost()
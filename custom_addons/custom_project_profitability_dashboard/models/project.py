@@ -16,13 +16,52 @@ Odoo 18 Compatibility:
 """
 
 from odoo import api, models, fields
-from odoo.tools import format_amount
+from odoo.exceptions import AccessError, UserError
+from odoo.tools import format_amount, SQL
+from odoo.tools.lru import LRU
 from odoo.tools.misc import formatLang
+from collections import defaultdict
+import copy
 import json
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Stored fields computed by Project._compute_profitability_metrics
+PROFITABILITY_FIELDS = [
+    'x_net_value', 'x_total_hr_cost', 'x_facilities_cost', 'x_travel_lodging',
+    'x_other_costs', 'x_final_margin', 'x_total_taxes', 'x_hr_cost_warning',
+    'x_sold_hours', 'x_delivered_hours', 'x_remaining_hours', 'x_profitability_date',
+]
+
+# Monetary metrics returned by Project.get_portfolio_profitability, in display order
+PORTFOLIO_FIELDS = [
+    'x_net_value', 'x_total_hr_cost', 'x_facilities_cost', 'x_travel_lodging',
+    'x_other_costs', 'x_final_margin', 'x_total_taxes',
+]
+
+# Contract Terms totals returned by Project.get_portfolio_profitability
+SOLD_HOURS_FIELDS = ['x_sold_hours', 'x_delivered_hours', 'x_remaining_hours']
+
+# Portfolio pages kept in memory per worker, evicted least recently used first
+# (LRU is thread-safe, as threaded workers share it)
+PORTFOLIO_CACHE_SIZE = 256
+_portfolio_cache = LRU(PORTFOLIO_CACHE_SIZE)
+
+# Project panel payloads kept in memory per worker, evicted least recently used first
+# (LRU is thread-safe, as threaded workers share it)
+PANEL_DATA_CACHE_SIZE = 512
+_panel_data_cache = LRU(PANEL_DATA_CACHE_SIZE)
+
+# Business trip states whose final cost counts as project travel & lodging
+TRAVEL_COST_TRIP_STATES = [
+    'organization_done',         # Organization Completed
+    'in_progress',               # Travel in Progress
+    'completed_waiting_expense', # Awaiting Travel Expenses
+    'expense_submitted',         # Expenses Under Review
+    'completed',                 # TRAVEL PROCESS COMPLETED
+]
+
 
 class Project(models.Model):
     _inherit = 'project.project'
@@ -79,50 +118,91 @@ class Project(models.Model):
         store=True, 
         string="HR Cost Warning"
     )
+    x_sold_hours = fields.Float(
+        compute='_compute_profitability_metrics', 
+        store=True, 
+        string="Sold Hours",
+        help="Time sold on the service lines of the project sale orders, in the timesheet encoding unit"
+    )
+    x_delivered_hours = fields.Float(
+        compute='_compute_profitability_metrics', 
+        store=True, 
+        string="Delivered Hours",
+        help="Time delivered on the service lines of the project sale orders, in the timesheet encoding unit"
+    )
+    x_remaining_hours = fields.Float(
+        compute='_compute_profitability_metrics', 
+        store=True, 
+        string="Remaining Sold Hours"
+    )
+    x_sale_order_ids = fields.Many2many(
+        'sale.order',
+        'project_profitability_sale_order_rel', 'project_id', 'order_id',
+        string="Profitability Sale Orders",
+        readonly=True,
+        copy=False,
+        help="Sale orders the profitability of the project is computed from, "
+             "resolved by _reconcile_sale_orders() from the sale links and the manual overrides"
+    )
+    x_sale_order_include_ids = fields.Many2many(
+        'sale.order',
+        'project_profitability_sale_order_include_rel', 'project_id', 'order_id',
+        string="Additional Sale Orders",
+        copy=False,
+        help="Sale orders always counted in the profitability of the project"
+    )
+    x_sale_order_exclude_ids = fields.Many2many(
+        'sale.order',
+        'project_profitability_sale_order_exclude_rel', 'project_id', 'order_id',
+        string="Excluded Sale Orders",
+        copy=False,
+        help="Sale orders never counted in the profitability of the project"
+    )
+    x_profitability_date = fields.Datetime(
+        compute='_compute_profitability_metrics', 
+        store=True, 
+        index=True,
+        string="Profitability Computed On"
+    )
 
-    @api.depends(
-        'timesheet_ids.unit_amount',
-        'timesheet_ids.employee_id.hourly_cost',
-        'sale_order_id.order_line', 
-        'sale_order_id.custom_total_net_sum',
-        'sale_order_id.business_trip_ids.final_total_cost'
-    )    
+    # Changes to timesheets, hourly costs, sale orders and business trips do not
+    # trigger this compute directly: they enqueue the affected projects in
+    # project.profitability.queue, which recomputes them in a cron.
+    @api.depends()
     def _compute_profitability_metrics(self):
         """
         Computes all profitability metrics and stores them.
-        This method is triggered when the underlying analytic lines (timesheets, invoice lines) change.
+        This method is triggered by _recompute_profitability_metrics() for the dirty projects.
+
+        The metrics of the whole recordset are computed in one pass: sale orders
+        (from the stored x_sale_order_ids links), HR costs, extra costs and travel
+        costs are each read with a single grouped query, whatever the number of projects.
         """
+        project_ids = [project_id for project_id in self.ids if isinstance(project_id, int)]
+        order_ids_per_project = self._get_sale_order_ids_per_project(project_ids)
+        order_ids = list({order_id for ids in order_ids_per_project.values() for order_id in ids})
+        order_amounts = self._get_sale_order_amounts(order_ids)
+        hr_costs = self._get_hr_costs_per_project(project_ids)
+        travel_costs = self._get_travel_costs_per_project(project_ids)
+        sold_quantities = self._get_sold_quantities_per_order(order_ids)
+        default_encode_uom = self.env.company.timesheet_encode_uom_id
+        time_uom_factors = self._get_time_uom_factors(
+            self.company_id.timesheet_encode_uom_id | default_encode_uom,
+            {uom_id for quantities in sold_quantities.values() for uom_id, *__ in quantities},
+        )
+
+        now = fields.Datetime.now()
         for project in self:
-            sale_orders = project._get_sale_orders()
-            
-            # --- HR Cost Calculation (Self-Contained Logic) ---
-            timesheet_data = self.env['account.analytic.line'].read_group(
-                [('project_id', '=', project.id), ('employee_id', '!=', False)],
-                ['unit_amount:sum', 'employee_id'],
-                ['employee_id'],
-                lazy=False
-            )
-            total_hr_cost = 0.0
-            employees_without_cost = []
-            
-            if timesheet_data:
-                employee_ids = [d['employee_id'][0] for d in timesheet_data]
-                # In Odoo 16+, 'timesheet_cost' was renamed to 'hourly_cost'
-                employee_costs = {emp.id: emp.hourly_cost for emp in self.env['hr.employee'].browse(employee_ids)}
-                for line in timesheet_data:
-                    employee_id = line['employee_id'][0]
-                    employee_name = line['employee_id'][1]
-                    hours = line['unit_amount']
-                    rate = employee_costs.get(employee_id, 0)
-                    if not rate:
-                        employees_without_cost.append(str(employee_name))
-                    total_hr_cost += hours * rate
-            
+            sale_order_ids = order_ids_per_project.get(project.id, ())
+            project.x_profitability_date = now
+
+            # --- HR Cost Calculation ---
+            total_hr_cost, employees_without_cost = hr_costs.get(project.id, (0.0, []))
             project.x_total_hr_cost = total_hr_cost
-            
+
             # Set warning message for employees without timesheet cost
             if employees_without_cost:
-                unique_names = sorted(list(set(employees_without_cost)))
+                unique_names = sorted(set(employees_without_cost))
                 project.x_hr_cost_warning = """
 The following employees have zero hourly rates, which may affect the accuracy of HR cost calculations:
 
@@ -132,62 +212,431 @@ Please verify and update their timesheet costs in the HR module to ensure accura
                 """.strip() % "\n• ".join(unique_names)
             else:
                 project.x_hr_cost_warning = False
-            
+
             # --- Other Metrics Calculation ---
-            # Facilities cost is 15% of HR cost (hardcoded value, consider making configurable)
-            project.x_facilities_cost = total_hr_cost * 0.15
+            # Facilities cost is a share of HR cost, configured per company (15% by default)
+            project.x_facilities_cost = total_hr_cost * (project.company_id or self.env.company).facilities_cost_rate
 
-            project.x_net_value = sum(order.amount_untaxed for order in sale_orders)
-            project.x_total_taxes = sum(order.amount_tax for order in sale_orders)
-            project.x_other_costs = sum(order.custom_total_net_sum for order in sale_orders if hasattr(order, 'custom_total_net_sum'))
-            
-            # Travel & Lodging (safe check for business trip module)
-            travel_lodging = 0.0
-            if 'business.trip' in self.env:
-                try:
-                    # Define the states for which costs should be included
-                    valid_trip_states = [
-                        'organization_done',         # Organization Completed
-                        'in_progress',               # Travel in Progress
-                        'completed_waiting_expense', # Awaiting Travel Expenses
-                        'expense_submitted',         # Expenses Under Review
-                        'completed'                  # TRAVEL PROCESS COMPLETED
-                    ]
-                    
-                    # Build search domain to find all business trips related to this project
-                    trip_domain = [
-                        ('trip_status', 'in', valid_trip_states),
-                        '|', '|',
-                        # Trips linked via sale orders
-                        ('sale_order_id', 'in', sale_orders.ids if sale_orders else []),
-                        # Standalone trips linked directly to this project
-                        ('selected_project_id', '=', project.id),
-                        # Trips where project was created for business trip
-                        ('business_trip_project_id', '=', project.id),
-                    ]
-                    
-                    related_trips = self.env['business.trip'].search(trip_domain)
-                    
-                    # Sum the final_total_cost from the retrieved trips
-                    travel_lodging = sum(related_trips.mapped('final_total_cost'))
-
-                except Exception as e:
-                    _logger.warning("Error calculating travel/lodging costs for project %s: %s", project.id, e)
-                    travel_lodging = 0.0
-            project.x_travel_lodging = travel_lodging
+            project.x_net_value = sum(order_amounts[order_id][0] for order_id in sale_order_ids)
+            project.x_total_taxes = sum(order_amounts[order_id][1] for order_id in sale_order_ids)
+            project.x_other_costs = sum(order_amounts[order_id][2] for order_id in sale_order_ids)
+            project.x_travel_lodging = travel_costs.get(project.id, 0.0)
+
+            # --- Contract Terms (sold items) ---
+            sold = delivered = 0.0
+            encode_uom = project.company_id.timesheet_encode_uom_id or default_encode_uom
+            factors = time_uom_factors.get(encode_uom.id, {})
+            for order_id in sale_order_ids:
+                for uom_id, counts_as_time, product_uom_qty, qty_delivered in sold_quantities.get(order_id, ()):
+                    factor, same_category = factors.get(uom_id, (1.0, False))
+                    if same_category or counts_as_time:
+                        sold += product_uom_qty * factor
+                        delivered += qty_delivered * factor
+            project.x_sold_hours = sold
+            project.x_delivered_hours = delivered
+            project.x_remaining_hours = sold - delivered
 
             project.x_final_margin = (
                 project.x_net_value - 
                 (project.x_total_hr_cost + project.x_facilities_cost + project.x_travel_lodging + project.x_other_costs)
             )
 
+    @api.model
+    def _get_sale_order_ids_per_project(self, project_ids):
+        """Return {project_id: [sale_order_id]} from the resolved links stored in x_sale_order_ids"""
+        if not project_ids:
+            return {}
+        self.env['project.project'].flush_model(['x_sale_order_ids'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT project_id, order_id
+              FROM project_profitability_sale_order_rel
+             WHERE project_id = ANY(%(project_ids)s)
+            """,
+            project_ids=project_ids,
+        ))
+        order_ids_per_project = defaultdict(list)
+        for project_id, order_id in self.env.cr.fetchall():
+            order_ids_per_project[project_id].append(order_id)
+        return order_ids_per_project
+
+    @api.model
+    def _resolve_sale_order_ids_per_project(self, project_ids):
+        """
+        Return {project_id: [sale_order_id]} following the same links as
+        _get_sale_orders() used to: the project and task sale lines, the
+        lines that generated the project, the milestone sale lines, the
+        employee/sale line mappings, the sale lines of the timesheets and,
+        for projects without any of those, the order named like the project.
+        """
+        if not project_ids:
+            return {}
+        self.env['project.project'].flush_model(['sale_line_id', 'name'])
+        self.env['project.task'].flush_model(['project_id', 'sale_line_id'])
+        self.env['sale.order.line'].flush_model(['order_id', 'project_id'])
+        self.env['project.milestone'].flush_model(['project_id', 'sale_line_id'])
+        self.env['project.sale.line.employee.map'].flush_model(['project_id', 'sale_line_id'])
+        self.env['account.analytic.line'].flush_model(['project_id', 'so_line'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT project.id, line.order_id
+              FROM project_project project
+              JOIN sale_order_line line ON line.id = project.sale_line_id
+             WHERE project.id = ANY(%(project_ids)s)
+             UNION
+            SELECT line.project_id, line.order_id
+              FROM sale_order_line line
+             WHERE line.project_id = ANY(%(project_ids)s)
+             UNION
+            SELECT task.project_id, line.order_id
+              FROM project_task task
+              JOIN sale_order_line line ON line.id = task.sale_line_id
+             WHERE task.project_id = ANY(%(project_ids)s)
+             UNION
+            SELECT milestone.project_id, line.order_id
+              FROM project_milestone milestone
+              JOIN sale_order_line line ON line.id = milestone.sale_line_id
+             WHERE milestone.project_id = ANY(%(project_ids)s)
+             UNION
+            SELECT mapping.project_id, line.order_id
+              FROM project_sale_line_employee_map mapping
+              JOIN sale_order_line line ON line.id = mapping.sale_line_id
+             WHERE mapping.project_id = ANY(%(project_ids)s)
+             UNION
+            SELECT timesheet.project_id, line.order_id
+              FROM account_analytic_line timesheet
+              JOIN sale_order_line line ON line.id = timesheet.so_line
+             WHERE timesheet.project_id = ANY(%(project_ids)s)
+            """,
+            project_ids=project_ids,
+        ))
+        order_ids_per_project = defaultdict(list)
+        for project_id, order_id in self.env.cr.fetchall():
+            order_ids_per_project[project_id].append(order_id)
+
+        # Fallback: the most recent sale order named like the project
+        unlinked = self.browse([project_id for project_id in project_ids if project_id not in order_ids_per_project])
+        names = {project.name for project in unlinked if project.name}
+        if names:
+            order_per_name = {}
+            for order in self.env['sale.order'].search([('name', 'in', list(names))]):
+                order_per_name.setdefault(order.name, order.id)
+            for project in unlinked:
+                if project.name in order_per_name:
+                    order_ids_per_project[project.id].append(order_per_name[project.name])
+        return order_ids_per_project
+
+    @api.model
+    def _get_sale_order_amounts(self, order_ids):
+        """Return {sale_order_id: (untaxed amount, taxes, extra costs)}"""
+        if not order_ids:
+            return {}
+        self.env['sale.order'].flush_model(['amount_untaxed', 'amount_tax'])
+        self.env['custom.sale.order'].flush_model(['sale_order_id', 'service_price'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT sale_order.id,
+                   COALESCE(sale_order.amount_untaxed, 0),
+                   COALESCE(sale_order.amount_tax, 0),
+                   COALESCE(extra.total, 0)
+              FROM sale_order
+         LEFT JOIN (
+                    SELECT sale_order_id, SUM(service_price) AS total
+                      FROM custom_sale_order
+                     WHERE sale_order_id = ANY(%(order_ids)s)
+                  GROUP BY sale_order_id
+                   ) extra ON extra.sale_order_id = sale_order.id
+             WHERE sale_order.id = ANY(%(order_ids)s)
+            """,
+            order_ids=order_ids,
+        ))
+        return {
+            order_id: (float(untaxed), float(tax), float(extra))
+            for order_id, untaxed, tax, extra in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _get_sold_quantities_per_order(self, order_ids):
+        """
+        Return {sale_order_id: [(uom_id, counts_as_time, sold qty, delivered qty)]},
+        the service line quantities of the orders summed per unit of measure.
+        ``counts_as_time`` tells whether lines sold in units count in the
+        Contract Terms totals (their product is not delivered manually).
+        """
+        if not order_ids:
+            return {}
+        self.env['sale.order.line'].flush_model([
+            'order_id', 'product_id', 'product_uom', 'product_uom_qty', 'qty_delivered', 'is_service', 'is_downpayment',
+        ])
+        self.env.cr.execute(SQL(
+            """
+            SELECT order_id, product_uom, product_id, SUM(product_uom_qty), SUM(qty_delivered)
+              FROM sale_order_line
+             WHERE order_id = ANY(%(order_ids)s)
+               AND is_service
+               AND NOT COALESCE(is_downpayment, FALSE)
+          GROUP BY order_id, product_uom, product_id
+            """,
+            order_ids=order_ids,
+        ))
+        rows = self.env.cr.fetchall()
+        product_uom_unit = self.env.ref('uom.product_uom_unit', raise_if_not_found=False)
+        products = self.env['product.product'].browse({row[2] for row in rows if row[2]})
+        manual_products = set(products.filtered(
+            lambda product: getattr(product, 'service_policy', False) == 'delivered_manual'
+        ).ids)
+        quantities = defaultdict(list)
+        for order_id, uom_id, product_id, product_uom_qty, qty_delivered in rows:
+            counts_as_time = bool(product_uom_unit) and uom_id == product_uom_unit.id and product_id not in manual_products
+            quantities[order_id].append((uom_id, counts_as_time, float(product_uom_qty or 0.0), float(qty_delivered or 0.0)))
+        return quantities
+
+    @api.model
+    def _get_time_uom_factors(self, encode_uoms, uom_ids):
+        """
+        Return {encode_uom_id: {uom_id: (factor, same_category)}}: the factor
+        converting quantities in each unit of measure to each timesheet
+        encoding unit. Units are converted as hours, and units of another
+        category are kept as is, like UoM._compute_quantity(raise_if_failure=False).
+        """
+        product_uom_unit = self.env.ref('uom.product_uom_unit', raise_if_not_found=False)
+        product_uom_hour = self.env.ref('uom.product_uom_hour', raise_if_not_found=False)
+        uoms = self.env['uom.uom'].browse(uom_ids)
+        factors = {}
+        for encode_uom in encode_uoms:
+            factors[encode_uom.id] = encode_factors = {}
+            for uom in uoms:
+                convert_uom = product_uom_hour if product_uom_unit and uom == product_uom_unit else uom
+                if convert_uom and convert_uom.category_id == encode_uom.category_id:
+                    factor = convert_uom._compute_quantity(1.0, encode_uom, round=False)
+                else:
+                    factor = 1.0
+                encode_factors[uom.id] = (factor, uom.category_id == encode_uom.category_id)
+        return factors
+
+    @api.model
+    def _get_hr_costs_per_project(self, project_ids):
+        """
+        Return {project_id: (hr cost, [names of the employees without hourly cost])}
+        from the HR cost stamped on the timesheet lines of each project.
+        """
+        if not project_ids:
+            return {}
+        self.env['account.analytic.line'].flush_model(['project_id', 'employee_id', 'x_hr_cost_rate', 'x_hr_cost_amount'])
+        self.env['hr.employee'].flush_model(['name'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT line.project_id,
+                   SUM(line.x_hr_cost_amount),
+                   ARRAY_AGG(DISTINCT employee.name) FILTER (WHERE COALESCE(line.x_hr_cost_rate, 0) = 0)
+              FROM account_analytic_line line
+              JOIN hr_employee employee ON employee.id = line.employee_id
+             WHERE line.project_id = ANY(%(project_ids)s)
+          GROUP BY line.project_id
+            """,
+            project_ids=project_ids,
+        ))
+        return {
+            project_id: (float(total or 0.0), [str(name) for name in names or []])
+            for project_id, total, names in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _get_travel_costs_per_project(self, project_ids):
+        """
+        Return {project_id: travel & lodging cost}: the final cost of the business
+        trips linked to the project, directly or through its resolved sale orders.
+        """
+        if not project_ids or 'business.trip' not in self.env:
+            return {}
+        self.env['project.project'].flush_model(['x_sale_order_ids'])
+        self.env['business.trip'].flush_model([
+            'trip_status', 'final_total_cost', 'sale_order_id', 'selected_project_id', 'business_trip_project_id',
+        ])
+        # UNION keeps each trip once per project, whatever the number of links
+        self.env.cr.execute(SQL(
+            """
+            WITH project_trip AS (
+                SELECT project_order.project_id, trip.id AS trip_id
+                  FROM project_profitability_sale_order_rel project_order
+                  JOIN business_trip trip ON trip.sale_order_id = project_order.order_id
+                 WHERE project_order.project_id = ANY(%(project_ids)s)
+                 UNION
+                SELECT trip.selected_project_id, trip.id
+                  FROM business_trip trip
+                 WHERE trip.selected_project_id = ANY(%(project_ids)s)
+                 UNION
+                SELECT trip.business_trip_project_id, trip.id
+                  FROM business_trip trip
+                 WHERE trip.business_trip_project_id = ANY(%(project_ids)s)
+            )
+            SELECT project_trip.project_id, SUM(COALESCE(trip.final_total_cost, 0))
+              FROM project_trip
+              JOIN business_trip trip ON trip.id = project_trip.trip_id
+             WHERE trip.trip_status = ANY(%(trip_states)s)
+          GROUP BY project_trip.project_id
+            """,
+            project_ids=project_ids,
+            trip_states=TRAVEL_COST_TRIP_STATES,
+        ))
+        return {project_id: float(total) for project_id, total in self.env.cr.fetchall()}
+
+    def _reconcile_sale_orders(self):
+        """
+        Store in x_sale_order_ids the sale orders resolved from the sale links
+        of these projects, plus their additional orders, minus their excluded
+        ones. Return the projects whose orders changed.
+        """
+        projects = self.with_context(active_test=False).exists()
+        resolved = projects._resolve_sale_order_ids_per_project(projects.ids)
+        changed = self.browse()
+        for project in projects:
+            order_ids = (set(resolved.get(project.id, ())) | set(project.x_sale_order_include_ids.ids)) \
+                - set(project.x_sale_order_exclude_ids.ids)
+            if order_ids != set(project.x_sale_order_ids.ids):
+                project.sudo().x_sale_order_ids = [fields.Command.set(list(order_ids))]
+                changed |= project
+        return changed
+
+    @api.model
+    def _cron_reconcile_sale_orders(self, batch_size=1000):
+        """Reconcile the sale orders of all projects, enqueueing the projects whose orders changed"""
+        project_ids = self.with_context(active_test=False).search([]).ids
+        for index in range(0, len(project_ids), batch_size):
+            projects = self.browse(project_ids[index:index + batch_size])
+            projects._reconcile_sale_orders()._mark_profitability_dirty()
+            self.env.cr.commit()
+            self.invalidate_model()
+
+    def _recompute_profitability_metrics(self):
+        """Reconcile the sale orders, then recompute and store the profitability metrics of these projects"""
+        self._reconcile_sale_orders()
+        for fname in PROFITABILITY_FIELDS:
+            self.env.add_to_compute(self._fields[fname], self)
+        self.flush_recordset(PROFITABILITY_FIELDS)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        projects = super().create(vals_list)
+        # Resolve the sale orders of the new projects
+        projects._mark_profitability_dirty()
+        return projects
+
+    def write(self, vals):
+        res = super().write(vals)
+        # The name, the sale line and the overrides decide which sale orders the project is
+        # linked to; archiving and moving projects change the portfolio (see _get_portfolio_version)
+        if {'name', 'sale_line_id', 'x_sale_order_include_ids', 'x_sale_order_exclude_ids',
+                'active', 'company_id'}.intersection(vals):
+            self._mark_profitability_dirty()
+        return res
+
+    def _mark_profitability_dirty(self):
+        """Enqueue these projects for the recomputation of their profitability metrics"""
+        self.env['project.profitability.queue']._enqueue(self.ids)
+
+    @api.model
+    def _get_portfolio_version(self):
+        """
+        Return a stamp that changes whenever a project is recomputed, created or
+        deleted, so that cached portfolio pages never outlive the stored metrics.
+        """
+        self.flush_model(['x_profitability_date'])
+        self.env.cr.execute("SELECT MAX(x_profitability_date), COUNT(*) FROM project_project")
+        return tuple(self.env.cr.fetchone())
+
+    @api.model
+    def get_portfolio_profitability(self, domain=None, search=None, order=None, offset=0, limit=80):
+        """
+        Return the stored profitability metrics of a page of projects, with the
+        number of matching projects and the totals over all of them, read in a
+        single SQL aggregation:
+
+            {
+                'count': 1000,
+                'totals': {'x_net_value': 0.0, ...},
+                'records': [{'id': 1, 'name': 'Project', 'company_id': 1,
+                             'currency_id': 1, 'x_net_value': 0.0, ...}],
+            }
+
+        The records and totals also hold the Contract Terms hours (SOLD_HOURS_FIELDS).
+        ``order`` is one of these metrics or 'name', optionally followed by
+        'asc' or 'desc'. Pages are cached per user, companies and filter until
+        the stored metrics change.
+        """
+        metrics = PORTFOLIO_FIELDS + SOLD_HOURS_FIELDS
+        if not self.env.user.has_group('custom_project_profitability_dashboard.group_custom_profitability_access'):
+            raise AccessError(self.env._("You are not allowed to access the project profitability data."))
+
+        order = (order or 'x_final_margin asc').strip()
+        order_field, __, direction = order.partition(' ')
+        direction = direction.strip().lower() or 'asc'
+        if order_field not in metrics + ['name'] or direction not in ('asc', 'desc'):
+            raise UserError(self.env._("Invalid portfolio order: %s", order))
+        offset = max(int(offset or 0), 0)
+        limit = min(max(int(limit or 80), 1), 1000)
+
+        domain = list(domain or [])
+        if search:
+            domain.append(('name', 'ilike', search))
+
+        key = (
+            self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids), repr(domain),
+            order_field, direction, offset, limit, self._get_portfolio_version(),
+        )
+        result = _portfolio_cache.get(key)
+        if result is not None:
+            return copy.deepcopy(result)
+
+        query = self._search(domain, offset=offset, limit=limit, order=f'{order_field} {direction}, id')
+        self.env.cr.execute(query.select(
+            SQL.identifier(self._table, 'id'),
+            SQL("%s AS name", self._field_to_sql(self._table, 'name', query)),
+            SQL.identifier(self._table, 'company_id'),
+            SQL("COUNT(*) OVER ()"),
+            *[SQL("COALESCE(%s, 0)", SQL.identifier(self._table, fname)) for fname in metrics],
+            *[SQL("COALESCE(SUM(%s) OVER (), 0)", SQL.identifier(self._table, fname)) for fname in metrics],
+        ))
+        rows = self.env.cr.fetchall()
+        if not rows and offset:
+            # The window functions are empty past the last page
+            [(count, *sums)] = self._read_group(domain, aggregates=['__count', *(f'{fname}:sum' for fname in metrics)])
+            totals = {fname: float(value or 0.0) for fname, value in zip(metrics, sums)}
+        else:
+            count = rows[0][3] if rows else 0
+            size = len(metrics)
+            totals = {
+                fname: float(value)
+                for fname, value in zip(metrics, rows[0][4 + size:] if rows else [0.0] * size)
+            }
+        currency_per_company = {
+            company.id: company.currency_id.id
+            for company in self.env['res.company'].browse({row[2] for row in rows if row[2]})
+        }
+        result = {
+            'count': count,
+            'totals': totals,
+            'records': [
+                dict(
+                    {
+                        'id': row[0],
+                        'name': row[1],
+                        'company_id': row[2],
+                        'currency_id': currency_per_company.get(row[2], self.env.company.currency_id.id),
+                    },
+                    **{fname: float(value) for fname, value in zip(metrics, row[4:4 + len(metrics)])}
+                )
+                for row in rows
+            ],
+        }
+        _portfolio_cache[key] = result
+        return copy.deepcopy(result)
+
     def action_open_payment_report(self):
         """
         Open a popup window showing the Summary of HR Costs report for the current project.
         """
         self.ensure_one()
-        # Generate or refresh report lines for this project
-        self.env['custom.project.profitability.dashboard'].generate_report_lines(self.id)
         return {
             'name': 'Summary of HR Costs',
             'type': 'ir.actions.act_window',
@@ -195,7 +644,7 @@ Please verify and update their timesheet costs in the HR module to ensure accura
             'view_mode': 'list',
             'target': 'new',
             'domain': [('project_id', '=', self.id)],
-            'context': {'default_project_id': self.id},
+            'context': {'default_project_id': self.id, 'create': False},
         }
 
     def _get_profitability_labels(self):
@@ -239,9 +688,6 @@ Please verify and update their timesheet costs in the HR module to ensure accura
         """
         profitability_items = super()._get_profitability_items(with_action)
         
-        # Force recomputation to ensure fresh values
-        self._compute_profitability_metrics()
-        
         sequence = self._get_profitability_sequence_per_invoice_type()
         
         # Add HR Costs to costs section
@@ -313,20 +759,24 @@ Please verify and update their timesheet costs in the HR module to ensure accura
         Get sold items data for Contract Terms section.
         Ported from Odoo 15 sale_timesheet module.
         Returns data structure for displaying WP items with hours.
+
+        The totals are the stored x_sold_hours / x_delivered_hours /
+        x_remaining_hours; the lines are converted with the same UoM factor map.
         """
-        timesheet_encode_uom = self.env.company.timesheet_encode_uom_id
+        timesheet_encode_uom = self.company_id.timesheet_encode_uom_id or self.env.company.timesheet_encode_uom_id
         product_uom_unit = self.env.ref('uom.product_uom_unit', raise_if_not_found=False)
         product_uom_hour = self.env.ref('uom.product_uom_hour', raise_if_not_found=False)
 
         sols = self._get_sale_order_lines()
         number_sale_orders = len(sols.order_id)
+        factors = self._get_time_uom_factors(timesheet_encode_uom, set(sols.product_uom.ids)).get(timesheet_encode_uom.id, {})
         
         sold_items = {
             'allow_billable': self.allow_billable if hasattr(self, 'allow_billable') else True,
             'data': [],
             'number_sols': len(sols),
-            'total_sold': 0,
-            'effective_sold': 0,
+            'total_sold': self.x_sold_hours,
+            'effective_sold': self.x_delivered_hours,
             'company_unit_name': timesheet_encode_uom.name if timesheet_encode_uom else 'Hours'
         }
 
@@ -342,23 +792,11 @@ Please verify and update their timesheet costs in the HR module to ensure accura
                 product_uom_convert = product_uom_hour
 
             # Calculate quantities
-            qty_delivered = 0.0
-            product_uom_qty = 0.0
-            
-            if product_uom_convert and timesheet_encode_uom:
-                try:
-                    qty_delivered = product_uom_convert._compute_quantity(
-                        sol.qty_delivered, timesheet_encode_uom, raise_if_failure=False
-                    ) or 0.0
-                    product_uom_qty = product_uom_convert._compute_quantity(
-                        sol.product_uom_qty, timesheet_encode_uom, raise_if_failure=False
-                    ) or 0.0
-                except Exception:
-                    qty_delivered = sol.qty_delivered or 0.0
-                    product_uom_qty = sol.product_uom_qty or 0.0
-
-                if product_uom_convert.category_id == timesheet_encode_uom.category_id:
-                    product_uom_convert = timesheet_encode_uom
+            factor, same_category = factors.get(sol.product_uom.id, (1.0, False))
+            qty_delivered = (sol.qty_delivered or 0.0) * factor
+            product_uom_qty = (sol.product_uom_qty or 0.0) * factor
+            if timesheet_encode_uom and product_uom_convert.category_id == timesheet_encode_uom.category_id:
+                product_uom_convert = timesheet_encode_uom
 
             if qty_delivered > 0 or product_uom_qty > 0:
                 uom_name = product_uom_convert.name if product_uom_convert else 'Hours'
@@ -371,17 +809,8 @@ Please verify and update their timesheet costs in the HR module to ensure accura
                     ),
                     'color': 'red' if qty_delivered > product_uom_qty else 'black'
                 })
-                
-                # Sum totals for time-based products
-                if timesheet_encode_uom and product_uom_unit:
-                    if (sol.product_uom.category_id == timesheet_encode_uom.category_id or 
-                        (sol.product_uom == product_uom_unit and 
-                         hasattr(sol.product_id, 'service_policy') and 
-                         sol.product_id.service_policy != 'delivered_manual')):
-                        sold_items['total_sold'] += product_uom_qty
-                        sold_items['effective_sold'] += qty_delivered
-
-        remaining = sold_items['total_sold'] - sold_items['effective_sold']
+
+        remaining = self.x_remaining_hours
         sold_items['remaining'] = {
             'value': remaining,
             'color': 'red' if remaining < 0 else 'black',
@@ -401,9 +830,6 @@ Please verify and update their timesheet costs in the HR module to ensure accura
         currency = self.company_id.currency_id
         items = []
         
-        # Force recomputation
-        self._compute_profitability_metrics()
-        
         # Untaxed Amount
         items.append({
             'name': 'Untaxed Amount',
@@ -455,19 +881,105 @@ Please verify and update their timesheet costs in the HR module to ensure accura
         
         return items
 
+    def _get_panel_data_version(self):
+        """
+        Return a stamp that changes whenever the panel data of the project may
+        change: the project itself, its stored metrics (recomputed on the
+        same triggers as the dirty-project queue, including the sale lines
+        behind the Contract Terms), its tasks, timesheets and milestones, the
+        lines of its sale orders, and the invoices and vendor bills posted on
+        its analytic account.
+        """
+        self.ensure_one()
+        self.flush_recordset(['write_date', 'x_profitability_date', 'account_id', 'x_sale_order_ids'])
+        self.env['project.task'].flush_model(['project_id', 'write_date'])
+        self.env['account.analytic.line'].flush_model(['project_id', 'write_date'])
+        self.env['project.milestone'].flush_model(['project_id', 'write_date'])
+        self.env['sale.order.line'].flush_model(['order_id', 'project_id', 'write_date'])
+        self.env['account.move.line'].flush_model(['move_id', 'analytic_distribution', 'write_date'])
+        self.env['account.move'].flush_model(['write_date'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT project.write_date,
+                   project.x_profitability_date,
+                   task.last_write_date,
+                   task.count,
+                   timesheet.last_write_date,
+                   timesheet.count,
+                   milestone.last_write_date,
+                   milestone.count,
+                   sale_line.last_write_date,
+                   sale_line.count,
+                   move_line.last_write_date,
+                   move_line.count
+              FROM project_project project,
+                   LATERAL (
+                        SELECT MAX(write_date) AS last_write_date, COUNT(*) AS count
+                          FROM project_task
+                         WHERE project_id = project.id
+                   ) task,
+                   LATERAL (
+                        SELECT MAX(write_date) AS last_write_date, COUNT(*) AS count
+                          FROM account_analytic_line
+                         WHERE project_id = project.id
+                   ) timesheet,
+                   LATERAL (
+                        SELECT MAX(write_date) AS last_write_date, COUNT(*) AS count
+                          FROM project_milestone
+                         WHERE project_id = project.id
+                   ) milestone,
+                   LATERAL (
+                        SELECT MAX(line.write_date) AS last_write_date, COUNT(*) AS count
+                          FROM sale_order_line line
+                         WHERE line.project_id = project.id
+                            OR line.order_id IN (
+                                SELECT order_id
+                                  FROM project_profitability_sale_order_rel
+                                 WHERE project_id = project.id
+                            )
+                   ) sale_line,
+                   LATERAL (
+                        SELECT MAX(GREATEST(line.write_date, move.write_date)) AS last_write_date,
+                               COUNT(*) AS count
+                          FROM account_move_line line
+                          JOIN account_move move ON move.id = line.move_id
+                         WHERE project.account_id IS NOT NULL
+                           AND line.analytic_distribution ? project.account_id::text
+                   ) move_line
+             WHERE project.id = %s
+            """,
+            self.id,
+        ))
+        return tuple(self.env.cr.fetchone() or ())
+
     def get_panel_data(self):
         """
         Extend the project panel data to include additional profitability information.
         Includes: HR cost button, sold_items (Contract Terms), and profitability_items.
+
+        The assembled payload is cached per project, user, language and
+        company until _get_panel_data_version() changes. This is a pure read:
+        queued projects show their stored metrics until the queue cron, which
+        is triggered at the end of the enqueuing transaction, recomputes them.
         """
+        self.ensure_one()
+        key = (
+            self.env.cr.dbname, self.id, self.env.uid, self.env.lang,
+            tuple(self.env.companies.ids), self._get_panel_data_version(),
+        )
+        data = _panel_data_cache.get(key)
+        if data is None:
+            data = self._get_panel_data_uncached()
+            _panel_data_cache[key] = data
+        # Callers may extend the payload in place
+        return copy.deepcopy(data)
+
+    def _get_panel_data_uncached(self):
         self.ensure_one()
         data = super().get_panel_data()
         
         if not data:
             return data
-            
-        # Force recomputation to ensure up-to-date values
-        self._compute_profitability_metrics()
 
         # Add custom button for Summary of HR Costs
         if 'buttons' in data:
@@ -528,14 +1040,14 @@ Please verify and update their timesheet costs in the HR module to ensure accura
         """
         Override to include both sale order lines and direct sale orders.
         This ensures projects linked directly to sale orders (not just via sale lines) are included.
+
+        The orders resolved by _reconcile_sale_orders() (including the orders
+        named like the project) are read from x_sale_order_ids instead of
+        being searched again; the manual exclusions are honoured.
         """
         sale_orders = super()._get_sale_orders()
         # Also include direct sale order connections
         if self.sale_order_id:
             sale_orders |= self.sale_order_id
-        
-        # Additional fallback: search by project name if no direct links found
-        if not sale_orders:
-            sale_orders = self.env['sale.order'].search([('name', '=', self.name)], limit=1)
-        
-        return sale_orders
+        sale_orders |= self.x_sale_order_ids
+        return sale_orders - self.x_sale_order_exclude_ids
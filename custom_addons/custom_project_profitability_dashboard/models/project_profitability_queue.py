@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Queue of projects whose stored profitability metrics are out of date.
+
+Changes to the data the metrics are computed from (timesheets, employee
+hourly costs, sale orders, extra costs, business trips) only enqueue the
+affected projects. The queue is drained by a cron, triggered at the end of
+each transaction that enqueued something, so the project panel just reads
+the stored values instead of recomputing them on every load.
+"""
+
+from odoo import api, models, fields
+from odoo.tools import SQL
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Number of projects recomputed (and committed) at once by the cron
+PROFITABILITY_BATCH_SIZE = 100
+
+
+class ProjectProfitabilityQueue(models.Model):
+    _name = 'project.profitability.queue'
+    _description = 'Project Profitability Recompute Queue'
+    _log_access = False
+    _order = 'queued_at, id'
+
+    project_id = fields.Many2one('project.project', string='Project', required=True, ondelete='cascade')
+    queued_at = fields.Datetime(string='Queued At', required=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('project_uniq', 'unique(project_id)', 'A project can only be queued once.'),
+    ]
+
+    @api.model
+    def _enqueue(self, project_ids):
+        """
+        Mark the given projects as dirty. The rows are inserted at the end of
+        the current transaction, so batch operations enqueue each project once.
+        """
+        project_ids = {project_id for project_id in project_ids if isinstance(project_id, int)}
+        if not project_ids:
+            return
+        dirty = self.env.cr.precommit.data.setdefault('project.profitability.queue', set())
+        if not dirty:
+            self.env.cr.precommit.add(self._flush_enqueued)
+        dirty.update(project_ids)
+
+    def _flush_enqueued(self):
+        project_ids = self.env.cr.precommit.data.pop('project.profitability.queue', set())
+        if not project_ids:
+            return
+        self.env['project.project'].flush_model()
+        # Projects deleted in the same transaction are skipped
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(queue)s (project_id, queued_at)
+                 SELECT id, now() AT TIME ZONE 'UTC'
+                   FROM project_project
+                  WHERE id = ANY(%(project_ids)s)
+            ON CONFLICT (project_id) DO NOTHING
+            """,
+            queue=SQL.identifier(self._table),
+            project_ids=list(project_ids),
+        ))
+        self.env.ref('custom_project_profitability_dashboard.ir_cron_process_profitability_queue')._trigger()
+
+    @api.model
+    def _pop(self, limit=None, project_ids=None):
+        """
+        Remove and return up to ``limit`` queued project ids, oldest first.
+        Rows locked by a concurrent worker are skipped; if the caller's
+        transaction is rolled back, the projects stay queued.
+        """
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM %(queue)s
+             WHERE id IN (
+                    SELECT id FROM %(queue)s
+                     WHERE %(project_filter)s
+                     ORDER BY queued_at, id
+                     LIMIT %(limit)s
+                       FOR UPDATE SKIP LOCKED
+             )
+            RETURNING project_id
+            """,
+            queue=SQL.identifier(self._table),
+            project_filter=SQL("project_id = ANY(%s)", list(project_ids)) if project_ids is not None else SQL("TRUE"),
+            limit=limit,
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _process(self, projects):
+        """Recompute the given projects now if they are queued"""
+        project_ids = self._pop(project_ids=projects.ids)
+        if project_ids:
+            self.env['project.project'].browse(project_ids)._recompute_profitability_metrics()
+
+    @api.model
+    def _cron_process_queue(self, batch_size=PROFITABILITY_BATCH_SIZE):
+        """
+        Recompute the queued projects, committing after each batch. A batch
+        that fails is rolled back and retried one project at a time, so a
+        single broken project does not block the rest of the queue.
+        """
+        while True:
+            project_ids = self._pop(limit=batch_size)
+            if not project_ids:
+                break
+            projects = self.env['project.project'].browse(project_ids)
+            try:
+                projects._recompute_profitability_metrics()
+                self.env.cr.commit()
+            except Exception:
+                self.env.cr.rollback()
+                _logger.warning("Profitability batch of %s projects failed, retrying them one by one", len(project_ids))
+                self._process_one_by_one(project_ids)
+            _logger.info("Recomputed profitability metrics of %s projects", len(project_ids))
+
+    @api.model
+    def _process_one_by_one(self, project_ids):
+        """
+        Recompute the given projects one at a time, committing after each one.
+        A project that fails is logged and dropped from the queue; it is queued
+        again by the next change to its data.
+        """
+        for project_id in project_ids:
+            # Skip the projects taken over by a concurrent worker meanwhile
+            if not self._pop(project_ids=[project_id]):
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    self.env['project.project'].browse(project_id)._recompute_profitability_metrics()
+            except Exception:
+                _logger.exception("Could not recompute the profitability metrics of project %s", project_id)
+            self.env.cr.commit()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+What-if simulation of the project margins.
+
+The cost components of a set of projects (revenue, HR cost per employee,
+travel and other costs) are loaded once into flat arrays by
+ProfitabilityComponents.load(); each scenario is then applied over the
+arrays in plain Python, without reading or writing anything else:
+
+    components = ProfitabilityComponents.load(projects)
+    components.simulate(facilities_rate=0.18, employee_rate_deltas={7: 0.05})
+
+A scenario accepts:
+- ``facilities_rate``: facilities cost rate applied to all projects
+  (default: the rate of each project company)
+- ``rate_delta``: relative change of all hourly costs (0.05 for +5%)
+- ``employee_rate_deltas``: {employee_id: relative change}, overriding
+  ``rate_delta`` for those employees
+- ``travel_multiplier``: factor applied to travel & lodging costs
+"""
+
+from odoo import api, models
+from odoo.exceptions import AccessError
+from odoo.tools import SQL
+
+
+class ProfitabilityComponents:
+    """Per-project cost components of a set of projects, as parallel lists"""
+
+    def __init__(self, project_ids, net_value, travel, other_costs, facilities_rate, hr_entries):
+        self.project_ids = project_ids
+        self.net_value = net_value
+        self.travel = travel
+        self.other_costs = other_costs
+        self.facilities_rate = facilities_rate
+        # (project index, employee id, stamped HR cost)
+        self.hr_entries = hr_entries
+
+    @classmethod
+    def load(cls, projects):
+        """Load the stored cost components of the given projects with two queries"""
+        env = projects.env
+        projects.flush_recordset(['x_net_value', 'x_travel_lodging', 'x_other_costs', 'company_id'])
+        env['account.analytic.line'].flush_model(['project_id', 'employee_id', 'x_hr_cost_amount'])
+        env.cr.execute(SQL(
+            """
+            SELECT project.id,
+                   COALESCE(project.x_net_value, 0),
+                   COALESCE(project.x_travel_lodging, 0),
+                   COALESCE(project.x_other_costs, 0),
+                   COALESCE(company.facilities_cost_rate, 0)
+              FROM project_project project
+         LEFT JOIN res_company company ON company.id = COALESCE(project.company_id, %(company_id)s)
+             WHERE project.id = ANY(%(project_ids)s)
+          ORDER BY project.id
+            """,
+            company_id=env.company.id,
+            project_ids=projects.ids,
+        ))
+        rows = env.cr.fetchall()
+        project_ids = [row[0] for row in rows]
+        index = {project_id: position for position, project_id in enumerate(project_ids)}
+        env.cr.execute(SQL(
+            """
+            SELECT project_id, employee_id, SUM(x_hr_cost_amount)
+              FROM account_analytic_line
+             WHERE project_id = ANY(%(project_ids)s)
+               AND employee_id IS NOT NULL
+          GROUP BY project_id, employee_id
+            """,
+            project_ids=project_ids,
+        ))
+        hr_entries = [
+            (index[project_id], employee_id, float(cost or 0.0))
+            for project_id, employee_id, cost in env.cr.fetchall()
+        ]
+        return cls(
+            project_ids,
+            [float(row[1]) for row in rows],
+            [float(row[2]) for row in rows],
+            [float(row[3]) for row in rows],
+            [float(row[4]) for row in rows],
+            hr_entries,
+        )
+
+    def simulate(self, facilities_rate=None, rate_delta=0.0, employee_rate_deltas=None, travel_multiplier=1.0):
+        """Return the simulated cost components and margin of every project"""
+        employee_rate_deltas = {int(employee_id): delta for employee_id, delta in (employee_rate_deltas or {}).items()}
+        hr_cost = [0.0] * len(self.project_ids)
+        for position, employee_id, cost in self.hr_entries:
+            hr_cost[position] += cost * (1.0 + employee_rate_deltas.get(employee_id, rate_delta))
+        facilities_rates = self.facilities_rate if facilities_rate is None else [facilities_rate] * len(hr_cost)
+        facilities = [cost * rate for cost, rate in zip(hr_cost, facilities_rates)]
+        travel = [cost * travel_multiplier for cost in self.travel]
+        margin = [
+            net - (hr + fac + trav + other)
+            for net, hr, fac, trav, other in zip(self.net_value, hr_cost, facilities, travel, self.other_costs)
+        ]
+        return {
+            'hr_cost': hr_cost,
+            'facilities_cost': facilities,
+            'travel_lodging': travel,
+            'margin': margin,
+        }
+
+
+class Project(models.Model):
+    _inherit = 'project.project'
+
+    @api.model
+    def simulate_profitability(self, scenarios, domain=None):
+        """
+        Return the margins of the projects matching ``domain`` (all readable
+        projects by default) under each scenario, without writing anything:
+
+            {
+                'project_ids': [1, 2, ...],
+                'current_margin': [0.0, ...],
+                'scenarios': [{'name': '...', 'margin': [...], 'total_margin': 0.0, ...}],
+            }
+
+        See the module docstring for the scenario parameters.
+        """
+        if not self.env.user.has_group('custom_project_profitability_dashboard.group_custom_profitability_access'):
+            raise AccessError(self.env._("You are not allowed to access the project profitability data."))
+        components = ProfitabilityComponents.load(self.search(domain or []))
+        current = components.simulate()
+        results = []
+        for position, scenario in enumerate(scenarios):
+            simulated = components.simulate(
+                facilities_rate=scenario.get('facilities_rate'),
+                rate_delta=scenario.get('rate_delta', 0.0),
+                employee_rate_deltas=scenario.get('employee_rate_deltas'),
+                travel_multiplier=scenario.get('travel_multiplier', 1.0),
+            )
+            results.append(dict(
+                simulated,
+                name=scenario.get('name') or self.env._("Scenario %s", position + 1),
+                total_margin=sum(simulated['margin']),
+                margin_delta=sum(simulated['margin']) - sum(current['margin']),
+            ))
+        return {
+            'project_ids': components.project_ids,
+            'current_margin': current['margin'],
+            'scenarios': results,
+        }
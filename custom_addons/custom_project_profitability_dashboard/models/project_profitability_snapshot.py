@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Daily snapshots of the stored project profitability metrics, for trend reporting.
+
+A cron copies the metrics of every project in a single INSERT ... SELECT
+each night. Daily snapshots older than SNAPSHOT_DAILY_DAYS are downsampled
+to one snapshot per week (the last one of the week), and weekly snapshots
+older than SNAPSHOT_WEEKLY_DAYS are deleted.
+"""
+
+from odoo import api, models, fields
+from odoo.tools import SQL
+from datetime import timedelta
+import logging
+
+from .project import PORTFOLIO_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Age (in days) after which daily snapshots are downsampled to weekly ones
+SNAPSHOT_DAILY_DAYS = 90
+# Age (in days) after which weekly snapshots are deleted
+SNAPSHOT_WEEKLY_DAYS = 5 * 365
+
+
+class ProjectProfitabilitySnapshot(models.Model):
+    _name = 'project.profitability.snapshot'
+    _description = 'Project Profitability Snapshot'
+    _order = 'date desc, project_id'
+    _log_access = False
+
+    project_id = fields.Many2one('project.project', string='Project', required=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', string='Currency')
+    date = fields.Date(string='Date', required=True, readonly=True)
+    period = fields.Selection([
+        ('day', 'Daily'),
+        ('week', 'Weekly'),
+    ], string='Granularity', required=True, default='day', readonly=True)
+    x_net_value = fields.Monetary(string="Untaxed Amount", currency_field='currency_id', readonly=True)
+    x_total_hr_cost = fields.Monetary(string="HR Costs", currency_field='currency_id', readonly=True)
+    x_facilities_cost = fields.Monetary(string="Facilities Costs", currency_field='currency_id', readonly=True)
+    x_travel_lodging = fields.Monetary(string="Travel & Lodging", currency_field='currency_id', readonly=True)
+    x_other_costs = fields.Monetary(string="Other Costs", currency_field='currency_id', readonly=True)
+    x_final_margin = fields.Monetary(string="Final Margin", currency_field='currency_id', readonly=True)
+    x_total_taxes = fields.Monetary(string="Total Taxes", currency_field='currency_id', readonly=True)
+
+    _sql_constraints = [
+        ('project_date_uniq', 'unique(project_id, date)', 'A project can only have one snapshot per day.'),
+    ]
+
+    @api.model
+    def _take_snapshot(self, date=None):
+        """Copy the stored metrics of all projects into the snapshots of ``date`` (today by default)"""
+        date = date or fields.Date.context_today(self)
+        self.env['project.project'].flush_model(PORTFOLIO_FIELDS + ['company_id', 'active'])
+        columns = SQL(", ").join([SQL.identifier(fname) for fname in PORTFOLIO_FIELDS])
+        updates = SQL(", ").join([
+            SQL("%s = EXCLUDED.%s", SQL.identifier(fname), SQL.identifier(fname)) for fname in PORTFOLIO_FIELDS
+        ])
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(snapshot)s (project_id, company_id, date, period, %(columns)s)
+                 SELECT id, company_id, %(date)s, 'day', %(columns)s
+                   FROM project_project
+                  WHERE active
+            ON CONFLICT (project_id, date) DO UPDATE SET %(updates)s
+            """,
+            snapshot=SQL.identifier(self._table),
+            columns=columns,
+            updates=updates,
+            date=date,
+        ))
+        _logger.info("Took %s project profitability snapshots for %s", self.env.cr.rowcount, date)
+        self.invalidate_model()
+
+    @api.model
+    def _apply_retention(self, today=None):
+        """Downsample the old daily snapshots to weekly ones and delete the expired weekly snapshots"""
+        today = today or fields.Date.context_today(self)
+        # Cut at a week start so that every downsampled week is complete
+        daily_cutoff = today - timedelta(days=SNAPSHOT_DAILY_DAYS)
+        daily_cutoff -= timedelta(days=daily_cutoff.weekday())
+        weekly_cutoff = today - timedelta(days=SNAPSHOT_WEEKLY_DAYS)
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE %(snapshot)s
+               SET period = 'week'
+             WHERE id IN (
+                    SELECT DISTINCT ON (project_id, date_trunc('week', date)) id
+                      FROM %(snapshot)s
+                     WHERE period = 'day'
+                       AND date < %(daily_cutoff)s
+                  ORDER BY project_id, date_trunc('week', date), date DESC
+             )
+            """,
+            snapshot=SQL.identifier(self._table),
+            daily_cutoff=daily_cutoff,
+        ))
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM %(snapshot)s
+             WHERE (period = 'day' AND date < %(daily_cutoff)s)
+                OR date < %(weekly_cutoff)s
+            """,
+            snapshot=SQL.identifier(self._table),
+            daily_cutoff=daily_cutoff,
+            weekly_cutoff=weekly_cutoff,
+        ))
+        _logger.info("Deleted %s expired project profitability snapshots", self.env.cr.rowcount)
+        self.invalidate_model()
+
+    @api.model
+    def _cron_take_snapshots(self):
+        """Recompute the dirty projects, snapshot all projects, then apply the retention policy"""
+        self.env['project.profitability.queue']._cron_process_queue()
+        self._take_snapshot()
+        self._apply_retention()
+
+    @api.model
+    def get_profitability_trend(self, project_ids=None, date_from=None, date_to=None, period='week', metrics=None):
+        """
+        Return the profitability trend of the given projects (all readable
+        projects by default), summed over the projects per day or per week:
+
+            [{'date': '2026-01-05', 'x_final_margin': 0.0, ...}, ...]
+
+        Weekly points hold the last snapshot of each week.
+        """
+        metrics = [fname for fname in (metrics or PORTFOLIO_FIELDS) if fname in PORTFOLIO_FIELDS]
+        domain = []
+        if project_ids is not None:
+            domain.append(('project_id', 'in', list(project_ids)))
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if not metrics:
+            return []
+        query = self._search(domain)
+        bucket = SQL("date_trunc('week', %s)::date", SQL.identifier(self._table, 'date')) if period == 'week' \
+            else SQL.identifier(self._table, 'date')
+        # Keep the last snapshot of each project per bucket, then sum over the projects
+        query.order = SQL("%s, %s, %s DESC", SQL.identifier(self._table, 'project_id'), bucket,
+                          SQL.identifier(self._table, 'date'))
+        self.env.cr.execute(SQL(
+            """
+            SELECT bucket, %(sums)s
+              FROM (
+                    %(latest)s
+                   ) latest
+          GROUP BY bucket
+          ORDER BY bucket
+            """,
+            sums=SQL(", ").join([SQL("SUM(%s)", SQL.identifier(fname)) for fname in metrics]),
+            latest=query.select(
+                SQL("DISTINCT ON (%s, %s) %s AS bucket",
+                    SQL.identifier(self._table, 'project_id'), bucket, bucket),
+                *[SQL.identifier(self._table, fname) for fname in metrics],
+            ),
+        ))
+        return [
+            dict({'date': fields.Date.to_string(row[0])}, **{
+                fname: float(value or 0.0) for fname, value in zip(metrics, row[1:])
+            })
+            for row in self.env.cr.fetchall()
+        ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+
+class ProjectTask(models.Model):
+    """Enqueue the projects whose sale orders change with the sale lines of their tasks"""
+    _inherit = 'project.task'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super().create(vals_list)
+        tasks.filtered('sale_line_id').project_id._mark_profitability_dirty()
+        return tasks
+
+    def write(self, vals):
+        if not {'sale_line_id', 'project_id'}.intersection(vals):
+            return super().write(vals)
+        projects = self.filtered('sale_line_id').project_id
+        res = super().write(vals)
+        (projects | self.filtered('sale_line_id').project_id)._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self.filtered('sale_line_id').project_id._mark_profitability_dirty()
+        return super().unlink()
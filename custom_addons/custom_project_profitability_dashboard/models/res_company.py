@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    facilities_cost_rate = fields.Float(
+        string="Facilities Cost Rate",
+        default=0.15,
+        help="Facilities costs of a project, as a share of its HR costs."
+    )
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'facilities_cost_rate' in vals:
+            self.env['project.project'].with_context(active_test=False).search([
+                ('company_id', 'in', self.ids),
+            ])._mark_profitability_dirty()
+        return res
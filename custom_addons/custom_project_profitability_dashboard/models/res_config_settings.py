@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    facilities_cost_rate = fields.Float(
+        related='company_id.facilities_cost_rate',
+        readonly=False,
+        string="Facilities Cost Rate",
+        help="Facilities costs of a project, as a share of its HR costs."
+    )
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+
+class SaleOrder(models.Model):
+    """Enqueue the projects whose revenues, taxes and extra costs change with their sale orders"""
+    _inherit = 'sale.order'
+
+    # Fields that change the projects an order is linked to
+    _PROFITABILITY_FIELDS = {'name', 'project_id', 'order_line', 'custom_sale_order_ids'}
+
+    def _get_profitability_projects(self):
+        """
+        Return the projects whose profitability metrics include these orders,
+        or may include them once reconciled (see Project._reconcile_sale_orders).
+        """
+        if not self:
+            return self.env['project.project']
+        orders = self.sudo()
+        names = [name for name in orders.mapped('name') if name]
+        return orders.project_ids | orders.env['project.project'].with_context(active_test=False).search([
+            '|', '|', ('sale_order_id', 'in', self.ids), ('name', 'in', names), ('x_sale_order_ids', 'in', self.ids),
+        ])
+
+    def write(self, vals):
+        if not self._PROFITABILITY_FIELDS.intersection(vals):
+            return super().write(vals)
+        projects = self._get_profitability_projects()
+        res = super().write(vals)
+        (projects | self._get_profitability_projects())._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self._get_profitability_projects()._mark_profitability_dirty()
+        return super().unlink()
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    # Fields the order amounts are computed from
+    _PROFITABILITY_FIELDS = {'order_id', 'product_id', 'product_uom_qty', 'price_unit', 'discount', 'tax_id', 'project_id'}
+
+    def _get_profitability_projects(self):
+        return self.order_id._get_profitability_projects() | self.project_id
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines._get_profitability_projects()._mark_profitability_dirty()
+        return lines
+
+    def write(self, vals):
+        if not self._PROFITABILITY_FIELDS.intersection(vals):
+            return super().write(vals)
+        projects = self._get_profitability_projects()
+        res = super().write(vals)
+        (projects | self._get_profitability_projects())._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self._get_profitability_projects()._mark_profitability_dirty()
+        return super().unlink()
+
+
+class CustomSaleOrder(models.Model):
+    """Enqueue the projects whose other costs change with the order extra costs"""
+    _inherit = 'custom.sale.order'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        costs = super().create(vals_list)
+        costs.sale_order_id._get_profitability_projects()._mark_profitability_dirty()
+        return costs
+
+    def write(self, vals):
+        if not {'sale_order_id', 'service_price'}.intersection(vals):
+            return super().write(vals)
+        orders = self.sale_order_id
+        res = super().write(vals)
+        (orders | self.sale_order_id)._get_profitability_projects()._mark_profitability_dirty()
+        return res
+
+    def unlink(self):
+        self.sale_order_id._get_profitability_projects()._mark_profitability_dirty()
+        return super().unlink()
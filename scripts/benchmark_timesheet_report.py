@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Benchmark of the Employee Timesheet Report (report table + payroll export)
+# =============================================================================
+# This script:
+# 1. Creates a throwaway database and installs Employee_Timesheet_Report
+# 2. Generates synthetic employees, projects, tasks, timesheets and leaves
+#    (template records created with the ORM, then cloned in bulk with SQL)
+# 3. Times the report rebuild/refresh, common list/pivot group-bys, the
+#    monthly summary and the XML export, with query counts and EXPLAIN plans
+# 4. Writes a JSON report, optionally compared with a previous one
+# 5. Drops the database (unless --keep-db)
+#
+# Scenarios the checked out revision cannot run are skipped, so the script
+# also runs on revisions where the report is still a SQL view (no report
+# table, incremental refresh or monthly summary) to compare before/after.
+#
+# Usage (odoo must be importable, options after -- go to odoo):
+#   python3 scripts/benchmark_timesheet_report.py --employees 200 --years 3 \
+#       --output bench.json -- -c test.cfg
+#   python3 scripts/benchmark_timesheet_report.py --compare bench_before.json \
+#       --output bench_after.json -- -c test.cfg
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.sql_db import Cursor
+from odoo.tools import config
+
+DEFAULT_MODULES = ['Employee_Timesheet_Report', 'project_timesheet_time_control']
+INSERT_BATCH_SIZE = 50000
+
+LIST_FIELDS = [
+    'employee_id', 'date', 'date_time', 'end_time', 'total_hours', 'office_hours',
+    'hours_18_22', 'hours_22_06', 'hours_shortage', 'leave_type_id', 'is_delayed', 'is_weekend',
+]
+SUM_FIELDS = ['total_hours:sum', 'office_hours:sum', 'hours_18_22:sum', 'hours_22_06:sum', 'hours_shortage:sum']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the timesheet report and payroll XML export")
+    parser.add_argument('--db', default='bench_timesheet_report', help='Throwaway database name (dropped first)')
+    parser.add_argument('--modules', default=','.join(DEFAULT_MODULES), help='Modules to install')
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--projects', type=int, default=40)
+    parser.add_argument('--tasks-per-project', type=int, default=10)
+    parser.add_argument('--lines-per-day', type=int, default=2, help='Maximum timesheet lines per employee and day')
+    parser.add_argument('--leaves-per-year', type=int, default=12, help='Validated leaves per employee and year')
+    parser.add_argument('--refresh-days', type=int, default=500, help='Employee-days of the incremental refresh')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario, the median is reported')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_timesheet_report.json')
+    parser.add_argument('--compare', help='Previous JSON report to compare with')
+    parser.add_argument('--fail-threshold', type=float, default=0.0,
+                        help='Exit with status 1 when a scenario is slower than threshold x the compared one')
+    parser.add_argument('--keep-db', action='store_true', help='Do not drop the database at the end')
+    parser.add_argument('odoo_args', nargs=argparse.REMAINDER, help='Options passed to odoo after --')
+    args = parser.parse_args()
+    if args.odoo_args[:1] == ['--']:
+        args.odoo_args = args.odoo_args[1:]
+    return args
+
+
+def log(message):
+    print(f"[{datetime.datetime.now():%H:%M:%S}] {message}", flush=True)
+
+
+# -----------------------------------------------------------------------------
+# Database
+# -----------------------------------------------------------------------------
+
+def create_database(args):
+    config.parse_config(args.odoo_args)
+    config['without_demo'] = 'all'
+    if args.db in odoo.service.db.list_dbs(True):
+        log(f"Dropping existing database {args.db}")
+        odoo.service.db.exp_drop(args.db)
+    log(f"Creating database {args.db}")
+    odoo.service.db._create_empty_database(args.db)
+    config['init'] = dict.fromkeys(args.modules.split(','), 1)
+    log(f"Installing {args.modules}")
+    registry = Registry.new(args.db, update_module=True)
+    config['init'] = {}
+    return registry
+
+
+def drop_database(args):
+    odoo.sql_db.close_db(args.db)
+    odoo.service.db.exp_drop(args.db)
+    log(f"Dropped database {args.db}")
+
+
+# -----------------------------------------------------------------------------
+# Synthetic data
+# -----------------------------------------------------------------------------
+
+def working_days(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        if day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def table_columns(cr, table):
+    cr.execute("""
+        SELECT column_name FROM information_schema.columns
+         WHERE table_name = %s AND column_name != 'id'
+         ORDER BY ordinal_position
+    """, [table])
+    return [column for column, in cr.fetchall()]
+
+
+def clone_rows(cr, table, template_id, rows, overrides):
+    """
+    Insert copies of a template row, one per entry of rows.
+
+    :param rows: dict column -> list of values, unnested as "src"
+    :param overrides: dict column -> SQL expression (may use src.<column>)
+    """
+    columns = table_columns(cr, table)
+    select = [overrides.get(column, f't."{column}"') for column in columns]
+    names = list(rows)
+    total = len(rows[names[0]])
+    for start in range(0, total, INSERT_BATCH_SIZE):
+        batch = [rows[name][start:start + INSERT_BATCH_SIZE] for name in names]
+        cr.execute(f"""
+            INSERT INTO {table} ({', '.join(f'"{column}"' for column in columns)})
+            SELECT {', '.join(select)}
+              FROM {table} t,
+                   unnest({', '.join('%s' for _name in names)}) AS src({', '.join(names)})
+             WHERE t.id = %s
+        """, batch + [template_id])
+    return total
+
+
+def generate_data(env, args):
+    rng = random.Random(args.seed)
+    cr = env.cr
+    date_to = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
+    date_from = date_to.replace(year=date_to.year - args.years) + datetime.timedelta(days=1)
+
+    log(f"Creating {args.employees} employees, {args.projects} projects")
+    employees = env['hr.employee'].create([
+        {'name': f'Bench Employee {index:04d}', 'payroll_code': str(index).zfill(7)}
+        for index in range(1, args.employees + 1)
+    ])
+    projects = env['project.project'].create([
+        {'name': f'Bench Project {index:03d}', 'allow_timesheets': True}
+        for index in range(1, args.projects + 1)
+    ])
+    tasks = env['project.task'].create([
+        {'name': f'Bench Task {index:02d}', 'project_id': project.id}
+        for project in projects
+        for index in range(1, args.tasks_per_project + 1)
+    ])
+    tasks_by_project = {project.id: project.task_ids.ids for project in projects}
+    leave_type_vals = {
+        'name': 'FE Ferie',
+        'requires_allocation': 'no',
+        'leave_validation_type': 'no_validation',
+    }
+    if 'payroll_code' in env['hr.leave.type']._fields:
+        leave_type_vals['payroll_code'] = 'FE'
+    leave_type = env['hr.leave.type'].create(leave_type_vals)
+
+    # Template records, created with the ORM so that every column gets a
+    # consistent value, then cloned in bulk
+    template_line = env['account.analytic.line'].create({
+        'name': 'Bench timesheet',
+        'project_id': projects[0].id,
+        'task_id': tasks[0].id,
+        'employee_id': employees[0].id,
+        'date': date_from,
+        'date_time': datetime.datetime.combine(date_from, datetime.time(7, 0)),
+        'unit_amount': 4.0,
+    })
+    template_leave = env['hr.leave'].create({
+        'name': 'Bench leave',
+        'employee_id': employees[0].id,
+        'holiday_status_id': leave_type.id,
+        'request_date_from': date_to,
+        'request_date_to': date_to,
+    })
+    env.flush_all()
+
+    log("Generating timesheet lines")
+    rows = {name: [] for name in ('employee_id', 'day', 'start', 'hours', 'project_id', 'task_id')}
+    days = list(working_days(date_from, date_to))
+    for employee in employees:
+        for day in days:
+            # Start between 06:30 and 09:30 UTC, sometimes late, sometimes with evening work
+            start = datetime.datetime.combine(day, datetime.time(6, 30)) + datetime.timedelta(minutes=rng.randrange(0, 180, 5))
+            for _slot in range(rng.randint(1, args.lines_per_day)):
+                project_id = rng.choice(projects.ids)
+                hours = rng.choice([1.0, 2.0, 2.5, 3.0, 4.0, 4.5, 6.0])
+                rows['employee_id'].append(employee.id)
+                rows['day'].append(day)
+                rows['start'].append(start)
+                rows['hours'].append(hours)
+                rows['project_id'].append(project_id)
+                rows['task_id'].append(rng.choice(tasks_by_project[project_id]))
+                start += datetime.timedelta(hours=hours)
+    overrides = {
+        'employee_id': 'src.employee_id',
+        'date': 'src.day',
+        'date_time': 'src.start',
+        'unit_amount': 'src.hours',
+        'amount': '-src.hours * 30',
+        'project_id': 'src.project_id',
+        'task_id': 'src.task_id',
+        'create_date': "now() AT TIME ZONE 'UTC'",
+        'write_date': "now() AT TIME ZONE 'UTC'",
+    }
+    if 'date_time_end' in table_columns(cr, 'account_analytic_line'):
+        overrides['date_time_end'] = "src.start + src.hours * interval '1 hour'"
+    if 'account_id' in table_columns(cr, 'project_project'):
+        overrides['account_id'] = '(SELECT p.account_id FROM project_project p WHERE p.id = src.project_id)'
+    line_count = clone_rows(cr, 'account_analytic_line', template_line.id, rows, overrides)
+
+    log("Generating validated leaves")
+    rows = {'employee_id': [], 'day': []}
+    for employee in employees:
+        for day in rng.sample(days, min(len(days), args.leaves_per_year * args.years)):
+            rows['employee_id'].append(employee.id)
+            rows['day'].append(day)
+    leave_count = clone_rows(cr, 'hr_leave', template_leave.id, rows, {
+        'employee_id': 'src.employee_id',
+        'request_date_from': 'src.day',
+        'request_date_to': 'src.day',
+        'date_from': "src.day + interval '7 hours'",
+        'date_to': "src.day + interval '16 hours'",
+        'state': "'validate'",
+        'create_date': "now() AT TIME ZONE 'UTC'",
+        'write_date': "now() AT TIME ZONE 'UTC'",
+    })
+    cr.execute("ANALYZE account_analytic_line")
+    cr.execute("ANALYZE hr_leave")
+    env.invalidate_all()
+    return {
+        'date_from': str(date_from),
+        'date_to': str(date_to),
+        'employees': len(employees),
+        'projects': len(projects),
+        'tasks': len(tasks),
+        'timesheet_lines': line_count + 1,
+        'leaves': leave_count + 1,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Measurements
+# -----------------------------------------------------------------------------
+
+@contextmanager
+def capture_queries(cr):
+    """Record (duration, query) of every statement executed on cr"""
+    queries = []
+    execute = Cursor.execute
+
+    def recording_execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = execute(self, *args, **kwargs)
+        if self is cr:
+            queries.append((time.perf_counter() - start, self._obj.query.decode()))
+        return result
+
+    Cursor.execute = recording_execute
+    try:
+        yield queries
+    finally:
+        Cursor.execute = execute
+
+
+def explain(cr, query):
+    """EXPLAIN plan of a captured query; read-only statements are also ANALYZEd"""
+    if query.startswith('DECLARE'):
+        query = query.split(' CURSOR FOR ', 1)[1]
+    is_select = query.lstrip().upper().startswith(('SELECT', 'WITH'))
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if is_select else 'FORMAT JSON'
+    cr.execute('SAVEPOINT bench_explain')
+    try:
+        cr.execute(f'EXPLAIN ({options}) {query}')
+        return cr.fetchone()[0]
+    finally:
+        cr.execute('ROLLBACK TO SAVEPOINT bench_explain')
+
+
+def measure(env, name, function, repeat):
+    """Run function repeat times; return timings, query count and plan of the slowest query"""
+    cr = env.cr
+    timings = []
+    query_counts = []
+    slowest = (0.0, None)
+    result = None
+    for _run in range(repeat):
+        env.invalidate_all()
+        with capture_queries(cr) as queries:
+            start = time.perf_counter()
+            result = function()
+            env.flush_all()
+            timings.append(time.perf_counter() - start)
+        query_counts.append(len(queries))
+        slowest = max([slowest] + [
+            (duration, query) for duration, query in queries
+            if not query.startswith(('FETCH', 'CLOSE', 'SAVEPOINT', 'RELEASE'))
+        ], key=lambda item: item[0])
+    measurement = {
+        'median_s': round(statistics.median(timings), 4),
+        'min_s': round(min(timings), 4),
+        'max_s': round(max(timings), 4),
+        'queries': max(query_counts),
+        'slowest_query_s': round(slowest[0], 4),
+        'slowest_query': slowest[1],
+        'plan': explain(cr, slowest[1]) if slowest[1] else None,
+    }
+    if isinstance(result, (list, str, bytes)):
+        measurement['result_size'] = len(result)
+    log(f"{name}: median {measurement['median_s']}s, {measurement['queries']} queries")
+    return measurement
+
+
+def rebuild_report(env):
+    """Build the report table; revisions where the report is a SQL view have nothing to build"""
+    Report = env['timesheet.report']
+    if hasattr(Report, '_rebuild_report'):
+        Report._rebuild_report()
+    else:
+        log("The report is a SQL view at this revision, nothing to build")
+
+
+def run_scenarios(env, args, data):
+    rng = random.Random(args.seed)
+    Report = env['timesheet.report']
+    # Sums of non-stored fields cannot be grouped (hours_shortage used to be computed in Python)
+    sum_fields = [spec for spec in SUM_FIELDS if Report._fields[spec.split(':')[0]].store]
+    last_month_from = datetime.date.fromisoformat(data['date_to']).replace(day=1)
+    last_month = [('date', '>=', last_month_from), ('date', '<=', data['date_to'])]
+
+    env.cr.execute("SELECT DISTINCT employee_id, date::date FROM timesheet_report")
+    employee_days = env.cr.fetchall()
+    refresh_days = rng.sample(employee_days, min(args.refresh_days, len(employee_days)))
+
+    scenarios = {}
+    if hasattr(Report, '_rebuild_report'):
+        scenarios['report_rebuild'] = lambda: Report._rebuild_report()
+    if hasattr(Report, '_refresh_employee_days'):
+        scenarios['report_refresh_incremental'] = lambda: Report._refresh_employee_days(refresh_days)
+    scenarios.update({
+        'list_default': lambda: Report.search_read([], LIST_FIELDS, limit=80, order='date desc, employee_id'),
+        'list_count': lambda: Report.search_count([]),
+        'list_last_month': lambda: Report.search_read(last_month, LIST_FIELDS, limit=80, order='date desc, employee_id'),
+        'group_by_employee': lambda: Report.read_group([], sum_fields, ['employee_id']),
+        'group_by_month': lambda: Report.read_group([], sum_fields, ['date:month']),
+        'group_by_project': lambda: Report.read_group([], sum_fields, ['project_id']),
+        'pivot_employee_month': lambda: Report.read_group([], sum_fields, ['employee_id', 'date:month'], lazy=False),
+        'xml_export_last_month': lambda: Report.generate_xml_report(last_month),
+        'xml_export_full': lambda: Report.generate_xml_report([]),
+    })
+    if 'timesheet.report.monthly' in env:
+        Monthly = env['timesheet.report.monthly']
+        scenarios['monthly_summary_pivot'] = lambda: Monthly.read_group(
+            [], ['total_hours:sum', 'hours_shortage:sum', 'days_late:sum'], ['employee_id', 'month:month'], lazy=False,
+        )
+    return {name: measure(env, name, function, args.repeat) for name, function in scenarios.items()}
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous_path, threshold):
+    """Print the ratio to a previous report; return False when a scenario regressed beyond threshold"""
+    with open(previous_path) as previous_file:
+        previous = json.load(previous_file)
+    print(f"\nComparison with {previous_path} ({previous['meta'].get('git_revision')})")
+    print(f"{'scenario':<30} {'before':>10} {'after':>10} {'ratio':>8} {'queries':>12}")
+    ok = True
+    for name, measurement in report['results'].items():
+        before = previous['results'].get(name)
+        if not before:
+            print(f"{name:<30} {'-':>10} {measurement['median_s']:>10.4f}")
+            continue
+        ratio = measurement['median_s'] / before['median_s'] if before['median_s'] else float('inf')
+        flag = ''
+        if threshold and ratio > threshold:
+            flag = '  REGRESSION'
+            ok = False
+        print(f"{name:<30} {before['median_s']:>10.4f} {measurement['median_s']:>10.4f} {ratio:>8.2f} "
+              f"{before['queries']:>5} -> {measurement['queries']:<5}{flag}")
+    return ok
+
+
+def main():
+    args = parse_args()
+    registry = create_database(args)
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            started = time.perf_counter()
+            data = generate_data(env, args)
+            log("Building the report table")
+            rebuild_report(env)
+            cr.commit()
+            log(f"Data generated in {time.perf_counter() - started:.1f}s: {data}")
+            cr.execute("SELECT version()")
+            pg_version = cr.fetchone()[0]
+            results = run_scenarios(env, args, data)
+            cr.rollback()
+    finally:
+        if not args.keep_db:
+            drop_database(args)
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'postgresql': pg_version,
+            'odoo': odoo.release.version,
+            'parameters': {key: value for key, value in vars(args).items() if key != 'odoo_args'},
+            'data': data,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, default=str)
+    log(f"Report written to {args.output}")
+
+    if args.compare and not compare(report, args.compare, args.fail_threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()